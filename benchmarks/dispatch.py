@@ -0,0 +1,99 @@
+"""Per-request overhead of the ways of serving an Api.
+
+Calls each WSGI application directly (no server, no sockets) and prints
+the time per request. With the package installed (``pip install -e .``):
+
+    python benchmarks/dispatch.py [requests]
+"""
+import io
+import sys
+import time
+
+from flask import Flask
+from werkzeug.test import EnvironBuilder
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+
+TASKS = [{'id': i, 'task': 'Task {}'.format(i)} for i in range(10)]
+
+
+def get_tasks(request):
+    return TASKS
+
+
+def get_task(request, task_id):
+    return TASKS[task_id]
+
+
+def post_task(request):
+    return request.json, 201
+
+
+def build_api(**kwargs):
+    api = Api(version="v1", **kwargs)
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/task/", handler=get_tasks))
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/task/<int:task_id>",
+        handler=get_task))
+    api.register_endpoint(ApiEndpoint(
+        http_method="POST", endpoint="/task/", handler=post_task))
+    return api
+
+
+def flask_app(**kwargs):
+    app = Flask(__name__)
+    app.register_blueprint(build_api(**kwargs))
+    return app.wsgi_app
+
+
+APPS = [
+    ('flask', lambda: flask_app()),
+    ('flask + route_table', lambda: flask_app(route_table=True)),
+    ('as_wsgi', lambda: build_api().as_wsgi()),
+]
+
+REQUESTS = [
+    ('GET /v1/task/', EnvironBuilder('/v1/task/')),
+    ('GET /v1/task/3', EnvironBuilder('/v1/task/3')),
+    ('POST /v1/task/', EnvironBuilder(
+        '/v1/task/', method='POST', json={'task': 'Do the dishes'})),
+]
+
+
+def start_response(status, headers, exc_info=None):
+    pass
+
+
+def measure(app, builder, count):
+    environ = builder.get_environ()
+    body = environ['wsgi.input'].read()
+    started = time.time()
+    for _ in range(count):
+        request_environ = dict(environ)
+        request_environ['wsgi.input'] = io.BytesIO(body)
+        app_iter = app(request_environ, start_response)
+        for _ in app_iter:
+            pass
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    return (time.time() - started) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for request_name, builder in REQUESTS:
+        print(request_name)
+        baseline = None
+        for app_name, factory in APPS:
+            app = factory()
+            measure(app, builder, 100)
+            seconds = measure(app, builder, count)
+            baseline = baseline or seconds
+            print('  {:<22}{:>8.1f} us/request {:>6.2f}x'.format(
+                app_name, seconds * 1e6, baseline / seconds))
+
+
+if __name__ == '__main__':
+    main()
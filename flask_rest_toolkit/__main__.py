@@ -0,0 +1,50 @@
+import sys
+import logging
+import argparse
+
+from .server import PreforkServer, load_app
+
+
+def serve(args):
+    if '' not in sys.path:
+        sys.path.insert(0, '')
+    app, apis = load_app(args.target)
+    host, _, port = args.bind.rpartition(':')
+    server = PreforkServer(
+        app, apis, host=host or '127.0.0.1', port=int(port),
+        workers=args.workers, cpu_affinity=args.cpu_affinity,
+        max_requests=args.max_requests,
+        graceful_timeout=args.graceful_timeout,
+        stats_interval=args.stats_interval)
+    server.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m flask_rest_toolkit')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parser_serve = commands.add_parser(
+        'serve', help="Serve an Api or a Flask app with preforked workers")
+    parser_serve.add_argument(
+        'target', help="Api or Flask app to serve, as module:attribute")
+    parser_serve.add_argument('--bind', default='127.0.0.1:8000',
+                              help="host:port to listen on")
+    parser_serve.add_argument('--workers', type=int, default=None,
+                              help="Number of workers (default: CPUs)")
+    parser_serve.add_argument('--cpu-affinity', action='store_true',
+                              help="Pin each worker to a CPU")
+    parser_serve.add_argument('--max-requests', type=int, default=0,
+                              help="Replace workers after this many requests")
+    parser_serve.add_argument('--graceful-timeout', type=float, default=30)
+    parser_serve.add_argument('--stats-interval', type=float, default=60,
+                              help="Seconds between worker stats reports")
+    parser_serve.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
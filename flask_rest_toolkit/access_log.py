@@ -0,0 +1,132 @@
+import os
+import time
+import atexit
+import logging
+import threading
+
+import simplejson as json
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+_STOP = object()
+
+
+def get_identity(request):
+    identity = getattr(request, 'identity', None)
+    if identity is not None:
+        if isinstance(identity, dict):
+            return identity.get('id')
+        return str(identity)
+    authorization = request.authorization
+    if authorization:
+        return authorization.get('username')
+    return None
+
+
+class AccessLogger(object):
+    """Structured access log written off the request thread.
+
+    Requests only build a record and put it in a bounded in-memory queue.
+    A background thread formats the records as JSON lines and hands them
+    to ``handler`` (any ``logging.Handler``: ``FileHandler``,
+    ``SocketHandler``...). When the queue is full records are dropped and
+    counted in ``dropped`` instead of blocking the request; records the
+    handler fails to write are counted in ``failed``.
+    """
+    def __init__(self, handler, max_queue=10000):
+        self.handler = handler
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(target=self._write)
+            self._thread.daemon = True
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    def _write(self):
+        records = self._queue
+        while True:
+            record = records.get()
+            if record is _STOP:
+                records.task_done()
+                return
+            log_record = logging.makeLogRecord({
+                'name': 'flask_rest_toolkit.access',
+                'levelno': logging.INFO,
+                'levelname': 'INFO',
+                'msg': record,
+            })
+            try:
+                log_record.msg = json.dumps(record)
+                self.handler.handle(log_record)
+                self.written += 1
+            except Exception:
+                self.failed += 1
+                self.handler.handleError(log_record)
+            finally:
+                records.task_done()
+
+    def log(self, record):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        if self._pid == os.getpid():
+            self._queue.join()
+            self.handler.flush()
+
+    def close(self, timeout=5):
+        """Write the queued records and stop the writer thread, waiting at
+        most ``timeout`` seconds. Records still queued after that are
+        lost."""
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(max(deadline - time.monotonic(), 0))
+        self.handler.flush()
+
+    def build_record(self, view_name, request, response, started, timings):
+        if response is None:
+            status = 500
+            response_bytes = None
+        else:
+            status = response.status_code
+            response_bytes = response.content_length
+        return {
+            'time': started,
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': status,
+            'duration': time.time() - started,
+            'phases': timings,
+            'request_bytes': request.content_length,
+            'response_bytes': response_bytes,
+            'identity': get_identity(request),
+        }
@@ -1,10 +1,25 @@
+import time
+
 from werkzeug.wrappers import Response as ResponseBase
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import (
+    HTTPException, NotFound, MethodNotAllowed)
+from werkzeug.routing import Map, Rule, RequestRedirect
 
-from flask import Blueprint, request, make_response
+from flask import Blueprint, request as flask_request
 
+from . import files
 from . import serializers
 from . import exceptions
 
+from .concurrency import ConcurrencyLimiter, Deadline
+from .tasks import TaskPool, BackgroundTasks
+from .routing import RouteTable
+from .response import ApiResponse, HeaderBlock, Response
+from .instrumentation import NULL_RECORDER, PhaseRecorder
+from .internal import InternalRequest
+from .loaders import RequestLoaders
+from .resources import Resources
 from .utils import unpack
 
 SERIALIZERS = {
@@ -13,83 +28,601 @@ SERIALIZERS = {
     'javascript': serializers.JavascriptSerializer,
 }
 
+DEFAULT_EXCEPTIONS = [
+    (exceptions.ServiceOverloadedException, 503),
+    (exceptions.HandlerTimeoutException, 504),
+    (exceptions.CircuitOpenException, 503),
+    (exceptions.PoolTimeoutException, 503),
+    (exceptions.IdempotencyConflictException, 409),
+    (exceptions.IdempotencyKeyReusedException, 422),
+]
+
+# Request attributes that belong to one run of the pipeline.
+REQUEST_STATE = frozenset([
+    'api', 'loaders', 'background_tasks', 'deadline', 'span', 'phases'])
+
 
 class ViewHandler(object):
     def __init__(self, endpoint, api):
         self.endpoint = endpoint
         self.api = api
+        self.view_name = endpoint.handler_name
+        self.url = endpoint.endpoint
+        self.exceptions = list(self.endpoint.exceptions) + DEFAULT_EXCEPTIONS
+        self.client_errors = set(
+            exc_class for exc_class, status_code in endpoint.exceptions
+            if status_code < 500)
+
+        self.timeout = endpoint.timeout or api.timeout
+        self.limiter = None
+        if endpoint.max_concurrency:
+            self.limiter = ConcurrencyLimiter(
+                endpoint.max_concurrency,
+                max_queue=endpoint.max_queue,
+                retry_after=api.retry_after)
+
+        self.authorize = None
+        if endpoint.authorization is not None:
+            self.authorize = endpoint.authorization.compile()
+
+        self.cors = endpoint.cors if endpoint.cors is not None else api.cors
+        self.cors = self.cors or None
+        self.route_views = {}
+
+        # Built at registration, so a bad header fails right away.
+        serializer = endpoint.serializer or api.serializer
+        self.serializer_name = serializer
+        self.serializer = None
+        content_type = []
+        if serializer in SERIALIZERS:
+            self.serializer = SERIALIZERS[serializer]()
+            content_type = [
+                ('Content-Type', self.serializer.get_content_type())]
+        self.header_block = HeaderBlock(
+            content_type, self.cors.static_headers() if self.cors else [],
+            api.headers, endpoint.headers)
+
+        self.prepared = False
+        if endpoint.resolved:
+            self.prepare()
+
+    def prepare(self):
+        """Resolve the endpoint and precompute which middleware hooks have
+        to run on the way out, so endpoints without them pay nothing."""
+        self.endpoint.resolve()
+        middleware = self.endpoint.middleware
+        self.response_hooks = any(
+            hasattr(m, 'process_response') for m in middleware)
+        self.exception_hooks = any(
+            hasattr(m, 'process_exception') for m in middleware)
+        self.prepared = True
 
     def process_request(self, request, *args, **kwargs):
+        if not hasattr(request, 'phases'):
+            request.phases = NULL_RECORDER
+        return self._process_request(request, [], args, kwargs)
+
+    def _process_request(self, request, instances, args, kwargs):
+        phases = request.phases
         try:
             for middleware_class in self.endpoint.middleware:
                 middleware = middleware_class()
+                instances.append(middleware)
                 method = getattr(middleware, 'process_request')
-                result = method(request, *args, **kwargs)
+                with phases.phase(
+                        'middleware.' + middleware_class.__name__):
+                    result = method(request, *args, **kwargs)
                 if result:
                     return result
         except Exception as exc:
             return self._handle_exception(
                 exc,
-                self.endpoint.exceptions + (getattr(
+                self.exceptions + list(getattr(
                     middleware_class, 'EXCEPTIONS', [])))
 
+    def _process_response(self, request, instances, response):
+        for middleware in reversed(instances):
+            method = getattr(middleware, 'process_response', None)
+            if method is not None:
+                response = method(request, response)
+        return response
+
+    def _process_exception(self, request, instances, exc):
+        for middleware in reversed(instances):
+            method = getattr(middleware, 'process_exception', None)
+            if method is not None:
+                result = method(request, exc)
+                if result is not None:
+                    return result
+
     def _get_serializer(self):
-        serializer = self.endpoint.serializer or self.api.serializer
-        if serializer not in SERIALIZERS:
+        if self.serializer is None:
             raise exceptions.InvalidSerializerException(
                 "{} is an invalid serializer".format(
-                    serializer))
-        return SERIALIZERS[serializer]()
+                    self.serializer_name))
+        return self.serializer
 
-    def build_response(self, output):
-        data, code, headers = unpack(output)
+    def build_response(self, output, request=None):
+        if isinstance(output, ApiResponse):
+            data, code, headers = output.data, output.status, output.headers
+        else:
+            data, code, headers = unpack(output)
 
         if isinstance(data, ResponseBase):
             return data
 
+        if isinstance(data, files.BinaryContent):
+            request = request if request is not None else flask_request
+            return data.make_response(request.environ, code, headers)
+
         serializer = self._get_serializer()
 
-        response = make_response(
-            serializer.serialize(data),
-            code
-        )
+        if self.endpoint.streaming:
+            try:
+                return self.endpoint.stream_response(
+                    data, code, headers, serializer)
+            except exceptions.ServiceOverloadedException as exc:
+                return self._handle_exception(exc, self.exceptions)
 
-        response.headers['Content-Type'] = headers.pop(
-            'Content-Type', serializer.get_content_type())
-        response.headers.extend(headers or {})
+        if not headers:
+            return Response(serializer.serialize(data), code,
+                            self.header_block.headers())
 
+        if not isinstance(headers, dict):
+            headers = Headers(headers)
+        response = Response(
+            serializer.serialize(data), code,
+            self.header_block.headers(headers.pop('Content-Type', None)))
+        response.headers.update(headers)
         return response
 
     def _handle_exception(self, exc, exception_list):
         for exc_class, status_code in exception_list:
             if exc_class == exc.__class__:
+                headers = dict(getattr(exc, 'headers', {}))
                 if hasattr(exc, 'data'):
-                    return self.build_response((exc.data, status_code))
-                return make_response("", status_code)
+                    return self.build_response(
+                        ApiResponse(exc.data, status_code, headers))
+                return Response(b'', status_code, Headers(headers))
         raise exc
 
+    def _acquire(self, deadline):
+        acquired = []
+        try:
+            for limiter in (self.limiter, self.api.limiter):
+                if limiter is not None:
+                    limiter.acquire(deadline)
+                    acquired.append(limiter)
+        except exceptions.ServiceOverloadedException:
+            self._release(acquired)
+            raise
+        return acquired
+
+    def _release(self, acquired):
+        for limiter in acquired:
+            limiter.release()
+
+    def allowed_methods(self):
+        methods = set(self.route_views) | set(['OPTIONS'])
+        if 'GET' in methods:
+            methods.add('HEAD')
+        return tuple(sorted(methods))
+
     def __call__(self, *args, **kwargs):
+        return self.handle(
+            flask_request._get_current_object(), *args, **kwargs)
+
+    def handle(self, request, *args, **kwargs):
+        if not self.prepared:
+            self.prepare()
+
+        access_log = self.api.access_log
+        tracer = self.api.tracer
+        if access_log is None and tracer is None:
+            request.phases = NULL_RECORDER
+            return self._profile(request, args, kwargs)
+
+        span = request.span = None
+        if tracer is not None:
+            span = request.span = tracer.start_span(
+                self.view_name, request.headers, attributes={
+                    'http.method': request.method,
+                    'http.target': request.path,
+                    'http.route': self.url,
+                })
+        request.phases = PhaseRecorder(span)
+        started = time.time()
+        response = None
+        try:
+            response = self._profile(request, args, kwargs)
+            return response
+        except Exception as exc:
+            if span is not None:
+                span.record_exception(exc)
+            raise
+        finally:
+            if span is not None:
+                if response is not None:
+                    span.set_attribute('http.status_code',
+                                       response.status_code)
+                    if response.status_code >= 500:
+                        span.status = 'ERROR'
+                span.end()
+            if access_log is not None:
+                access_log.log(access_log.build_record(
+                    self.view_name, request, response, started,
+                    request.phases.timings))
+
+    def _profile(self, request, args, kwargs):
+        profiler = self.api.profiler
+        if profiler is not None and profiler.should_profile(request):
+            return profiler.run(
+                self.view_name,
+                lambda: self._respond(request, args, kwargs))
+        return self._respond(request, args, kwargs)
+
+    def _respond(self, request, args, kwargs):
+        cors = self.cors
+        if cors is None:
+            return self._handle(request, args, kwargs)
+
+        if request.method == 'OPTIONS':
+            return cors.preflight(request, self.allowed_methods())
+
+        response = self._handle(request, args, kwargs)
+        if not (cors.static and
+                'Access-Control-Allow-Origin' in response.headers):
+            cors.apply(request.headers.get('Origin'), response)
+        return response
+
+    def _handle(self, request, args, kwargs):
         if self.endpoint.authentication:
-            self.endpoint.authentication.authenticate(request)
+            with request.phases.phase('authentication'):
+                self.endpoint.authentication.authenticate(request)
+        if self.authorize is not None:
+            with request.phases.phase('authorization'):
+                self.authorize(request, kwargs)
+
+        cache = self.endpoint.cache
+        if cache is not None and request.method in cache.methods:
+            return cache.run(
+                request, lambda: self._execute(request, args, kwargs),
+                lambda: self._execute(
+                    self._refresh_request(request), args, kwargs),
+                self.api.refresh_pool)
+
+        idempotency = self.endpoint.idempotency
+        if idempotency is not None:
+            key = idempotency.key(request)
+            if key is not None:
+                try:
+                    return idempotency.run(
+                        key, lambda: self._execute(request, args, kwargs),
+                        idempotency.fingerprint(request))
+                except (exceptions.IdempotencyConflictException,
+                        exceptions.IdempotencyKeyReusedException) as exc:
+                    return self._handle_exception(exc, self.exceptions)
+        return self._execute(request, args, kwargs)
+
+    def _refresh_request(self, request):
+        """Copy of a cached request to refresh its entry once the request
+        is over, keeping what authentication set on it (``identity``,
+        ``tenant``...). Handlers of cached endpoints can't use Flask
+        globals."""
+        copy = InternalRequest(dict(request.environ))
+        request_class = type(request)
+        for name, value in dict(request.__dict__).items():
+            if (name not in copy.__dict__ and
+                    name not in REQUEST_STATE and
+                    not hasattr(request_class, name)):
+                setattr(copy, name, value)
+        return copy
+
+    def _execute(self, request, args, kwargs):
+        deadline = None
+        if self.timeout:
+            deadline = request.deadline = Deadline(self.timeout)
 
-        output = self.process_request(request, *args, **kwargs)
+        try:
+            with request.phases.phase('queue'):
+                acquired = self._acquire(deadline)
+        except exceptions.ServiceOverloadedException as exc:
+            return self._handle_exception(exc, self.exceptions)
+
+        background_tasks = BackgroundTasks(self.api.task_pool)
+        request.background_tasks = background_tasks
+        try:
+            response = self.dispatch(request, deadline, *args, **kwargs)
+        finally:
+            self._release(acquired)
+
+        if background_tasks:
+            response.call_on_close(background_tasks.submit)
+        return response
+
+    def call_handler(self, request, *args, **kwargs):
+        breaker = self.endpoint.circuit_breaker
+        if breaker is None:
+            return self.endpoint.handler(request, *args, **kwargs)
+
+        try:
+            breaker.before_call()
+        except exceptions.CircuitOpenException:
+            if breaker.fallback is None:
+                raise
+            return breaker.fallback(request, *args, **kwargs)
+
+        with breaker.track(ignore=self.is_client_error):
+            return self.endpoint.handler(request, *args, **kwargs)
+
+    def is_client_error(self, exc):
+        if isinstance(exc, HTTPException):
+            return exc.code is None or exc.code < 500
+        return exc.__class__ in self.client_errors
+
+    def _run(self, request, deadline, instances, args, kwargs,
+             handle_exception):
+        """Middleware and handler of a request; returns their output."""
+        phases = request.phases
+        with phases.phase('middleware'):
+            output = self._process_request(request, instances, args, kwargs)
 
         if not output:
             request.api = self.api
+            if not hasattr(request, 'loaders'):
+                request.loaders = RequestLoaders(self.api.loaders)
+            resources = None
+            failed = False
             try:
-                output = self.endpoint.handler(request, *args, **kwargs)
+                if deadline is not None:
+                    deadline.check()
+                if self.endpoint.resources:
+                    with phases.phase('resources'):
+                        resources = Resources(self.api.resources,
+                                              self.endpoint.resources,
+                                              deadline)
+                    kwargs = dict(kwargs, **resources.kwargs())
+                with phases.phase('handler'):
+                    output = self.call_handler(request, *args, **kwargs)
             except Exception as exc:
-                return self._handle_exception(exc, self.endpoint.exceptions)
+                failed = not self.is_client_error(exc)
+                output = None
+                if self.exception_hooks:
+                    output = self._process_exception(request, instances, exc)
+                if output is None:
+                    output = handle_exception(exc, self.exceptions)
+            finally:
+                if resources is not None:
+                    resources.release(failed)
+        return output
 
-        return self.build_response(output)
+    def dispatch(self, request, deadline, *args, **kwargs):
+        instances = []
+        output = self._run(request, deadline, instances, args, kwargs,
+                           self._handle_exception)
+
+        phases = request.phases
+        with phases.phase('serialization'):
+            response = self.build_response(output, request)
+        if self.response_hooks:
+            with phases.phase('middleware'):
+                response = self._process_response(
+                    request, instances, response)
+        return response
+
+    def _native_exception(self, exc, exception_list):
+        for exc_class, status_code in exception_list:
+            if exc_class == exc.__class__:
+                return ApiResponse(getattr(exc, 'data', None), status_code,
+                                   dict(getattr(exc, 'headers', {})))
+        raise exc
+
+    def call(self, request, kwargs, authenticate=True):
+        """Run the endpoint for :meth:`Api.call`: authentication and
+        authorization, middleware and the handler, but no limits,
+        serializer or response hooks.
+
+        Returns an ApiResponse with the handler's data as is, mapped
+        exceptions included; a response returned by a middleware is
+        returned unchanged.
+        """
+        if not self.prepared:
+            self.prepare()
+        if authenticate:
+            if self.endpoint.authentication:
+                self.endpoint.authentication.authenticate(request)
+            if self.authorize is not None:
+                self.authorize(request, kwargs)
+
+        output = self._run(request, getattr(request, 'deadline', None), [],
+                           (), kwargs, self._native_exception)
+        if isinstance(output, (ApiResponse, ResponseBase)):
+            return output
+        return ApiResponse(*unpack(output))
+
+
+class RouteTableDispatcher(object):
+    """Single Flask view that serves every endpoint of an Api by looking
+    the path up in the Api's RouteTable."""
+    METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+
+    def __init__(self, routes, prefix=''):
+        self.routes = routes
+        self.prefix = prefix
+
+    def __call__(self, path=''):
+        return self.dispatch(flask_request._get_current_object(),
+                             self.prefix + path)
+
+    def dispatch(self, request, path):
+        try:
+            view, kwargs = self.routes.resolve(request.method, path)
+        except MethodNotAllowed as exc:
+            if request.method != 'OPTIONS':
+                raise
+            return Response(b'', 200, Headers([(
+                'Allow', ', '.join(exc.valid_methods + ['OPTIONS']))]))
+        except NotFound:
+            if (not path.endswith('/') and
+                    self.routes.match(path + '/')[0] is not None):
+                url = request.base_url + '/'
+                if request.query_string:
+                    url += '?' + request.query_string.decode('latin1')
+                raise RequestRedirect(url)
+            raise
+        return view.handle(request, **kwargs)
 
 
 class Api(Blueprint):
-    def __init__(self, version=None, name=None, serializer='json'):
+    def __init__(self, version=None, name=None, serializer='json',
+                 max_concurrency=None, max_queue=0, timeout=None,
+                 retry_after=1, background_workers=4,
+                 background_queue=1000, route_table=False, headers=None,
+                 cors=None, profiler=None, access_log=None, tracer=None,
+                 refresh_workers=2, refresh_queue=100):
         super(Api, self).__init__((version or '') + (name or ''), __name__)
         self.version = version
         self.endpoints = []
         self.serializer = serializer
+        self.headers = headers or {}
+        self.cors = cors
+        self.profiler = profiler
+        self.access_log = access_log
+        self.tracer = tracer
+
+        self.routes = RouteTable()
+        self.rule_views = {}
+        self.views = []
+        self._call_routes = None
+        self.route_table = route_table
+        if route_table:
+            self._add_route_table_rules()
+
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.limiter = None
+        if max_concurrency:
+            self.limiter = ConcurrencyLimiter(
+                max_concurrency, max_queue=max_queue,
+                retry_after=retry_after)
+
+        self.loaders = {}
+        self.resources = {}
+        self.task_pool = TaskPool(
+            workers=background_workers, max_queue=background_queue)
+        self.refresh_pool = TaskPool(
+            workers=refresh_workers, max_queue=refresh_queue)
+
+    def register_resource(self, name, pool):
+        """Register a :class:`~flask_rest_toolkit.resources.ResourcePool`
+        that endpoints declare with ``resources=[name]``; their handlers
+        get a resource from it as the ``name`` keyword argument."""
+        self.resources[name] = pool
+
+    def register_loader(self, name, batch_fn, max_batch_size=None):
+        """Register a batch function handlers use through
+        ``request.loaders[name]``, a request-scoped
+        :class:`~flask_rest_toolkit.loaders.DataLoader`."""
+        self.loaders[name] = (batch_fn, max_batch_size)
+
+    def call(self, method, path, body=None, headers=None, query_string=None,
+             parent=None, authenticate=True):
+        """Call one of this Api's endpoints in process, without HTTP.
+
+        The request goes through the endpoint's authentication, middleware
+        and handler, and the result is an ApiResponse holding the handler's
+        data unserialized. ``body`` reaches the handler as ``request.json``
+        unchanged (bytes and text are sent as the raw body).
+
+        ``parent``, the request making the call, lends its Authorization
+        and Cookie headers, ``identity``, deadline, background tasks and
+        (for calls to its own Api) DataLoaders; ``headers`` override them.
+        ``authenticate=False`` skips the endpoint's authentication and
+        authorization, for calls made on behalf of an already
+        authenticated parent. Concurrency limits aren't applied: the
+        parent already holds a slot.
+        """
+        request = InternalRequest.build(method, path, body, headers,
+                                        query_string, parent)
+        view, kwargs = self._resolve_call(request.method, request.path)
+        if (parent is not None and getattr(parent, 'api', None) is self and
+                hasattr(parent, 'loaders')):
+            request.loaders = parent.loaders
+
+        if parent is not None and hasattr(parent, 'background_tasks'):
+            request.background_tasks = parent.background_tasks
+            return view.call(request, kwargs, authenticate)
+
+        background_tasks = request.background_tasks = BackgroundTasks(
+            self.task_pool)
+        try:
+            return view.call(request, kwargs, authenticate)
+        finally:
+            background_tasks.submit()
+
+    def _resolve_call(self, method, path):
+        if self.route_table:
+            return self.routes.resolve(method, path)
+        # Flask-routed rules can use converters and shapes the RouteTable
+        # rejects, so they're matched with werkzeug like Flask does.
+        if self._call_routes is None:
+            self._call_routes = Map(
+                [Rule(url, endpoint=url, methods=list(views))
+                 for url, views in self.rule_views.items()],
+                strict_slashes=False).bind('')
+        url, kwargs = self._call_routes.match(path, method)
+        views = self.rule_views[url]
+        view = views.get(method)
+        if view is None and method == 'HEAD':
+            view = views['GET']
+        return view, kwargs
+
+    def as_wsgi(self):
+        """A WSGI application serving this Api's endpoints without Flask.
+        See :class:`flask_rest_toolkit.wsgi.WsgiApp`."""
+        from .wsgi import WsgiApp
+        return WsgiApp(self)
+
+    def as_asgi(self, executor=None):
+        """An ASGI application serving this Api's endpoints without Flask.
+        See :class:`flask_rest_toolkit.asgi.AsgiApp`."""
+        from .asgi import AsgiApp
+        return AsgiApp(self.as_wsgi(), executor=executor)
+
+    def shutdown(self, timeout=30):
+        self.task_pool.shutdown(timeout)
+        self.refresh_pool.shutdown(timeout)
+        for pool in self.resources.values():
+            pool.close()
+        if self.access_log is not None:
+            self.access_log.close(timeout)
+
+    def _add_route_table_rules(self):
+        prefix = '/{}/'.format(self.version) if self.version else '/'
+        dispatcher = RouteTableDispatcher(self.routes, prefix)
+        methods = RouteTableDispatcher.METHODS
+        self.add_url_rule(prefix, 'route-table-root', dispatcher,
+                          methods=methods, strict_slashes=False)
+        self.add_url_rule(prefix + '<path:path>', 'route-table', dispatcher,
+                          methods=methods, strict_slashes=False)
+
+    def warm_up(self):
+        """Import every endpoint registered with dotted paths, precompute
+        the per-endpoint state built on the first request and return the
+        import report."""
+        for endpoint in self.endpoints:
+            endpoint.resolve()
+        for url, methods, view in self.views:
+            view.prepare()
+            view._get_serializer()
+        return self.import_report()
+
+    def import_report(self):
+        """List of ``(dotted_path, seconds)`` of the imports done so far,
+        slowest first."""
+        timings = [timing for endpoint in self.endpoints
+                   for timing in endpoint.import_timings]
+        return sorted(timings, key=lambda timing: timing[1], reverse=True)
 
     def register_endpoint(self, endpoint):
         self.endpoints.append(endpoint)
@@ -106,12 +639,27 @@ class Api(Blueprint):
             methods = [endpoint.http_method]
 
         view_name = "{method}-{path}-{view}".format(
-            method=str(methods), path=url, view=endpoint.handler.__name__
+            method=str(methods), path=url, view=endpoint.handler_name
         )
 
+        view = ViewHandler(endpoint=endpoint, api=self)
+        view.view_name = view_name
+        view.url = url
+        if view.cors is not None:
+            methods = list(methods) + ['OPTIONS']
+        self.views.append((url, methods, view))
+        self._call_routes = None
+        if self.route_table:
+            view.route_views = self.routes.add(url, methods, view)
+            return
+
+        view.route_views = self.rule_views.setdefault(url, {})
+        for method in methods:
+            view.route_views.setdefault(method.upper(), view)
+
         self.add_url_rule(
             url,
             view_name,
-            ViewHandler(endpoint=endpoint, api=self),
+            view,
             methods=methods
         )
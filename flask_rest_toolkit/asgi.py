@@ -0,0 +1,121 @@
+import io
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP ``scope`` and its full body."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode(
+            'utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = 'HTTP_' + name
+        if key in environ:
+            # Cookie headers are joined with '; ', every other one with ','.
+            separator = '; ' if key == 'HTTP_COOKIE' else ','
+            value = environ[key] + separator + value
+        environ[key] = value
+    if body and 'CONTENT_LENGTH' not in environ:
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class AsgiApp(object):
+    """ASGI application running a :class:`~flask_rest_toolkit.wsgi.WsgiApp`.
+
+    Handlers are synchronous, so each request runs in ``executor`` (a
+    thread pool by default); the event loop only reads the body and
+    writes the response. Response bodies are sent chunk by chunk, so
+    streamed responses (Server-Sent Events) work. ``lifespan`` shutdown
+    drains the Apis' background tasks.
+    """
+    def __init__(self, wsgi_app, executor=None, max_workers=32):
+        self.wsgi_app = wsgi_app
+        self.executor = executor or ThreadPoolExecutor(max_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(
+                "Unsupported ASGI scope type {}".format(scope['type']))
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_event_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await loop.run_in_executor(
+                    self.executor, self.wsgi_app.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        environ = build_environ(scope, b''.join(chunks))
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers]
+
+        def first_chunk():
+            app_iter = self.wsgi_app(environ, start_response)
+            iterator = iter(app_iter)
+            return app_iter, iterator, next(iterator, None)
+
+        loop = asyncio.get_event_loop()
+        app_iter, iterator, chunk = await loop.run_in_executor(
+            self.executor, first_chunk)
+        try:
+            await send({'type': 'http.response.start',
+                        'status': started['status'],
+                        'headers': started['headers']})
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body',
+                                'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(
+                    self.executor, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(app_iter, 'close'):
+                await loop.run_in_executor(self.executor, app_iter.close)
@@ -1,5 +1,17 @@
+import os
+import hmac
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
 from werkzeug.exceptions import Unauthorized
 
+from .stores import MemoryStore
+
+logger = logging.getLogger(__name__)
+
 
 class AuthenticatedException(Exception):
     pass
@@ -45,6 +57,237 @@ class BasicAuth(AuthenticationStrategy, NoAuthorizationStrategy):
             raise Unauthorized()
 
 
+class KeyIndex(object):
+    """Keys of an authentication strategy, built with ``build(load())``.
+
+    The index is loaded on first use and reloaded every
+    ``refresh_interval`` seconds by a background thread while requests
+    keep using the previous one (which is also kept when a reload fails),
+    so keys can be added and rotated without blocking requests.
+    """
+    def __init__(self, load, build=dict, refresh_interval=60):
+        self.load = load
+        self.build = build
+        self.refresh_interval = refresh_interval
+
+        self.index = None
+        self.loaded_at = None
+        self._refreshing = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        self.index = self.build(self.load())
+        self.loaded_at = time.time()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Couldn't reload the keys")
+            self.loaded_at = time.time()
+        finally:
+            self._refreshing = None
+
+    def get(self):
+        index = self.index
+        if index is None:
+            with self._lock:
+                if self.index is None:
+                    self.refresh()
+                return self.index
+        if (self.refresh_interval and
+                time.time() - self.loaded_at >= self.refresh_interval):
+            with self._lock:
+                # A refresh started before a fork doesn't run in the child.
+                if self._refreshing != os.getpid():
+                    self._refreshing = os.getpid()
+                    thread = threading.Thread(
+                        target=self._background_refresh)
+                    thread.daemon = True
+                    thread.start()
+        return index
+
+
+def hash_api_key(key):
+    """Hash under which :class:`ApiKeyAuth` indexes an API key."""
+    if not isinstance(key, bytes):
+        key = key.encode('utf-8')
+    return hashlib.sha256(key).hexdigest()
+
+
+class ApiKeyAuth(AuthenticationStrategy, NoAuthorizationStrategy):
+    """API key authentication against an in-memory index of key hashes.
+
+    ``load_keys()`` returns ``(hash_api_key(key), metadata)`` pairs (or a
+    dict), so only hashes have to be stored. The key comes from the
+    ``header`` header or, if set, the ``query_param`` query parameter. Its
+    hash is looked up by prefix in a dict, so checking it costs the same
+    with 100k keys as with ten, and the whole hash is then compared with
+    ``hmac.compare_digest``: timing can't reveal anything about a key.
+    The index is a :class:`KeyIndex` reloaded every ``refresh_interval``
+    seconds.
+
+    Authenticated requests get the key's metadata in ``request.api_key``,
+    ``request.tenant`` and ``request.scopes``, and ``request.identity``
+    (the ``identity`` metadata, by default the key hash).
+    """
+    PREFIX_LENGTH = 16
+
+    def __init__(self, load_keys, header='X-Api-Key', query_param=None,
+                 refresh_interval=60):
+        self.header = header
+        self.query_param = query_param
+        self.keys = KeyIndex(load_keys, self.build_index, refresh_interval)
+
+    def build_index(self, keys):
+        index = {}
+        for key_hash, metadata in dict(keys).items():
+            index.setdefault(key_hash[:self.PREFIX_LENGTH], []).append(
+                (key_hash, metadata))
+        return index
+
+    def get_key(self, request):
+        key = request.headers.get(self.header)
+        if not key and self.query_param:
+            key = request.args.get(self.query_param)
+        return key
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        if not key:
+            raise Unauthorized()
+        key_hash = hash_api_key(key)
+        candidates = self.keys.get().get(key_hash[:self.PREFIX_LENGTH], ())
+        for candidate_hash, metadata in candidates:
+            if hmac.compare_digest(candidate_hash, key_hash):
+                break
+        else:
+            raise Unauthorized()
+
+        request.api_key = metadata
+        request.identity = metadata.get('identity', key_hash)
+        request.tenant = metadata.get('tenant')
+        request.scopes = frozenset(metadata.get('scopes', ()))
+
+
+def string_to_sign(method, path, timestamp, nonce, body_hash):
+    return '\n'.join([method.upper(), path, str(timestamp), nonce,
+                      body_hash]).encode('utf-8')
+
+
+def sign_request(secret, method, path, timestamp, nonce, body=b''):
+    """Hex signature of a request for :class:`HmacSignatureAuth`; ``path``
+    includes the query string, if any."""
+    if not isinstance(secret, bytes):
+        secret = secret.encode('utf-8')
+    message = string_to_sign(method, path, timestamp, nonce,
+                             hashlib.sha256(body).hexdigest())
+    return hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+
+class HmacSignatureAuth(AuthenticationStrategy, NoAuthorizationStrategy):
+    """Authentication of requests signed with a shared secret, for
+    webhooks and service to service calls.
+
+    Clients send ``X-Key-Id``, ``X-Timestamp`` (Unix seconds), ``X-Nonce``
+    and ``X-Signature``: the hex HMAC-SHA256 (see :func:`sign_request`) of
+    the method, the path with its query string, the timestamp, the nonce
+    and the SHA-256 of the body.
+
+    The body is hashed chunk by chunk as it's read, into a
+    ``SpooledTemporaryFile`` that stays in memory up to ``spool_size``
+    bytes and moves to disk beyond, and then becomes ``request.stream``,
+    so the handler reads it as usual without the body being held twice.
+
+    Requests more than ``max_skew`` seconds away from the server's clock
+    are rejected, and so are nonces already seen; nonces are kept in
+    ``nonce_store`` (by default a ``MemoryStore`` of ``max_nonces``
+    entries) for twice that long, and claimed with its atomic ``add``. An
+    ``MmapStore`` or a ``SqliteStore`` shares them between the workers of
+    a host.
+
+    ``load_keys()`` returns ``{key_id: secret}``, or a list of secrets
+    per key id while a secret is being rotated, and is reloaded every
+    ``refresh_interval`` seconds (see :class:`KeyIndex`). Authenticated
+    requests get the key id as ``request.identity``.
+    """
+    KEY_ID_HEADER = 'X-Key-Id'
+    TIMESTAMP_HEADER = 'X-Timestamp'
+    NONCE_HEADER = 'X-Nonce'
+    SIGNATURE_HEADER = 'X-Signature'
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, load_keys, max_skew=300, nonce_store=None,
+                 max_nonces=100000, spool_size=1024 * 1024,
+                 refresh_interval=60):
+        self.keys = KeyIndex(load_keys, self.build_index, refresh_interval)
+        self.max_skew = max_skew
+        self.nonce_store = nonce_store if nonce_store is not None else (
+            MemoryStore(max_entries=max_nonces, ttl=2 * max_skew))
+        self.spool_size = spool_size
+
+    def build_index(self, keys):
+        index = {}
+        for key_id, secrets in dict(keys).items():
+            if not isinstance(secrets, (list, tuple)):
+                secrets = [secrets]
+            index[key_id] = [
+                secret if isinstance(secret, bytes) else
+                secret.encode('utf-8') for secret in secrets]
+        return index
+
+    def read_body(self, request):
+        """Spool the body of ``request`` and return its SHA-256."""
+        digest = hashlib.sha256()
+        spooled = tempfile.SpooledTemporaryFile(self.spool_size)
+        stream = request.stream
+        while True:
+            chunk = stream.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            spooled.write(chunk)
+        spooled.seek(0)
+        request.stream = spooled
+        return digest.hexdigest()
+
+    def _use_nonce(self, key_id, nonce):
+        key = 'nonce:{}:{}'.format(key_id, nonce)
+        return self.nonce_store.add(key, True, 2 * self.max_skew)
+
+    def authenticate(self, request):
+        headers = request.headers
+        key_id = headers.get(self.KEY_ID_HEADER)
+        timestamp = headers.get(self.TIMESTAMP_HEADER)
+        nonce = headers.get(self.NONCE_HEADER)
+        signature = headers.get(self.SIGNATURE_HEADER)
+        if not (key_id and timestamp and nonce and signature):
+            raise Unauthorized()
+        try:
+            skew = abs(time.time() - int(timestamp))
+        except ValueError:
+            raise Unauthorized()
+        if skew > self.max_skew:
+            raise Unauthorized()
+        secrets = self.keys.get().get(key_id)
+        if not secrets:
+            raise Unauthorized()
+
+        path = request.path
+        if request.query_string:
+            path += '?' + request.query_string.decode('latin-1')
+        message = string_to_sign(request.method, path, timestamp, nonce,
+                                 self.read_body(request))
+        signature = signature.encode('utf-8')
+        if not any(hmac.compare_digest(
+                hmac.new(secret, message, hashlib.sha256).hexdigest().encode(
+                    'ascii'), signature) for secret in secrets):
+            raise Unauthorized()
+        if not self._use_nonce(key_id, nonce):
+            raise Unauthorized()
+        request.identity = key_id
+
+
 class And(AuthenticationStrategy):
     def __init__(self, *auth_strategies):
         self.auth_stratgies = auth_strategies
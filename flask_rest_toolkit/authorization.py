@@ -0,0 +1,71 @@
+from werkzeug.exceptions import Forbidden
+
+from .stores import MemoryStore
+
+
+class Policy(object):
+    """Declarative authorization for an endpoint, checked right after
+    authentication. Requests that don't satisfy it get a 403.
+
+    * ``roles``: the request needs at least one of them. They're read
+      from ``request.roles``, or loaded with ``load_roles(identity)``.
+    * ``scopes``: the request needs all of them, from ``request.scopes``
+      (set by :class:`~flask_rest_toolkit.auth.ApiKeyAuth`).
+    * ``predicates``: callables ``predicate(request, **url_kwargs)`` for
+      resource checks, such as ownership; all of them must return a true
+      value.
+
+    Roles loaded with ``load_roles`` are cached per ``request.identity``
+    in a bounded ``MemoryStore`` (``cache_size`` identities for
+    ``cache_ttl`` seconds); roles and scopes read from the request, and
+    predicates, are checked on every request.
+    """
+    def __init__(self, roles=None, scopes=None, predicates=None,
+                 load_roles=None, cache_size=10000, cache_ttl=60):
+        self.roles = frozenset(roles or ())
+        self.scopes = frozenset(scopes or ())
+        self.predicates = list(predicates or [])
+        self.load_roles = load_roles
+        self.cache = MemoryStore(max_entries=cache_size, ttl=cache_ttl)
+
+    def identity_roles(self, identity):
+        # Identities can be unhashable (dicts), so they're cached by repr.
+        key = repr(identity)
+        roles = self.cache.get(key)
+        if roles is None:
+            roles = frozenset(self.load_roles(identity) or ())
+            self.cache.set(key, roles)
+        return roles
+
+    def has_role(self, request):
+        if self.load_roles is not None:
+            identity = getattr(request, 'identity', None)
+            if identity is None:
+                return False
+            roles = self.identity_roles(identity)
+        else:
+            roles = getattr(request, 'roles', ())
+        return not self.roles.isdisjoint(roles)
+
+    def has_scopes(self, request):
+        return self.scopes.issubset(getattr(request, 'scopes', ()))
+
+    def compile(self):
+        """Decision function ``decide(request, url_kwargs)`` running only
+        the checks this policy needs; it raises ``Forbidden``."""
+        checks = []
+        if self.roles:
+            checks.append(self.has_role)
+        if self.scopes:
+            checks.append(self.has_scopes)
+        checks = tuple(checks)
+        predicates = tuple(self.predicates)
+
+        def decide(request, kwargs):
+            for check in checks:
+                if not check(request):
+                    raise Forbidden()
+            for predicate in predicates:
+                if not predicate(request, **kwargs):
+                    raise Forbidden()
+        return decide
@@ -0,0 +1,158 @@
+import time
+import functools
+import contextlib
+import threading
+
+from . import exceptions
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """Fail fast when a downstream dependency keeps failing.
+
+    Calls are counted in a rolling window of ``window`` seconds split in
+    ``buckets``. Once there are at least ``min_calls`` calls in the window
+    and the error rate reaches ``error_rate`` the breaker opens and every
+    call raises ``CircuitOpenException`` for ``reset_timeout`` seconds.
+    After that a few trial calls (``half_open_calls``) are let through:
+    if they succeed the breaker closes, otherwise it opens again. Only
+    ``exceptions`` count as failures; anything else means the dependency
+    answered.
+
+    It can be used inside a handler::
+
+        with breaker:
+            return payments_client.charge(...)
+
+    or declared on an endpoint with ``ApiEndpoint(circuit_breaker=...)``,
+    in which case ``fallback(request, *args, **kwargs)`` (if given) is used
+    to build the response while the breaker is open. On an endpoint,
+    client errors (HTTP exceptions and exceptions mapped to a status code
+    below 500) don't count as failures.
+    """
+    def __init__(self, error_rate=0.5, min_calls=10, window=30, buckets=10,
+                 reset_timeout=30, half_open_calls=1, exceptions=(Exception,),
+                 fallback=None):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.bucket_size = float(window) / buckets
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.exceptions = exceptions
+        self.fallback = fallback
+
+        self._state = CLOSED
+        self._opened_at = None
+        self._trial_calls = 0
+        self._buckets = [[0, 0, 0] for _ in range(buckets)]
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.time())
+
+    def _current_state(self, now):
+        if (self._state == OPEN and
+                now - self._opened_at >= self.reset_timeout):
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def _bucket(self, now):
+        index = int(now / self.bucket_size)
+        bucket = self._buckets[index % len(self._buckets)]
+        if bucket[0] != index:
+            bucket[:] = [index, 0, 0]
+        return bucket
+
+    def _counts(self, now):
+        oldest = int(now / self.bucket_size) - len(self._buckets)
+        calls = failures = 0
+        for index, bucket_calls, bucket_failures in self._buckets:
+            if index > oldest:
+                calls += bucket_calls
+                failures += bucket_failures
+        return calls, failures
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+
+    def before_call(self):
+        now = time.time()
+        with self._lock:
+            state = self._current_state(now)
+            if state == OPEN:
+                raise exceptions.CircuitOpenException(
+                    retry_after=int(self.reset_timeout -
+                                    (now - self._opened_at)) + 1)
+            if state == HALF_OPEN:
+                if self._trial_calls >= self.half_open_calls:
+                    raise exceptions.CircuitOpenException(retry_after=1)
+                self._trial_calls += 1
+
+    def record_success(self):
+        now = time.time()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._buckets = [[0, 0, 0] for _ in self._buckets]
+            self._bucket(now)[1] += 1
+
+    def record_failure(self):
+        now = time.time()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            bucket = self._bucket(now)
+            bucket[1] += 1
+            bucket[2] += 1
+            calls, failures = self._counts(now)
+            if (calls >= self.min_calls and
+                    float(failures) / calls >= self.error_rate):
+                self._open(now)
+
+    @contextlib.contextmanager
+    def track(self, ignore=None):
+        """Record the outcome of a call already allowed by before_call().
+        Exceptions for which ``ignore(exc)`` is true count as successes."""
+        try:
+            yield
+        except self.exceptions as exc:
+            if ignore is not None and ignore(exc):
+                self.record_success()
+            else:
+                self.record_failure()
+            raise
+        except BaseException:
+            self.record_success()
+            raise
+        else:
+            self.record_success()
+
+    def call(self, func, *args, **kwargs):
+        with self:
+            return func(*args, **kwargs)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        self.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and issubclass(exc_type, self.exceptions):
+            self.record_failure()
+        else:
+            self.record_success()
+        return False
@@ -0,0 +1,152 @@
+import time
+import hashlib
+import logging
+import threading
+
+from .idempotency import dump_response, load_response, client_scope
+from .stores import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache(object):
+    """Response caching for GET (and HEAD) requests of an endpoint.
+
+    A response is fresh for ``max_age`` seconds. For the following
+    ``stale_while_revalidate`` seconds it's still served right away while
+    one refresh per key runs the handler on the Api's refresh pool. Past
+    that the request runs the handler itself, and if it fails (a 5xx
+    response, such as a mapped exception, a timeout or an overload, or an
+    unexpected exception) a response up to ``stale_if_error`` seconds past
+    its freshness is served instead.
+
+    Keys are the path, the query string, the ``vary`` headers and the
+    client (``scope(request)``, by default the same as
+    :class:`~flask_rest_toolkit.idempotency.Idempotency`). Responses get a
+    ``Cache-Control`` header with the three lifetimes unless the handler
+    sets one (``cache_control=False`` disables it), and served entries an
+    ``Age`` header.
+    """
+    CACHEABLE_STATUSES = (200, 203, 300, 301, 404, 410)
+
+    def __init__(self, max_age, stale_while_revalidate=0, stale_if_error=0,
+                 store=None, vary=(), scope=None, cache_control=True,
+                 methods=('GET', 'HEAD')):
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.ttl = max_age + max(stale_while_revalidate, stale_if_error)
+        self.store = store if store is not None else MemoryStore(
+            ttl=self.ttl)
+        self.vary = vary
+        self.scope = scope or client_scope
+        self.cache_control = cache_control
+        self.methods = methods
+
+        self.metrics = {
+            'hits': 0,
+            'stale': 0,
+            'misses': 0,
+            'errors_served_stale': 0,
+            'refreshes': 0,
+        }
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def key(self, request):
+        parts = [request.path, request.query_string.decode('latin-1')]
+        parts.extend(request.headers.get(name, '') for name in self.vary)
+        parts.append(self.scope(request))
+        return 'cache:' + hashlib.sha256(
+            '\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def is_private(self, request):
+        return (getattr(request, 'identity', None) is not None or
+                'Authorization' in request.headers or
+                'Cookie' in request.headers)
+
+    def cache_control_header(self, private=False):
+        directives = ['private' if private else 'public',
+                      'max-age={}'.format(self.max_age)]
+        if self.stale_while_revalidate:
+            directives.append('stale-while-revalidate={}'.format(
+                self.stale_while_revalidate))
+        if self.stale_if_error:
+            directives.append('stale-if-error={}'.format(
+                self.stale_if_error))
+        return ', '.join(directives)
+
+    def _count(self, metric):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def _serve(self, entry, metric):
+        self._count(metric)
+        stored_at, stored = entry
+        age = int(max(0, time.time() - stored_at))
+        return load_response(stored, [('Age', str(age))])
+
+    def _store(self, key, request, response):
+        if (response.status_code not in self.CACHEABLE_STATUSES or
+                response.is_streamed):
+            return
+        if self.cache_control and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = self.cache_control_header(
+                self.is_private(request))
+        self.store.set(key, (time.time(), dump_response(response)),
+                       self.ttl)
+
+    def _refresh(self, key, request, execute):
+        try:
+            response = execute()
+            try:
+                self._store(key, request, response)
+            finally:
+                response.close()
+            self._count('refreshes')
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key, request, execute, pool):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        if not pool.submit(self._refresh, key, request, execute):
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def run(self, request, execute, refresh, pool):
+        """Serve ``request`` from the cache or with ``execute()``.
+
+        ``refresh()`` runs the handler again out of the request (on
+        ``pool``) when a stale entry is served.
+        """
+        key = self.key(request)
+        entry = self.store.get(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.max_age:
+                return self._serve(entry, 'hits')
+            if age < self.max_age + self.stale_while_revalidate:
+                self._schedule_refresh(key, request, refresh, pool)
+                return self._serve(entry, 'stale')
+            if age >= self.max_age + self.stale_if_error:
+                entry = None
+
+        self._count('misses')
+        try:
+            response = execute()
+        except Exception:
+            if entry is None:
+                raise
+            logger.exception("Serving a stale response for %s",
+                             request.path)
+            return self._serve(entry, 'errors_served_stale')
+
+        if response.status_code >= 500 and entry is not None:
+            response.close()
+            return self._serve(entry, 'errors_served_stale')
+        self._store(key, request, response)
+        return response
@@ -0,0 +1,91 @@
+import time
+import threading
+
+from . import exceptions
+
+
+class Deadline(object):
+    """A point in time after which a request should give up.
+
+    Handlers get one in ``request.deadline`` when a timeout is configured.
+    Python threads can't be interrupted, so long running handlers should
+    call ``check()`` between expensive steps.
+    """
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self):
+        return max(0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired:
+            raise exceptions.HandlerTimeoutException(
+                "Deadline of {}s exceeded".format(self.timeout))
+
+
+class ConcurrencyLimiter(object):
+    """Bounded number of concurrent executions with a bounded wait queue.
+
+    At most ``limit`` callers are active at the same time, and at most
+    ``max_queue`` callers wait for a slot. Everybody else is rejected
+    right away with a ``ServiceOverloadedException``.
+    """
+    def __init__(self, limit, max_queue=0, queue_timeout=None,
+                 retry_after=1):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._condition = threading.Condition(threading.Lock())
+
+    def _reject(self):
+        self.rejected += 1
+        return exceptions.ServiceOverloadedException(
+            retry_after=self.retry_after)
+
+    def acquire(self, deadline=None):
+        timeout = self.queue_timeout
+        if deadline is not None:
+            remaining = deadline.remaining()
+            timeout = remaining if timeout is None else min(
+                timeout, remaining)
+
+        with self._condition:
+            if self.active < self.limit:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                raise self._reject()
+
+            self.waiting += 1
+            try:
+                end = None if timeout is None else time.monotonic() + timeout
+                while self.active >= self.limit:
+                    wait = None if end is None else end - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        raise self._reject()
+                    self._condition.wait(wait)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,129 @@
+import re
+
+from .response import Response, HeaderBlock
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+
+class CORS(object):
+    """Cross-Origin Resource Sharing configuration of an Api or endpoint.
+
+    ``origins`` is ``'*'`` or a list of origins. Origins containing ``*``
+    (``https://*.example.com``, where ``*`` stands for a single DNS label)
+    and compiled regular expressions are allowed too. Wildcard origins
+    are compiled into one regular expression when the configuration is
+    created, exact origins go to a set.
+
+    Preflight requests are answered by the endpoint without running
+    authentication, middleware or the handler. Their headers are cached
+    per origin, and ``max_age`` lets browsers cache them as well. When
+    ``headers`` is None the headers requested by the browser are allowed.
+    """
+    MAX_CACHED_PREFLIGHTS = 1024
+
+    def __init__(self, origins='*', methods=None, headers=None,
+                 expose_headers=None, allow_credentials=False, max_age=600):
+        self.any_origin = origins == '*'
+        self.exact_origins = set()
+        self.origin_patterns = []
+        wildcards = []
+        for origin in ([] if self.any_origin else origins):
+            if not isinstance(origin, string_types):
+                self.origin_patterns.append(origin)
+            elif '*' in origin:
+                wildcards.append(
+                    re.escape(origin).replace(r'\*', '[^/.:@]+') + '$')
+            else:
+                self.exact_origins.add(origin)
+        if wildcards:
+            self.origin_patterns.append(re.compile('|'.join(
+                '(?:{})'.format(p) for p in wildcards)))
+
+        self.methods = methods
+        self.headers = headers
+        self.expose_headers = expose_headers
+        self.allow_credentials = allow_credentials
+        self.max_age = max_age
+
+        # Without credentials, allowing any origin doesn't depend on the
+        # request and the headers can go to the endpoint's header block.
+        self.static = self.any_origin and not allow_credentials
+        self._preflights = {}
+
+    def is_allowed(self, origin):
+        if self.any_origin or origin in self.exact_origins:
+            return True
+        return any(pattern.match(origin) for pattern in self.origin_patterns)
+
+    def static_headers(self):
+        if not self.static:
+            return []
+        headers = [('Access-Control-Allow-Origin', '*')]
+        if self.expose_headers:
+            headers.append(('Access-Control-Expose-Headers',
+                            ', '.join(self.expose_headers)))
+        return headers
+
+    def apply(self, origin, response):
+        """Add the CORS headers to an actual (not preflight) response."""
+        if self.static:
+            response.headers.extend(self.static_headers())
+            return response
+        response.headers.add('Vary', 'Origin')
+        if not origin or not self.is_allowed(origin):
+            return response
+        response.headers['Access-Control-Allow-Origin'] = origin
+        if self.allow_credentials:
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+        if self.expose_headers:
+            response.headers['Access-Control-Expose-Headers'] = ', '.join(
+                self.expose_headers)
+        return response
+
+    def _preflight_headers(self, origin, methods, requested_headers):
+        headers = [('Allow', ', '.join(methods))]
+        vary = [] if self.static else ['Origin']
+        if not origin or not self.is_allowed(origin):
+            if vary:
+                headers.append(('Vary', ', '.join(vary)))
+            return HeaderBlock(headers)
+
+        headers.append(('Access-Control-Allow-Origin',
+                        '*' if self.static else origin))
+        headers.append(('Access-Control-Allow-Methods',
+                        ', '.join(self.methods or methods)))
+        if self.headers is not None:
+            headers.append(('Access-Control-Allow-Headers',
+                            ', '.join(self.headers)))
+        elif requested_headers:
+            headers.append(('Access-Control-Allow-Headers',
+                            requested_headers))
+        if self.headers is None:
+            vary.append('Access-Control-Request-Headers')
+        if vary:
+            headers.append(('Vary', ', '.join(vary)))
+        if self.allow_credentials:
+            headers.append(('Access-Control-Allow-Credentials', 'true'))
+        if self.max_age is not None:
+            headers.append(('Access-Control-Max-Age', str(self.max_age)))
+        return HeaderBlock(headers)
+
+    def preflight(self, request, methods):
+        origin = request.headers.get('Origin')
+        requested_headers = None
+        if self.headers is None:
+            requested_headers = request.headers.get(
+                'Access-Control-Request-Headers')
+
+        key = (origin, requested_headers, methods)
+        block = self._preflights.get(key)
+        if block is None:
+            if len(self._preflights) >= self.MAX_CACHED_PREFLIGHTS:
+                self._preflights.clear()
+            block = self._preflight_headers(
+                origin, methods, requested_headers)
+            self._preflights[key] = block
+        return Response(b'', 204, block.headers())
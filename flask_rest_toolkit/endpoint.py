@@ -1,12 +1,82 @@
+import threading
+
+from .utils import import_string
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+
 class ApiEndpoint(object):
+    streaming = False
+
     def __init__(self, http_method, endpoint,
                  handler, exceptions=None, authentication=None,
-                 middleware=None, serializer=None):
+                 middleware=None, serializer=None, max_concurrency=None,
+                 max_queue=0, timeout=None, circuit_breaker=None,
+                 headers=None, cors=None, idempotency=None, cache=None,
+                 authorization=None, resources=None):
         self.http_method = http_method
         self.endpoint = endpoint
         self.handler = handler
         self.authentication = authentication
+        self.authorization = authorization
         self.serializer = serializer
 
         self.exceptions = exceptions or []
         self.middleware = middleware or []
+        self.headers = headers or {}
+        self.cors = cors
+        self.idempotency = idempotency
+        if isinstance(resources, dict):
+            self.resources = list(resources.items())
+        else:
+            self.resources = [(name, name) for name in resources or []]
+        self.cache = cache
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker
+
+        self.import_timings = []
+        self.resolved = not (
+            isinstance(handler, string_types) or
+            isinstance(authentication, string_types) or
+            any(isinstance(m, string_types) for m in self.middleware))
+        self._resolve_lock = threading.Lock()
+
+    @property
+    def handler_name(self):
+        if isinstance(self.handler, string_types):
+            return self.handler.replace(':', '.').rpartition('.')[2]
+        return self.handler.__name__
+
+    def _load(self, value):
+        if not isinstance(value, string_types):
+            return value
+        obj, elapsed = import_string(value)
+        self.import_timings.append((value, elapsed))
+        return obj
+
+    def resolve(self):
+        """Import the handler, middleware and authentication given as
+        dotted paths (``"svc.tasks:get_task"``). Called on the first
+        request, or at start up with ``Api.warm_up()``."""
+        if self.resolved:
+            return
+        with self._resolve_lock:
+            if self.resolved:
+                return
+            handler = self._load(self.handler)
+            middleware = [self._load(m) for m in self.middleware]
+            authentication = self._load(self.authentication)
+            if (isinstance(self.authentication, string_types) and
+                    isinstance(authentication, type)):
+                authentication = authentication()
+
+            self.handler = handler
+            self.middleware = middleware
+            self.authentication = authentication
+            self.resolved = True
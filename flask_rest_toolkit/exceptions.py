@@ -4,3 +4,37 @@ class FlaskRestToolkitException(Exception):
 
 class InvalidSerializerException(FlaskRestToolkitException):
     pass
+
+
+class ServiceOverloadedException(FlaskRestToolkitException):
+    def __init__(self, message=None, retry_after=None):
+        super(ServiceOverloadedException, self).__init__(
+            message or "Too many concurrent requests")
+        self.headers = {}
+        if retry_after is not None:
+            self.headers['Retry-After'] = str(retry_after)
+
+
+class HandlerTimeoutException(FlaskRestToolkitException):
+    pass
+
+
+class CircuitOpenException(ServiceOverloadedException):
+    def __init__(self, message=None, retry_after=None):
+        super(CircuitOpenException, self).__init__(
+            message or "Circuit breaker is open", retry_after=retry_after)
+
+
+class PoolTimeoutException(ServiceOverloadedException):
+    def __init__(self, message=None, retry_after=None):
+        super(PoolTimeoutException, self).__init__(
+            message or "Timed out waiting for a pooled resource",
+            retry_after=retry_after)
+
+
+class IdempotencyConflictException(FlaskRestToolkitException):
+    pass
+
+
+class IdempotencyKeyReusedException(FlaskRestToolkitException):
+    pass
@@ -0,0 +1,245 @@
+import io
+import os
+import mmap
+import calendar
+import hashlib
+import mimetypes
+import unicodedata
+from datetime import datetime
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+from werkzeug.wrappers import Response
+from werkzeug.http import (
+    http_date, is_resource_modified, parse_range_header,
+    parse_if_range_header, quote_etag)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def content_disposition(disposition, filename):
+    """Content-Disposition value with a quoted ASCII ``filename`` and, for
+    non ASCII names, an RFC 5987 ``filename*``."""
+    simple = unicodedata.normalize('NFKD', filename).encode(
+        'ascii', 'ignore').decode('ascii')
+    value = '{}; filename="{}"'.format(
+        disposition, simple.replace('\\', '\\\\').replace('"', '\\"'))
+    if simple != filename:
+        value += "; filename*=UTF-8''{}".format(
+            quote(filename.encode('utf-8'), safe=''))
+    return value
+
+
+def _timestamp(value):
+    return calendar.timegm(value.utctimetuple())
+
+
+class _FileChunks(object):
+    """Iterates ``[start, stop)`` of a file through a memory map, falling
+    back to regular reads for files that can't be mapped."""
+    def __init__(self, fileobj, start, stop, chunk_size):
+        self.fileobj = fileobj
+        self.start = start
+        self.stop = stop
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        try:
+            mapped = mmap.mmap(
+                self.fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError, AttributeError,
+                io.UnsupportedOperation):
+            mapped = None
+
+        if mapped is None:
+            self.fileobj.seek(self.start)
+            remaining = self.stop - self.start
+            while remaining > 0:
+                data = self.fileobj.read(min(self.chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+            return
+
+        try:
+            for offset in range(self.start, self.stop, self.chunk_size):
+                yield mapped[offset:min(offset + self.chunk_size, self.stop)]
+        finally:
+            mapped.close()
+
+    def close(self):
+        self.fileobj.close()
+
+
+class _BlobChunks(object):
+    def __init__(self, data, start, stop, chunk_size):
+        self.view = memoryview(data)
+        self.start = start
+        self.stop = stop
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        for offset in range(self.start, self.stop, self.chunk_size):
+            yield self.view[
+                offset:min(offset + self.chunk_size, self.stop)].tobytes()
+
+
+class BinaryContent(object):
+    """Base class of the binary values a handler can return.
+
+    The response supports conditional requests (``ETag`` and
+    ``Last-Modified``) and single byte ranges (``206 Partial Content``).
+    """
+    def __init__(self, content_type=None, filename=None,
+                 as_attachment=False, max_age=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.content_type = content_type
+        self.filename = filename
+        self.as_attachment = as_attachment
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+
+    size = None
+    etag = None
+    last_modified = None
+
+    def full_body(self, environ):
+        raise NotImplementedError()
+
+    def partial_body(self, start, stop):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def _guess_content_type(self):
+        if self.content_type:
+            return self.content_type
+        if self.filename:
+            guessed, _ = mimetypes.guess_type(self.filename)
+            if guessed:
+                return guessed
+        return 'application/octet-stream'
+
+    def _headers(self):
+        headers = [
+            ('Content-Type', self._guess_content_type()),
+            ('Accept-Ranges', 'bytes'),
+            ('ETag', quote_etag(self.etag)),
+        ]
+        if self.last_modified is not None:
+            headers.append(('Last-Modified', http_date(self.last_modified)))
+        if self.max_age is not None:
+            headers.append(('Cache-Control',
+                            'max-age={}'.format(self.max_age)))
+        if self.filename:
+            disposition = 'attachment' if self.as_attachment else 'inline'
+            headers.append(('Content-Disposition', content_disposition(
+                disposition, self.filename)))
+        return headers
+
+    def _range(self, environ):
+        header = environ.get('HTTP_RANGE')
+        if not header:
+            return None
+        if_range = parse_if_range_header(environ.get('HTTP_IF_RANGE'))
+        if if_range.etag is not None and if_range.etag != self.etag:
+            return None
+        if if_range.date is not None and (
+                self.last_modified is None or
+                _timestamp(if_range.date) < _timestamp(self.last_modified)):
+            return None
+        parsed = parse_range_header(header)
+        if parsed is None or len(parsed.ranges) != 1:
+            return None
+        return parsed.range_for_length(self.size) or False
+
+    def make_response(self, environ, code=200, extra_headers=None):
+        response = Response(status=code, headers=self._headers())
+        response.headers.extend(extra_headers or {})
+
+        if environ.get('REQUEST_METHOD') in ('GET', 'HEAD') and \
+                not is_resource_modified(environ, etag=self.etag,
+                                         last_modified=self.last_modified):
+            self.close()
+            response.status_code = 304
+            return response
+
+        byte_range = self._range(environ) if code == 200 else None
+        if byte_range is False:
+            self.close()
+            response.status_code = 416
+            response.headers['Content-Range'] = 'bytes */{}'.format(
+                self.size)
+            return response
+
+        if byte_range is None:
+            response.response = self.full_body(environ)
+            response.headers['Content-Length'] = str(self.size)
+        else:
+            start, stop = byte_range
+            response.status_code = 206
+            response.response = self.partial_body(start, stop)
+            response.headers['Content-Length'] = str(stop - start)
+            response.headers['Content-Range'] = 'bytes {}-{}/{}'.format(
+                start, stop - 1, self.size)
+        response.direct_passthrough = True
+        return response
+
+
+class File(BinaryContent):
+    """A file on disk (path or file object opened in binary mode).
+
+    Full responses use the server's ``wsgi.file_wrapper`` when available,
+    so servers supporting ``sendfile`` send it without copying it through
+    Python. Ranges and servers without a file wrapper read it through a
+    memory map.
+    """
+    def __init__(self, path_or_file, **kwargs):
+        if hasattr(path_or_file, 'read'):
+            self.fileobj = path_or_file
+            path = getattr(path_or_file, 'name', None)
+        else:
+            path = path_or_file
+            self.fileobj = open(path, 'rb')
+        if kwargs.get('filename') is None and isinstance(path, str):
+            kwargs['filename'] = os.path.basename(path)
+        super(File, self).__init__(**kwargs)
+
+        stat = os.fstat(self.fileobj.fileno())
+        self.size = stat.st_size
+        self.last_modified = datetime.utcfromtimestamp(int(stat.st_mtime))
+        self.etag = '{:x}-{:x}'.format(int(stat.st_mtime * 1000), self.size)
+
+    def full_body(self, environ):
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            self.fileobj.seek(0)
+            return file_wrapper(self.fileobj, self.chunk_size)
+        return _FileChunks(self.fileobj, 0, self.size, self.chunk_size)
+
+    def partial_body(self, start, stop):
+        return _FileChunks(self.fileobj, start, stop, self.chunk_size)
+
+    def close(self):
+        self.fileobj.close()
+
+
+class Blob(BinaryContent):
+    """Binary content already in memory. Ranges are served from slices of
+    the original buffer."""
+    def __init__(self, data, **kwargs):
+        super(Blob, self).__init__(**kwargs)
+        self.data = data
+        self.size = len(data)
+        self.etag = hashlib.sha1(data).hexdigest()
+
+    def full_body(self, environ):
+        return [self.data]
+
+    def partial_body(self, start, stop):
+        return _BlobChunks(self.data, start, stop, self.chunk_size)
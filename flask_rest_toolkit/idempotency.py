@@ -0,0 +1,117 @@
+import hashlib
+import threading
+
+from werkzeug.datastructures import Headers
+
+from . import exceptions
+from .response import Response
+from .stores import MemoryStore
+
+
+def dump_response(response):
+    """Status, headers and body of a response, as plain values that any
+    store can keep."""
+    return (response.status_code, list(response.headers.items()),
+            response.get_data())
+
+
+def load_response(stored, extra_headers=None):
+    status, headers, body = stored
+    headers = Headers(headers)
+    headers.extend(extra_headers or [])
+    return Response(body, status, headers)
+
+
+def client_scope(request):
+    identity = getattr(request, 'identity', None)
+    if identity is not None:
+        return 'identity:{!r}'.format(identity)
+    return '\n'.join([request.headers.get('Authorization', ''),
+                      request.headers.get('Cookie', '')])
+
+
+class Idempotency(object):
+    """Idempotency-Key handling for an endpoint.
+
+    The first request with a given key runs normally and its response is
+    stored (5xx and streamed responses aren't). Retries with the same key
+    get the stored response, with an ``Idempotent-Replayed`` header,
+    without running the handler. A retry arriving while the first request
+    is still running waits for it up to ``wait_timeout`` seconds and then
+    gets a 409. Waiting only works within one process; the stored
+    responses are shared if the store is.
+
+    The endpoint authenticates the request before looking the key up, and
+    keys are scoped to the method, the path and the client: what
+    ``scope(request)`` returns, by default ``request.identity`` when the
+    authentication strategy sets it and the Authorization and Cookie
+    headers otherwise. Clients can't replay each other's responses. A key
+    reused with a different body gets a 422.
+    """
+    def __init__(self, store=None, header='Idempotency-Key',
+                 methods=('POST', 'PATCH'), ttl=None, wait_timeout=10,
+                 scope=None):
+        self.store = store if store is not None else MemoryStore(ttl=86400)
+        self.header = header
+        self.methods = methods
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.scope = scope or client_scope
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def key(self, request):
+        value = request.headers.get(self.header)
+        if not value or request.method not in self.methods:
+            return None
+        scope = '\n'.join([request.method, request.path, value,
+                           self.scope(request)])
+        return 'idempotency:' + hashlib.sha256(
+            scope.encode('utf-8')).hexdigest()
+
+    def fingerprint(self, request):
+        return hashlib.sha256(request.get_data(cache=True)).hexdigest()
+
+    def _replay(self, key, fingerprint):
+        stored = self.store.get(key)
+        if stored is None:
+            return None
+        stored_fingerprint, stored_response = stored
+        if stored_fingerprint != fingerprint:
+            raise exceptions.IdempotencyKeyReusedException(
+                "The idempotency key was used with a different request")
+        return load_response(stored_response,
+                             [('Idempotent-Replayed', 'true')])
+
+    def run(self, key, execute, fingerprint=None):
+        response = self._replay(key, fingerprint)
+        if response is not None:
+            return response
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                self._in_flight[key] = threading.Event()
+
+        if in_flight is not None:
+            in_flight.wait(self.wait_timeout)
+            response = self._replay(key, fingerprint)
+            if response is None:
+                raise exceptions.IdempotencyConflictException(
+                    "A request with the same idempotency key is in progress")
+            return response
+
+        try:
+            # The first run may have finished between the lookup above and
+            # the registration.
+            response = self._replay(key, fingerprint)
+            if response is not None:
+                return response
+            response = execute()
+            if response.status_code < 500 and not response.is_streamed:
+                self.store.set(key, (fingerprint, dump_response(response)),
+                               self.ttl)
+            return response
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
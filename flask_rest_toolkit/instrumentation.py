@@ -0,0 +1,66 @@
+import time
+
+
+class _NullPhase(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullRecorder(object):
+    """Recorder used when nothing observes the dispatch phases. Every
+    phase is the same no-op context manager."""
+    __slots__ = ()
+    timings = None
+    span = None
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+
+NULL_RECORDER = NullRecorder()
+
+
+class _Phase(object):
+    __slots__ = ('recorder', 'name', 'start', 'span')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.span = None
+
+    def __enter__(self):
+        recorder = self.recorder
+        if recorder.span is not None:
+            self.span = recorder.span = recorder.span.child(self.name)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        timings = self.recorder.timings
+        timings[self.name] = timings.get(self.name, 0) + (
+            time.time() - self.start)
+        span = self.span
+        if span is not None:
+            if exc_value is not None:
+                span.record_exception(exc_value)
+            span.end()
+            self.recorder.span = span.parent
+        return False
+
+
+class PhaseRecorder(object):
+    """Times the phases of a dispatch (authentication, middleware,
+    handler, serialization) of one request and, given the request's
+    tracing ``span``, opens a child span for each of them."""
+    def __init__(self, span=None):
+        self.timings = {}
+        self.span = span
+
+    def phase(self, name):
+        return _Phase(self, name)
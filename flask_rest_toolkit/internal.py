@@ -0,0 +1,60 @@
+from werkzeug.wrappers import Request
+from werkzeug.test import EnvironBuilder
+
+from .instrumentation import NULL_RECORDER
+
+try:
+    text_types = (str, unicode, bytes)
+except NameError:
+    text_types = (str, bytes)
+
+# Headers an internal call inherits from the request that makes it.
+INHERITED_HEADERS = ('Authorization', 'Cookie')
+_NO_BODY = object()
+
+
+class InternalRequest(Request):
+    """Request of an :meth:`Api.call`.
+
+    A body that isn't bytes or text is handed to the handler as is, as
+    ``request.json``, instead of being encoded and parsed again.
+    ``parent`` is the request making the call, if any.
+    """
+    def __init__(self, environ, body=_NO_BODY, parent=None):
+        super(InternalRequest, self).__init__(environ)
+        self.body = body
+        self.parent = parent
+        self.phases = NULL_RECORDER
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.body is _NO_BODY:
+            return super(InternalRequest, self).get_json(
+                force=force, silent=silent, cache=cache)
+        return self.body
+
+    @classmethod
+    def build(cls, method, path, body=None, headers=None, query_string=None,
+              parent=None):
+        all_headers = {}
+        if parent is not None:
+            for name in INHERITED_HEADERS:
+                if name in parent.headers:
+                    all_headers[name] = parent.headers[name]
+        all_headers.update(headers or {})
+
+        data = None
+        if isinstance(body, text_types):
+            data, body = body, _NO_BODY
+        elif body is None:
+            body = _NO_BODY
+        environ = EnvironBuilder(
+            path=path, method=method.upper(), headers=all_headers,
+            query_string=query_string, data=data).get_environ()
+
+        request = cls(environ, body, parent)
+        if parent is not None:
+            identity = getattr(parent, 'identity', None)
+            if identity is not None:
+                request.identity = identity
+            request.deadline = getattr(parent, 'deadline', None)
+        return request
@@ -0,0 +1,90 @@
+class Deferred(object):
+    """Value of a key requested with :meth:`DataLoader.load`. Reading
+    ``value`` runs one batch for every key requested so far."""
+    __slots__ = ('loader', 'key')
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+
+    @property
+    def value(self):
+        return self.loader.get(self.key)
+
+
+class DataLoader(object):
+    """Batches and memoizes the lookups of one request.
+
+    ``load(key)`` only queues the key and returns a :class:`Deferred`; the
+    first value read calls ``batch_fn(keys)`` once with every queued key
+    (in chunks of ``max_batch_size``, if set). ``batch_fn`` returns the
+    values in the order of the keys, or a dict (missing keys are
+    ``None``). Values are memoized for the rest of the request.
+    """
+    def __init__(self, batch_fn, max_batch_size=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self._cache = {}
+        self._queue = []
+        self._queued = set()
+
+    def load(self, key):
+        if key not in self._cache and key not in self._queued:
+            self._queue.append(key)
+            self._queued.add(key)
+        return Deferred(self, key)
+
+    def load_many(self, keys):
+        for key in keys:
+            self.load(key)
+        return [self.get(key) for key in keys]
+
+    def get(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        self.load(key)
+        self.dispatch()
+        return self._cache[key]
+
+    def prime(self, key, value):
+        self._cache.setdefault(key, value)
+
+    def clear(self, key):
+        self._cache.pop(key, None)
+
+    def dispatch(self):
+        queue = self._queue
+        self._queue = []
+        self._queued = set()
+        size = self.max_batch_size or len(queue) or 1
+        for start in range(0, len(queue), size):
+            keys = queue[start:start + size]
+            values = self.batch_fn(keys)
+            self.batches += 1
+            if isinstance(values, dict):
+                values = [values.get(key) for key in keys]
+            elif len(values) != len(keys):
+                raise ValueError(
+                    "{!r} returned {} values for {} keys".format(
+                        self.batch_fn, len(values), len(keys)))
+            self._cache.update(zip(keys, values))
+
+
+class RequestLoaders(object):
+    """The DataLoaders of a request, ``request.loaders[name]``, created on
+    first use from the loaders registered with :meth:`Api.register_loader`.
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self._loaders = {}
+
+    def __getitem__(self, name):
+        loader = self._loaders.get(name)
+        if loader is None:
+            batch_fn, max_batch_size = self.registry[name]
+            loader = self._loaders[name] = DataLoader(
+                batch_fn, max_batch_size)
+        return loader
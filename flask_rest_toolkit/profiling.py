@@ -0,0 +1,182 @@
+import io
+import os
+import re
+import sys
+import hmac
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import deque, defaultdict
+
+from werkzeug.exceptions import NotFound
+
+from .endpoint import ApiEndpoint
+
+SAMPLING = 'sampling'
+CPROFILE = 'cprofile'
+
+
+class ProfileRecord(object):
+    def __init__(self, name, mode, started, duration, output):
+        self.name = name
+        self.mode = mode
+        self.started = started
+        self.duration = duration
+        # Collapsed stacks ("frame;frame;frame count" lines) for the
+        # sampling mode, pstats text for cProfile.
+        self.output = output
+        self.path = None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'mode': self.mode,
+            'started': self.started,
+            'duration': self.duration,
+            'path': self.path,
+        }
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        super(_StackSampler, self).__init__()
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = defaultdict(int)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{} ({}:{})'.format(
+                    code.co_name, os.path.basename(code.co_filename),
+                    code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join('{} {}\n'.format(stack, count)
+                       for stack, count in sorted(self.stacks.items()))
+
+
+class Profiler(object):
+    """Opt-in profiling of individual requests.
+
+    A request is profiled when the profiler is enabled and either it's
+    picked by ``sample_rate``, it carries ``header`` with the configured
+    ``token``, or ``profile_next(n)`` was called. Requests that aren't
+    picked only pay for these checks.
+
+    ``mode`` is ``'sampling'`` (a thread samples the request's stack every
+    ``interval`` seconds and produces collapsed stacks, the input format
+    of flamegraph.pl and speedscope) or ``'cprofile'``. The last ``keep``
+    profiles are kept in memory and, with ``output_dir``, written to
+    ``.collapsed`` or ``.prof`` files.
+    """
+    def __init__(self, sample_rate=0.0, header='X-Profile', token=None,
+                 mode=SAMPLING, interval=0.005, output_dir=None, keep=20,
+                 enabled=True):
+        if mode not in (SAMPLING, CPROFILE):
+            raise ValueError("Invalid profiling mode {}".format(mode))
+        self.sample_rate = sample_rate
+        self.header = header
+        self.token = token
+        self.mode = mode
+        self.interval = interval
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.records = deque(maxlen=keep)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def profile_next(self, count=1):
+        with self._lock:
+            self._next += count
+
+    def should_profile(self, request):
+        if not self.enabled:
+            return False
+        if self._next:
+            with self._lock:
+                if self._next:
+                    self._next -= 1
+                    return True
+        if self.token is not None and hmac.compare_digest(
+                request.headers.get(self.header, '').encode('utf-8'),
+                self.token.encode('utf-8')):
+            return True
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    def run(self, name, func):
+        started = time.time()
+        if self.mode == SAMPLING:
+            sampler = _StackSampler(threading.current_thread().ident,
+                                    self.interval)
+            sampler.start()
+            try:
+                return func()
+            finally:
+                sampler.stop()
+                self._record(name, started, sampler.collapsed())
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func()
+        finally:
+            profile.disable()
+            stream = io.StringIO() if sys.version_info[0] > 2 \
+                else io.BytesIO()
+            pstats.Stats(profile, stream=stream).sort_stats(
+                'cumulative').print_stats(50)
+            record = self._record(name, started, stream.getvalue())
+            if record.path:
+                profile.dump_stats(record.path)
+
+    def _record(self, name, started, output):
+        record = ProfileRecord(name, self.mode, started,
+                               time.time() - started, output)
+        if self.output_dir:
+            extension = 'collapsed' if self.mode == SAMPLING else 'prof'
+            record.path = os.path.join(self.output_dir, '{}-{}.{}'.format(
+                int(started * 1000), re.sub(r'[^\w.-]+', '_', name),
+                extension))
+            if self.mode == SAMPLING:
+                with open(record.path, 'w') as fp:
+                    fp.write(output)
+        self.records.append(record)
+        return record
+
+    def endpoints(self, authentication, path='/_profiles/'):
+        """Endpoints listing and returning the profiles kept in memory.
+        They expose internals of the application, so they require an
+        authentication strategy."""
+        def list_profiles(request):
+            return [record.to_dict() for record in self.records]
+
+        def get_profile(request, index):
+            try:
+                return list(self.records)[index].output
+            except IndexError:
+                raise NotFound()
+
+        return [
+            ApiEndpoint(http_method='GET', endpoint=path,
+                        handler=list_profiles,
+                        authentication=authentication),
+            ApiEndpoint(http_method='GET',
+                        endpoint=path + '<int:index>',
+                        handler=get_profile, serializer='text',
+                        authentication=authentication),
+        ]
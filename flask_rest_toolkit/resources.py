@@ -0,0 +1,182 @@
+import os
+import time
+import logging
+import threading
+
+from . import exceptions
+
+logger = logging.getLogger(__name__)
+
+
+class ResourcePool(object):
+    """A bounded pool of resources such as database connections or HTTP
+    clients, made with ``create()`` and closed with ``close(resource)``.
+
+    At most ``size`` resources exist at once; a checkout waits up to
+    ``checkout_timeout`` seconds (or the request's deadline) for one and
+    then raises a ``PoolTimeoutException`` (a 503). Resources idle for
+    ``check_interval`` seconds, or returned by a request that failed, are
+    checked with ``check(resource)`` before being handed out again, and
+    replaced when it returns a false value or raises.
+
+    Resources are created on demand and belong to a process: after a fork
+    the pool starts empty, without touching the parent's resources.
+    """
+    def __init__(self, create, size=10, checkout_timeout=5, close=None,
+                 check=None, check_interval=30, retry_after=1):
+        self.create = create
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.close_resource = close
+        self.check = check
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+
+        self.metrics = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'failed_checks': 0,
+        }
+        self._pid = None
+        self._ensure_process()
+
+    def _ensure_process(self):
+        if self._pid == os.getpid():
+            return
+        self._condition = threading.Condition(threading.Lock())
+        self._idle = []
+        self._count = 0
+        self._suspect = set()
+        self._pid = os.getpid()
+
+    @property
+    def in_use(self):
+        return self._count - len(self._idle)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def _reserve(self, timeout):
+        """An idle ``(resource, returned_at)``, or ``None`` when there's room
+        for a new resource (counted already)."""
+        with self._condition:
+            end = None if timeout is None else time.monotonic() + timeout
+            if not self._idle and self._count >= self.size:
+                self.metrics['waits'] += 1
+            while not self._idle and self._count >= self.size:
+                wait = None if end is None else end - time.monotonic()
+                if wait is not None and wait <= 0:
+                    self.metrics['timeouts'] += 1
+                    raise exceptions.PoolTimeoutException(
+                        retry_after=self.retry_after)
+                self._condition.wait(wait)
+            self.metrics['checkouts'] += 1
+            if self._idle:
+                return self._idle.pop()
+            self._count += 1
+            return None
+
+    def _new(self):
+        try:
+            resource = self.create()
+        except Exception:
+            with self._condition:
+                self._count -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.metrics['created'] += 1
+        return resource
+
+    def _is_healthy(self, resource):
+        try:
+            return bool(self.check(resource))
+        except Exception:
+            logger.exception("Health check of %r failed", resource)
+            return False
+
+    def acquire(self, deadline=None):
+        self._ensure_process()
+        timeout = self.checkout_timeout
+        if deadline is not None:
+            remaining = deadline.remaining()
+            timeout = remaining if timeout is None else min(
+                timeout, remaining)
+
+        entry = self._reserve(timeout)
+        if entry is None:
+            return self._new()
+
+        resource, returned_at = entry
+        suspect = id(resource) in self._suspect
+        if self.check is not None and (
+                suspect or
+                time.monotonic() - returned_at >= self.check_interval):
+            self._suspect.discard(id(resource))
+            if not self._is_healthy(resource):
+                with self._condition:
+                    self.metrics['failed_checks'] += 1
+                self._close(resource)
+                return self._new()
+        return resource
+
+    def release(self, resource, failed=False):
+        """Return ``resource`` to the pool; ``failed`` resources are
+        checked before their next use."""
+        if self._pid != os.getpid():
+            return
+        with self._condition:
+            if failed:
+                self._suspect.add(id(resource))
+            self._idle.append((resource, time.monotonic()))
+            self._condition.notify()
+
+    def _close(self, resource):
+        """Close a checked out resource; its slot is kept for the
+        replacement the caller creates."""
+        if self.close_resource is not None:
+            try:
+                self.close_resource(resource)
+            except Exception:
+                logger.exception("Couldn't close %r", resource)
+        with self._condition:
+            self.metrics['closed'] += 1
+
+    def close(self):
+        """Close the idle resources of this process."""
+        if self._pid != os.getpid():
+            return
+        with self._condition:
+            idle = self._idle
+            self._idle = []
+            self._count -= len(idle)
+        for resource, _ in idle:
+            self._suspect.discard(id(resource))
+            self._close(resource)
+
+
+class Resources(object):
+    """Resources checked out for one request, released together."""
+    def __init__(self, pools, names, deadline=None):
+        self.checked_out = []
+        try:
+            for argument, name in names:
+                pool = pools[name]
+                self.checked_out.append(
+                    (argument, pool, pool.acquire(deadline)))
+        except Exception:
+            self.release()
+            raise
+
+    def kwargs(self):
+        return dict((argument, resource)
+                    for argument, pool, resource in self.checked_out)
+
+    def release(self, failed=False):
+        checked_out, self.checked_out = self.checked_out, []
+        for argument, pool, resource in reversed(checked_out):
+            pool.release(resource, failed)
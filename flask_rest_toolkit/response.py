@@ -0,0 +1,60 @@
+from flask import Response as FlaskResponse
+from werkzeug.datastructures import Headers
+
+
+class ApiResponse(object):
+    """What a handler returns when it wants to set the status code or
+    headers: ``return ApiResponse(task, 201, {'Location': url})``.
+
+    Equivalent to returning a ``(data, status, headers)`` tuple, without
+    having to work out the tuple's shape. ``headers`` can be a dict, a
+    list of pairs or a werkzeug ``Headers``.
+    """
+    __slots__ = ('data', 'status', 'headers')
+
+    def __init__(self, data=None, status=200, headers=None):
+        self.data = data
+        self.status = status
+        self.headers = headers if headers is not None else {}
+
+
+class HeaderBlock(object):
+    """Headers that are the same for every response of an endpoint
+    (Content-Type, CORS, caching, API version...).
+
+    They're merged and validated once, when the block is built, so a bad
+    header fails at startup. Each response then gets its own copy of the
+    merged list.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self, *header_sets):
+        headers = Headers()
+        for header_set in header_sets:
+            for key, value in (header_set.items()
+                               if hasattr(header_set, 'items')
+                               else header_set):
+                headers.set(key, value)
+        self.items = tuple(headers.items())
+
+    def headers(self, content_type=None):
+        headers = Headers(self.items)
+        if content_type is not None:
+            headers['Content-Type'] = content_type
+        return headers
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class Response(FlaskResponse):
+    """Response for bodies that are already serialized.
+
+    Takes a ``Headers`` instance, which werkzeug uses as is, and since it
+    always contains a Content-Type no mimetype has to be worked out.
+    """
+    default_mimetype = None
+
+    def __init__(self, body, status, headers):
+        super(Response, self).__init__(status=status, headers=headers)
+        self.set_data(body)
@@ -0,0 +1,149 @@
+import re
+import uuid
+
+from werkzeug.exceptions import NotFound, MethodNotAllowed
+
+_VARIABLE_RE = re.compile(
+    r'<(?:(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*)(?P<args>\(.*?\))?:)?'
+    r'(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)>')
+
+CONVERTERS = {
+    'default': (r'[^/]+', str),
+    'string': (r'[^/]+', str),
+    'int': (r'\d+', int),
+    'float': (r'\d+\.\d+', float),
+    'uuid': (r'[A-Fa-f0-9]{8}-[A-Fa-f0-9]{4}-[A-Fa-f0-9]{4}-'
+             r'[A-Fa-f0-9]{4}-[A-Fa-f0-9]{12}', uuid.UUID),
+}
+
+
+class _Node(object):
+    __slots__ = ('children', 'params', 'catch_all', 'views')
+
+    def __init__(self):
+        self.children = {}
+        self.params = []
+        self.catch_all = None
+        self.views = None
+
+
+def _compile_segment(segment):
+    pattern = []
+    converters = []
+    position = 0
+    for match in _VARIABLE_RE.finditer(segment):
+        converter = match.group('converter') or 'default'
+        if converter not in CONVERTERS or match.group('args'):
+            raise ValueError(
+                "Converter {} is not supported by the route table".format(
+                    converter))
+        regex, to_python = CONVERTERS[converter]
+        pattern.append(re.escape(segment[position:match.start()]))
+        pattern.append('(?P<{}>{})'.format(match.group('name'), regex))
+        converters.append((match.group('name'), to_python))
+        position = match.end()
+    pattern.append(re.escape(segment[position:]))
+    return re.compile('^' + ''.join(pattern) + '$'), converters
+
+
+class RouteTable(object):
+    """Index of the Api's routes built when endpoints are registered.
+
+    Fully static paths are looked up in a dict. Paths with variables
+    (Flask syntax: ``/task/<int:task_id>/``) go to a tree with one level
+    per path segment, where static children are tried before variable
+    ones. Each route maps HTTP methods to views, so a single URL rule can
+    serve all the methods registered for a path.
+    """
+    def __init__(self):
+        self.static = {}
+        self.root = _Node()
+
+    def add(self, path, methods, view):
+        if '<' not in path:
+            views = self.static.setdefault(path, {})
+        else:
+            views = self._add_dynamic(path)
+        for method in methods:
+            views.setdefault(method.upper(), view)
+        return views
+
+    def _add_dynamic(self, path):
+        node = self.root
+        segments = path.split('/')[1:]
+        for index, segment in enumerate(segments):
+            if segment.startswith('<path:') and segment.endswith('>'):
+                if index != len(segments) - 1:
+                    raise ValueError(
+                        "path converters must be the last segment")
+                if node.catch_all is None:
+                    node.catch_all = (segment[6:-1], _Node())
+                node = node.catch_all[1]
+            elif '<' not in segment:
+                node = node.children.setdefault(segment, _Node())
+            else:
+                regex, converters = _compile_segment(segment)
+                for existing, _, child in node.params:
+                    if existing.pattern == regex.pattern:
+                        node = child
+                        break
+                else:
+                    child = _Node()
+                    node.params.append((regex, converters, child))
+                    node = child
+        if node.views is None:
+            node.views = {}
+        return node.views
+
+    def _match(self, node, segments, index, kwargs):
+        if index == len(segments):
+            return node.views
+
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            views = self._match(child, segments, index + 1, kwargs)
+            if views is not None:
+                return views
+
+        for regex, converters, child in node.params:
+            match = regex.match(segment)
+            if match is None:
+                continue
+            try:
+                values = [(name, to_python(match.group(name)))
+                          for name, to_python in converters]
+            except ValueError:
+                continue
+            views = self._match(child, segments, index + 1, kwargs)
+            if views is not None:
+                kwargs.update(values)
+                return views
+
+        if node.catch_all is not None and segments[index:] != ['']:
+            name, child = node.catch_all
+            if child.views is not None:
+                kwargs[name] = '/'.join(segments[index:])
+                return child.views
+        return None
+
+    def match(self, path):
+        """Return a ``(views, kwargs)`` tuple. ``views`` is None if no route
+        matches the path."""
+        views = self.static.get(path)
+        if views is not None:
+            return views, {}
+        kwargs = {}
+        views = self._match(self.root, path.split('/')[1:], 0, kwargs)
+        return views, kwargs
+
+    def resolve(self, method, path):
+        views, kwargs = self.match(path)
+        if views is None:
+            raise NotFound()
+        view = views.get(method)
+        if view is None and method == 'HEAD':
+            view = views.get('GET')
+        if view is None:
+            raise MethodNotAllowed(valid_methods=sorted(views))
+        return view, kwargs
@@ -0,0 +1,282 @@
+import os
+import gc
+import sys
+import time
+import errno
+import signal
+import socket
+import logging
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from .api import Api
+from .utils import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def load_app(target):
+    """Import ``package.module:attribute`` and return the WSGI application
+    to serve and the Apis it holds.
+
+    An Api is served on its own with :meth:`Api.as_wsgi`; a Flask app is
+    served as is, with the Apis registered on it as blueprints.
+    """
+    obj, _ = import_string(target)
+    if isinstance(obj, Api):
+        return obj.as_wsgi(), [obj]
+    apis = [blueprint for blueprint in obj.blueprints.values()
+            if isinstance(blueprint, Api)]
+    return obj, apis
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # Requests are logged by the Api's access log, if any.
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class WorkerStats(object):
+    """WSGI middleware counting the requests of a worker."""
+    def __init__(self, app):
+        self.app = app
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    def __call__(self, environ, start_response):
+        started = time.time()
+
+        def counting_start_response(status, headers, exc_info=None):
+            if int(status.split(' ', 1)[0]) >= 500:
+                self.errors += 1
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.app(environ, counting_start_response)
+        finally:
+            self.requests += 1
+            self.total_time += time.time() - started
+
+    def report(self, number):
+        average = self.total_time / self.requests if self.requests else 0
+        return ("worker {} (pid {}): {} requests, {} errors, "
+                "{:.2f} ms average".format(
+                    number, os.getpid(), self.requests, self.errors,
+                    average * 1000))
+
+
+class Worker(object):
+    """A forked process serving requests from the master's socket until it
+    gets ``SIGTERM`` (or the master dies), then finishing its current
+    request and draining the Apis' background tasks."""
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, number, listener, app, apis, cpu=None,
+                 max_requests=0, graceful_timeout=30, stats_interval=60):
+        self.number = number
+        self.listener = listener
+        self.stats = WorkerStats(app)
+        self.apis = apis
+        self.cpu = cpu
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.stats_interval = stats_interval
+        self.alive = True
+
+    def stop(self, signum, frame):
+        self.alive = False
+
+    def print_stats(self, signum=None, frame=None):
+        sys.stderr.write(self.stats.report(self.number) + '\n')
+        sys.stderr.flush()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, self.print_stats)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, PreforkServer.SIGNALS)
+        if self.cpu is not None and hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, [self.cpu])
+
+        host, port = self.listener.getsockname()[:2]
+        server = BaseWSGIServer(host, port, self.stats,
+                                handler=QuietRequestHandler,
+                                fd=self.listener.fileno())
+        server.timeout = self.POLL_INTERVAL
+        # Idle workers all wake up for a new connection; the ones that
+        # lose the race get EAGAIN instead of blocking in accept().
+        server.socket.setblocking(False)
+
+        master = os.getppid()
+        next_report = time.time() + self.stats_interval
+        try:
+            while self.alive and os.getppid() == master:
+                server.handle_request()
+                if (self.max_requests and
+                        self.stats.requests >= self.max_requests):
+                    break
+                if self.stats_interval and time.time() >= next_report:
+                    self.print_stats()
+                    next_report = time.time() + self.stats_interval
+        finally:
+            self.print_stats()
+            for api in self.apis:
+                api.shutdown(self.graceful_timeout)
+
+
+class PreforkServer(object):
+    """Serve a WSGI application with a master process and ``workers``
+    forked worker processes sharing one listening socket.
+
+    The master imports everything up front: the application, every lazily
+    imported endpoint (``Api.warm_up``) and the Apis' precomputed
+    per-endpoint state. It then freezes the garbage collector generations
+    (``gc.freeze``) so the collector never touches, and copies, those
+    objects in the workers. Workers are pinned to a CPU each with
+    ``cpu_affinity``.
+
+    Signals to the master: ``SIGTERM``/``SIGINT`` stop gracefully,
+    ``SIGHUP`` replaces every worker without downtime (new workers start
+    accepting before the old ones stop) and ``SIGUSR1`` makes workers
+    print their request stats. Workers that die, or serve
+    ``max_requests``, are replaced.
+    """
+    SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1)
+
+    def __init__(self, app, apis=(), host='127.0.0.1', port=8000,
+                 workers=None, cpu_affinity=False, max_requests=0,
+                 graceful_timeout=30, stats_interval=60, backlog=2048):
+        self.app = app
+        self.apis = list(apis)
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.cpu_affinity = cpu_affinity
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.stats_interval = stats_interval
+        self.backlog = backlog
+
+        self.listener = None
+        self.children = {}
+        self.retiring = set()
+        self._signals = []
+
+    def bind(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(self.backlog)
+        self.listener = listener
+        return listener.getsockname()[:2]
+
+    def preload(self):
+        for api in self.apis:
+            api.warm_up()
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+    def spawn(self, number):
+        cpu = None
+        if self.cpu_affinity and hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+            cpu = cpus[number % len(cpus)]
+        worker = Worker(number, self.listener, self.app, self.apis, cpu,
+                        self.max_requests, self.graceful_timeout,
+                        self.stats_interval)
+        # Signals stay blocked until the worker has its own handlers.
+        signal.pthread_sigmask(signal.SIG_BLOCK, self.SIGNALS)
+        pid = os.fork()
+        if pid:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, self.SIGNALS)
+            self.children[pid] = number
+            return pid
+
+        code = 0
+        try:
+            worker.run()
+        except Exception:
+            logger.exception("Worker %s failed", number)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def run(self):
+        if self.listener is None:
+            self.bind()
+        self.preload()
+        for signum in self.SIGNALS:
+            signal.signal(signum, self._on_signal)
+
+        logger.info("Serving on http://%s:%s with %s workers",
+                    self.host, self.listener.getsockname()[1], self.workers)
+        for number in range(self.workers):
+            self.spawn(number)
+
+        while True:
+            while self._signals:
+                signum = self._signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    self.stop()
+                    return
+                if signum == signal.SIGHUP:
+                    self.reload()
+                elif signum == signal.SIGUSR1:
+                    self.kill_all(signal.SIGUSR1)
+            self.reap()
+            time.sleep(0.1)
+
+    def reload(self):
+        """Start a new set of workers, then stop the old ones."""
+        old = [pid for pid in self.children if pid not in self.retiring]
+        for pid in old:
+            self.spawn(self.children[pid])
+        for pid in old:
+            self.retiring.add(pid)
+            self.kill(pid, signal.SIGTERM)
+
+    def reap(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except OSError as exc:
+                if exc.errno == errno.ECHILD:
+                    return
+                raise
+            if not pid:
+                return
+            number = self.children.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif number is not None:
+                self.spawn(number)
+
+    def kill(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as exc:
+            if exc.errno != errno.ESRCH:
+                raise
+
+    def kill_all(self, signum):
+        for pid in list(self.children):
+            self.kill(pid, signum)
+
+    def stop(self):
+        self.retiring.update(self.children)
+        self.kill_all(signal.SIGTERM)
+        end = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < end:
+            self.reap()
+            time.sleep(0.1)
+        self.kill_all(signal.SIGKILL)
+        for pid in list(self.children):
+            os.waitpid(pid, 0)
+            self.children.pop(pid)
+        self.listener.close()
@@ -0,0 +1,402 @@
+import os
+import mmap
+import zlib
+import time
+import struct
+import pickle
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_MISSING = object()
+
+
+class MemoryStore(object):
+    """In-process key/value store with LRU eviction and per-entry TTL."""
+    def __init__(self, max_entries=10000, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.pop(key)
+            self._entries[key] = entry
+            return value
+
+    def _insert(self, key, value, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        self._entries.pop(key, None)
+        self._entries[key] = (value, expires)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._insert(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Store ``value`` only if ``key`` has no live entry, atomically;
+        return whether it was stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                    entry[1] is None or entry[1] > time.time()):
+                return False
+            self._insert(key, value, ttl)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteStore(object):
+    """Key/value store in a local SQLite file, shared by the processes of
+    a host. Values are pickled."""
+    PURGE_EVERY = 1000
+
+    def __init__(self, path, ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(key TEXT PRIMARY KEY, value BLOB, expires REAL)')
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            self._local.connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None)
+            self._local.pid = pid
+        return self._local.connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM entries WHERE key = ? AND '
+            '(expires IS NULL OR expires > ?)', (key, time.time())).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(bytes(row[0]))
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        connection = self._connection()
+        connection.execute(
+            'INSERT OR REPLACE INTO entries (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, sqlite3.Binary(pickle.dumps(value, -1)), expires))
+        self._purge(connection)
+
+    def add(self, key, value, ttl=None):
+        """Store ``value`` only if ``key`` has no live entry, atomically
+        across processes; return whether it was stored."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires = now + ttl if ttl else None
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM entries WHERE key = ? AND expires <= ?', (key, now))
+        added = connection.execute(
+            'INSERT OR IGNORE INTO entries (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, sqlite3.Binary(pickle.dumps(value, -1)),
+             expires)).rowcount == 1
+        self._purge(connection)
+        return added
+
+    def _purge(self, connection):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            connection.execute(
+                'DELETE FROM entries WHERE expires <= ?', (time.time(),))
+
+    def delete(self, key):
+        self._connection().execute(
+            'DELETE FROM entries WHERE key = ?', (key,))
+
+
+class MmapStore(object):
+    """Key/value store in a memory-mapped file shared by the processes of
+    a host, such as the workers of a preforking server.
+
+    The file holds a fixed table of ``slots`` slots of ``slot_size``
+    bytes, grouped in sets of ``ways`` slots: a key can only live in the
+    slots of the set its hash points to, and a full set evicts with the
+    CLOCK algorithm (slots read since the last sweep get a second
+    chance). Values are pickled; values too large for a slot aren't
+    stored.
+
+    Reads take no lock. Every slot has a sequence number that writers make
+    odd while they change the slot and even again once they're done;
+    readers retry when it changed under them and check the entry's CRC.
+    Writers are serialized with ``flock``, which the kernel releases when
+    a worker dies, and a slot left half-written by a crashed worker is
+    freed by the next writer (or when a store opens the file).
+
+    A file created with a different geometry is reset when opened.
+    """
+    MAGIC = b'FRTSTORE'
+    LAYOUT = 1
+    HEADER = struct.Struct('<8sIIII')
+    HEADER_SIZE = 64
+    SLOT = struct.Struct('<QQdII')
+    SEQ = struct.Struct('<Q')
+    KEY_LENGTH = struct.Struct('<H')
+    SLOT_DATA = 40
+    READ_RETRIES = 8
+
+    def __init__(self, path, slots=4096, slot_size=4096, ways=8, ttl=3600):
+        if fcntl is None:
+            raise RuntimeError("MmapStore needs a POSIX system")
+        if slots % ways:
+            raise ValueError("slots must be a multiple of ways")
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = ways
+        self.sets = slots // ways
+        self.ttl = ttl
+        self.size = self.HEADER_SIZE + self.sets + slots * slot_size
+        self.size += -self.size % mmap.PAGESIZE
+        self._slots_offset = self.size - slots * slot_size
+
+        self._pid = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self._map.close()
+                os.close(self._fd)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = self.HEADER.pack(
+                    self.MAGIC, self.LAYOUT, self.slots, self.slot_size,
+                    self.ways)
+                if (os.fstat(fd).st_size != self.size or
+                        os.pread(fd, self.HEADER.size, 0) != header):
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, header, 0)
+                self._map = mmap.mmap(fd, self.size)
+                self._recover()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._pid = os.getpid()
+
+    def _mapping(self):
+        # flock belongs to the open file, so forked workers reopen it.
+        if self._pid != os.getpid():
+            self._open()
+        return self._map
+
+    def _hash(self, key):
+        return self.SEQ.unpack(hashlib.sha1(key).digest()[:8])[0]
+
+    def _slot_offsets(self, key_hash):
+        start = self._slots_offset + (
+            key_hash % self.sets) * self.ways * self.slot_size
+        return [start + way * self.slot_size for way in range(self.ways)]
+
+    def _read(self, mapping, offset, key, key_hash):
+        """Value of the slot at ``offset`` if it holds ``key`` (``None``
+        once expired), else ``_MISSING``."""
+        for _ in range(self.READ_RETRIES):
+            seq, slot_hash, expires, length, crc = self.SLOT.unpack_from(
+                mapping, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if not length or slot_hash != key_hash:
+                return _MISSING
+            data = mapping[offset + self.SLOT_DATA:
+                           offset + self.SLOT_DATA + length]
+            if self.SEQ.unpack_from(mapping, offset)[0] != seq:
+                continue
+            if zlib.crc32(data) & 0xffffffff != crc:
+                return _MISSING
+            key_length = self.KEY_LENGTH.unpack_from(data)[0]
+            if data[2:2 + key_length] != key:
+                return _MISSING
+            if expires and expires <= time.time():
+                return None
+            mapping[offset + self.SLOT.size] = 1
+            return pickle.loads(data[2 + key_length:])
+        return _MISSING
+
+    def get(self, key):
+        key = key.encode('utf-8')
+        key_hash = self._hash(key)
+        mapping = self._mapping()
+        for offset in self._slot_offsets(key_hash):
+            value = self._read(mapping, offset, key, key_hash)
+            if value is not _MISSING:
+                return value
+        return None
+
+    def _write_lock(self):
+        self._mapping()
+        return _FileLock(self._lock, self._fd)
+
+    def _write(self, mapping, offset, key_hash, expires, data):
+        seq = self.SEQ.unpack_from(mapping, offset)[0]
+        seq += 1 if seq % 2 == 0 else 0
+        self.SEQ.pack_into(mapping, offset, seq)
+        mapping[offset + self.SLOT_DATA:
+                offset + self.SLOT_DATA + len(data)] = data
+        self.SLOT.pack_into(mapping, offset, seq, key_hash, expires,
+                            len(data), zlib.crc32(data) & 0xffffffff)
+        mapping[offset + self.SLOT.size] = 0
+        self.SEQ.pack_into(mapping, offset, seq + 1)
+
+    def _holds(self, mapping, offset, key, key_hash):
+        seq, slot_hash, expires, length, crc = self.SLOT.unpack_from(
+            mapping, offset)
+        if not length or slot_hash != key_hash:
+            return False
+        start = offset + self.SLOT_DATA
+        key_length = self.KEY_LENGTH.unpack_from(mapping, start)[0]
+        return mapping[start + 2:start + 2 + key_length] == key
+
+    def _victim(self, mapping, key_hash, offsets):
+        now = time.time()
+        for offset in offsets:
+            seq, _, expires, length, _ = self.SLOT.unpack_from(
+                mapping, offset)
+            # Odd sequence numbers are left by crashed writers.
+            if seq & 1 or not length or (expires and expires <= now):
+                return offset
+        hand_offset = self.HEADER_SIZE + key_hash % self.sets
+        hand = mapping[hand_offset] % self.ways
+        while True:
+            offset = offsets[hand]
+            hand = (hand + 1) % self.ways
+            if mapping[offset + self.SLOT.size]:
+                mapping[offset + self.SLOT.size] = 0
+            else:
+                mapping[hand_offset] = hand
+                return offset
+
+    def _entry(self, key, value, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else 0
+        key = key.encode('utf-8')
+        data = (self.KEY_LENGTH.pack(len(key)) + key +
+                pickle.dumps(value, -1))
+        return key, self._hash(key), expires, data
+
+    def _fits(self, data):
+        return self.SLOT_DATA + len(data) <= self.slot_size
+
+    def set(self, key, value, ttl=None):
+        key, key_hash, expires, data = self._entry(key, value, ttl)
+        if not self._fits(data):
+            self._delete(key, key_hash)
+            return
+        offsets = self._slot_offsets(key_hash)
+        with self._write_lock():
+            mapping = self._map
+            for offset in offsets:
+                if self._holds(mapping, offset, key, key_hash):
+                    break
+            else:
+                offset = self._victim(mapping, key_hash, offsets)
+            self._write(mapping, offset, key_hash, expires, data)
+
+    def add(self, key, value, ttl=None):
+        """Store ``value`` only if ``key`` has no live entry, atomically
+        across processes; return whether it was stored. Raises
+        ``ValueError`` for values too large for a slot."""
+        key, key_hash, expires, data = self._entry(key, value, ttl)
+        if not self._fits(data):
+            raise ValueError("Value too large for a slot")
+        offsets = self._slot_offsets(key_hash)
+        with self._write_lock():
+            mapping = self._map
+            for offset in offsets:
+                if self._holds(mapping, offset, key, key_hash):
+                    held_expires = self.SLOT.unpack_from(mapping, offset)[2]
+                    if not held_expires or held_expires > time.time():
+                        return False
+                    break
+            else:
+                offset = self._victim(mapping, key_hash, offsets)
+            self._write(mapping, offset, key_hash, expires, data)
+        return True
+
+    def _clear(self, mapping, offset, key, key_hash):
+        if self._holds(mapping, offset, key, key_hash):
+            self._write(mapping, offset, 0, 0, b'')
+
+    def delete(self, key):
+        key = key.encode('utf-8')
+        self._delete(key, self._hash(key))
+
+    def _delete(self, key, key_hash):
+        with self._write_lock():
+            for offset in self._slot_offsets(key_hash):
+                self._clear(self._map, offset, key, key_hash)
+
+    def _recover(self):
+        """Free the slots a crashed writer left half-written. Called with
+        the file locked."""
+        mapping = self._map
+        for slot in range(self.slots):
+            offset = self._slots_offset + slot * self.slot_size
+            if self.SEQ.unpack_from(mapping, offset)[0] & 1:
+                self._write(mapping, offset, 0, 0, b'')
+
+    def __len__(self):
+        mapping = self._mapping()
+        return sum(
+            1 for slot in range(self.slots)
+            if self.SLOT.unpack_from(
+                mapping, self._slots_offset + slot * self.slot_size)[3])
+
+
+class _FileLock(object):
+    """Thread lock plus ``flock`` on a file, for MmapStore writers."""
+    def __init__(self, lock, fd):
+        self.lock = lock
+        self.fd = fd
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except Exception:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            self.lock.release()
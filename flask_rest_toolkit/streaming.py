@@ -0,0 +1,184 @@
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from werkzeug.wrappers import Response
+
+from .endpoint import ApiEndpoint
+from .concurrency import ConcurrencyLimiter
+
+_DONE = object()
+
+
+class Event(object):
+    """A Server-Sent Event. Handlers can also yield plain data, which is
+    sent as an event without name or id."""
+    def __init__(self, data, event=None, id=None, retry=None):
+        self.data = data
+        self.event = event
+        self.id = id
+        self.retry = retry
+
+
+class LastEventIdMiddleware(object):
+    def process_request(self, request, *args, **kwargs):
+        request.last_event_id = (request.headers.get('Last-Event-ID') or
+                                 request.args.get('lastEventId'))
+
+
+def _is_async_iterable(events):
+    return hasattr(events, '__aiter__')
+
+
+class EventStream(object):
+    """Response body of an event stream.
+
+    Events are framed as they're consumed by the server. When heartbeats
+    are enabled (or the handler is an async generator) events are produced
+    in a separate thread, and a comment line is sent whenever there's
+    nothing to send for ``heartbeat`` seconds, so proxies and clients
+    don't drop idle connections.
+    """
+    def __init__(self, events, serializer, heartbeat=None, retry=None,
+                 on_close=None, max_buffer=100):
+        self.events = events
+        self.serializer = serializer
+        self.heartbeat = heartbeat
+        self.retry = retry
+        self.on_close = on_close
+        self.max_buffer = max_buffer
+        self._stopped = threading.Event()
+        self._closed = False
+
+    def format(self, event):
+        if not isinstance(event, Event):
+            event = Event(event)
+        lines = []
+        if event.id is not None:
+            lines.append('id: {}'.format(event.id))
+        if event.event is not None:
+            lines.append('event: {}'.format(event.event))
+        if event.retry is not None:
+            lines.append('retry: {}'.format(event.retry))
+        data = self.serializer.serialize(event.data)
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        lines.extend('data: ' + line for line in data.split('\n'))
+        return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+    def __iter__(self):
+        if self.retry is not None:
+            yield 'retry: {}\n\n'.format(self.retry).encode('utf-8')
+
+        if self.heartbeat is None and not _is_async_iterable(self.events):
+            for event in self.events:
+                yield self.format(event)
+            return
+
+        buffer = queue.Queue(self.max_buffer)
+        producer = threading.Thread(target=self._produce, args=(buffer,))
+        producer.daemon = True
+        producer.start()
+        while True:
+            try:
+                item = buffer.get(timeout=self.heartbeat)
+            except queue.Empty:
+                yield b': keep-alive\n\n'
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield self.format(item)
+
+    def _put(self, buffer, item):
+        while not self._stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self, buffer):
+        try:
+            if _is_async_iterable(self.events):
+                self._produce_async(buffer)
+            else:
+                for event in self.events:
+                    if not self._put(buffer, event):
+                        break
+                if hasattr(self.events, 'close'):
+                    self.events.close()
+        except Exception as exc:
+            self._put(buffer, exc)
+        self._put(buffer, _DONE)
+
+    def _produce_async(self, buffer):
+        import asyncio
+
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    event = loop.run_until_complete(self.events.__anext__())
+                except StopAsyncIteration:
+                    break
+                if not self._put(buffer, event):
+                    break
+            loop.run_until_complete(self.events.aclose())
+        finally:
+            loop.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._stopped.set()
+        if self.heartbeat is None and hasattr(self.events, 'close'):
+            self.events.close()
+        if self.on_close is not None:
+            self.on_close()
+
+
+class EventStreamEndpoint(ApiEndpoint):
+    """Endpoint streaming Server-Sent Events.
+
+    The handler returns a generator, or an async generator, of events.
+    Each event's data is serialized with the endpoint's serializer.
+    ``request.last_event_id`` holds the ``Last-Event-ID`` sent by a
+    reconnecting client so the handler can resume from there, and
+    ``max_connections`` caps the number of open streams (extra clients
+    get a 503).
+    """
+    streaming = True
+
+    def __init__(self, endpoint, handler, heartbeat=15, retry=None,
+                 max_connections=None, http_method='GET', **kwargs):
+        kwargs['middleware'] = (
+            [LastEventIdMiddleware] + list(kwargs.get('middleware') or []))
+        super(EventStreamEndpoint, self).__init__(
+            http_method, endpoint, handler, **kwargs)
+        self.heartbeat = heartbeat
+        self.retry = retry
+        self.connections = None
+        if max_connections:
+            self.connections = ConcurrencyLimiter(max_connections)
+
+    def stream_response(self, events, code, headers, serializer):
+        on_close = None
+        if self.connections is not None:
+            self.connections.acquire()
+            on_close = self.connections.release
+
+        stream = EventStream(events, serializer, heartbeat=self.heartbeat,
+                             retry=self.retry, on_close=on_close)
+        response = Response(stream, status=code,
+                            mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.headers.extend(headers or {})
+        return response
@@ -0,0 +1,137 @@
+import os
+import time
+import atexit
+import logging
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class TaskPool(object):
+    """A bounded pool of daemon threads running fire and forget tasks.
+
+    Threads are started on first use (and again after a fork), so creating
+    a pool at import time is cheap and safe for preforking servers. When
+    the queue is full new tasks are dropped and counted as ``rejected``.
+    Failures are logged and passed to ``on_error(task, exc)``.
+    """
+    def __init__(self, workers=4, max_queue=1000, on_error=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_error = on_error
+
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+        }
+        self._pid = None
+        self._threads = []
+        self._queue = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._threads = []
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            self._pid = os.getpid()
+            atexit.register(self.shutdown)
+
+    def _work(self):
+        tasks = self._queue
+        while True:
+            task = tasks.get()
+            try:
+                if task is _STOP:
+                    return
+                func, args, kwargs = task
+                try:
+                    func(*args, **kwargs)
+                except Exception as exc:
+                    self._count('failed')
+                    logger.exception("Background task %r failed", func)
+                    if self.on_error is not None:
+                        self.on_error(func, exc)
+                else:
+                    self._count('completed')
+            finally:
+                tasks.task_done()
+
+    def _count(self, metric):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, func, *args, **kwargs):
+        if self._closed:
+            self._count('rejected')
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((func, args, kwargs))
+        except queue.Full:
+            self._count('rejected')
+            logger.warning("Background task queue full, dropping %r", func)
+            return False
+        self._count('submitted')
+        return True
+
+    def shutdown(self, timeout=30):
+        """Stop accepting tasks and wait up to ``timeout`` seconds for the
+        queued ones to finish."""
+        self._closed = True
+        if self._pid != os.getpid():
+            return
+        self._pid = None
+        end = time.monotonic() + timeout
+        try:
+            for _ in self._threads:
+                self._queue.put(_STOP, timeout=max(0, end - time.monotonic()))
+        except queue.Full:
+            logger.warning("Background tasks still queued at shutdown")
+            return
+        for thread in self._threads:
+            thread.join(max(0, end - time.monotonic()))
+
+
+class BackgroundTasks(object):
+    """Tasks registered by a handler with ``request.background_tasks.add``.
+
+    They are handed to the Api's pool once the response has been sent to
+    the client.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.tasks = []
+
+    def add(self, func, *args, **kwargs):
+        self.tasks.append((func, args, kwargs))
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def submit(self):
+        for func, args, kwargs in self.tasks:
+            self.pool.submit(func, *args, **kwargs)
+        self.tasks = []
@@ -0,0 +1,153 @@
+import re
+import time
+import random
+import threading
+
+TRACEPARENT = 'traceparent'
+TRACESTATE = 'tracestate'
+
+SERVER = 'SERVER'
+INTERNAL = 'INTERNAL'
+
+_TRACEPARENT_RE = re.compile(
+    r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_INVALID_TRACE_ID = '0' * 32
+_INVALID_SPAN_ID = '0' * 16
+
+
+def parse_traceparent(value):
+    """``(trace_id, parent_span_id, sampled)`` from a W3C ``traceparent``
+    header, or None if it's missing or invalid."""
+    match = _TRACEPARENT_RE.match((value or '').strip())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == 'ff' or trace_id == _INVALID_TRACE_ID or \
+            span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+def _time_ns():
+    return int(time.time() * 1e9)
+
+
+class Span(object):
+    """A timed operation of a trace, shaped like an OpenTelemetry span."""
+    __slots__ = ('tracer', 'name', 'kind', 'trace_id', 'span_id',
+                 'parent', 'parent_span_id', 'sampled', 'trace_state',
+                 'attributes', 'events', 'status', 'start_time', 'end_time')
+
+    def __init__(self, tracer, name, trace_id, parent_span_id, sampled,
+                 kind=INTERNAL, parent=None, trace_state=None,
+                 attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = '{:016x}'.format(random.getrandbits(64))
+        self.parent = parent
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled
+        self.trace_state = trace_state
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = 'UNSET'
+        self.start_time = _time_ns()
+        self.end_time = None
+
+    def child(self, name, attributes=None):
+        return Span(self.tracer, name, self.trace_id, self.span_id,
+                    self.sampled, parent=self, trace_state=self.trace_state,
+                    attributes=attributes)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = 'ERROR'
+        self.events.append({
+            'name': 'exception',
+            'time': _time_ns(),
+            'attributes': {
+                'exception.type': exc.__class__.__name__,
+                'exception.message': str(exc),
+            },
+        })
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = _time_ns()
+            if self.sampled:
+                self.tracer.exporter.export(self)
+
+    @property
+    def duration(self):
+        return (self.end_time - self.start_time) / 1e9
+
+    def traceparent(self):
+        """``traceparent`` header value to propagate the trace to
+        outgoing calls."""
+        return '00-{}-{}-{:02x}'.format(
+            self.trace_id, self.span_id, int(self.sampled))
+
+    def to_dict(self):
+        """The span in the OTLP/JSON layout."""
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id or '',
+            'traceState': self.trace_state or '',
+            'name': self.name,
+            'kind': 'SPAN_KIND_' + self.kind,
+            'startTimeUnixNano': self.start_time,
+            'endTimeUnixNano': self.end_time,
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': {'code': 'STATUS_CODE_' + self.status},
+        }
+
+
+class InMemoryExporter(object):
+    """Keeps finished spans in a list; meant for tests."""
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+
+class Tracer(object):
+    """Creates the spans of each request.
+
+    Incoming W3C Trace Context headers (``traceparent``, ``tracestate``)
+    are honored: the request span joins the caller's trace and keeps its
+    sampling decision. Requests starting a trace are sampled with
+    ``sample_rate``. Finished, sampled spans are passed to
+    ``exporter.export(span)``, which runs in the request thread and should
+    only hand them over (to a queue, an OpenTelemetry span processor...).
+    """
+    def __init__(self, exporter, sample_rate=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(self, name, headers=None, kind=SERVER, attributes=None):
+        headers = headers or {}
+        context = parse_traceparent(headers.get(TRACEPARENT))
+        if context is None:
+            trace_id = '{:032x}'.format(random.getrandbits(128))
+            parent_span_id = None
+            sampled = random.random() < self.sample_rate
+            trace_state = None
+        else:
+            trace_id, parent_span_id, sampled = context
+            trace_state = headers.get(TRACESTATE)
+        return Span(self, name, trace_id, parent_span_id, sampled,
+                    kind=kind, trace_state=trace_state,
+                    attributes=attributes)
@@ -1,3 +1,7 @@
+import time
+import importlib
+
+
 def unpack(value):
     """
     Return a three tuple of data, code, and headers.
@@ -7,16 +11,36 @@ def unpack(value):
     if not isinstance(value, tuple):
         return value, 200, {}
 
-    try:
-        data, code, headers = value
-        return data, code, headers
-    except ValueError:
-        pass
+    length = len(value)
+    if length == 3:
+        return value
+    if length == 2:
+        return value[0], value[1], {}
+    return value, 200, {}
 
-    try:
-        data, code = value
-        return data, code, {}
-    except ValueError:
-        pass
 
-    return value, 200, {}
+def import_string(dotted_path):
+    """
+    Import an object from a ``package.module:attribute`` path
+    (``package.module.attribute`` also works). Return a two tuple
+    of the object and the seconds it took to import its module.
+    """
+    if ':' in dotted_path:
+        module_name, _, attribute = dotted_path.partition(':')
+    else:
+        module_name, _, attribute = dotted_path.rpartition('.')
+    if not module_name or not attribute:
+        raise ImportError("{} is not a valid import path".format(dotted_path))
+
+    start = time.time()
+    module = importlib.import_module(module_name)
+    elapsed = time.time() - start
+
+    obj = module
+    for name in attribute.split('.'):
+        try:
+            obj = getattr(obj, name)
+        except AttributeError:
+            raise ImportError("{} has no attribute {}".format(
+                module_name, attribute))
+    return obj, elapsed
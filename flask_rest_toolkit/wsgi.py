@@ -0,0 +1,49 @@
+import logging
+
+from werkzeug.wrappers import Request
+from werkzeug.exceptions import HTTPException, InternalServerError
+
+from .api import RouteTableDispatcher
+from .routing import RouteTable
+
+logger = logging.getLogger(__name__)
+
+
+class WsgiApp(object):
+    """WSGI application serving the endpoints of one or more Apis without
+    Flask: no app or request context, blueprint dispatch or
+    ``before_request`` hooks.
+
+    Requests are werkzeug ``Request`` objects routed with a
+    :class:`~flask_rest_toolkit.routing.RouteTable` built from the
+    registered endpoints, and go through the same ViewHandler pipeline
+    (authentication, middleware, exceptions, serializers...) as under
+    Flask. Rules the RouteTable doesn't support raise ``ValueError`` when
+    the app is built. Handlers can't use Flask globals (``flask.request``,
+    ``current_app``, ``g``).
+    """
+    request_class = Request
+
+    def __init__(self, *apis):
+        self.apis = apis
+        routes = RouteTable()
+        for api in apis:
+            for url, methods, view in api.views:
+                routes.add(url, methods, view)
+        self.dispatcher = RouteTableDispatcher(routes)
+
+    def __call__(self, environ, start_response):
+        request = self.request_class(environ)
+        try:
+            response = self.dispatcher.dispatch(request, request.path)
+        except HTTPException as exc:
+            response = exc.get_response(environ)
+        except Exception:
+            logger.exception("Exception on %s [%s]",
+                             request.path, request.method)
+            response = InternalServerError().get_response(environ)
+        return response(environ, start_response)
+
+    def shutdown(self, timeout=30):
+        for api in self.apis:
+            api.shutdown(timeout)
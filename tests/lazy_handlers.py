@@ -0,0 +1,18 @@
+from werkzeug.exceptions import Unauthorized
+
+from flask_rest_toolkit.auth import AuthenticationStrategy
+
+
+def get_tasks(request):
+    return [{'id': 1, 'task': 'Do the laundry', 'user': request.user}]
+
+
+class UserMiddleware(object):
+    def process_request(self, request):
+        request.user = 'john'
+
+
+class HeaderAuthentication(AuthenticationStrategy):
+    def authenticate(self, request):
+        if 'X-Token' not in request.headers:
+            raise Unauthorized()
@@ -0,0 +1,13 @@
+import os
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+
+
+def get_pid(request):
+    return {'pid': os.getpid()}
+
+
+api = Api(version="v1")
+api.register_endpoint(ApiEndpoint(
+    http_method="GET", endpoint="/pid/", handler=get_pid))
@@ -0,0 +1,176 @@
+import json
+import time
+import base64
+import logging
+import threading
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.access_log import AccessLogger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+    @property
+    def records(self):
+        return [json.loads(line) for line in self.lines]
+
+
+class BlockingHandler(ListHandler):
+    def __init__(self):
+        super(BlockingHandler, self).__init__()
+        self.unblocked = threading.Event()
+
+    def emit(self, record):
+        self.unblocked.wait(5)
+        super(BlockingHandler, self).emit(record)
+
+
+class FailingHandler(logging.Handler):
+    def __init__(self):
+        super(FailingHandler, self).__init__()
+        self.errors = []
+
+    def handle(self, record):
+        raise IOError("Disk full")
+
+    def handleError(self, record):
+        self.errors.append(record)
+
+
+class TokenAuthentication(object):
+    def authenticate(self, request):
+        request.identity = {'id': 'client-7'}
+
+
+def get_tasks(request):
+    return [{'id': 1}]
+
+
+def fail(request):
+    raise ValueError("Broken")
+
+
+class AccessLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.handler = ListHandler()
+        self.access_log = AccessLogger(self.handler)
+
+        app = Flask(__name__)
+        self.api = Api(version="v1", access_log=self.access_log)
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=get_tasks))
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/private/", handler=get_tasks,
+            authentication=TokenAuthentication()))
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/broken/", handler=fail))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.api.shutdown()
+
+    def test_one_record_per_request(self):
+        resp = self.client.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.access_log.flush()
+
+        records = self.handler.records
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record['view'], "['GET']-/v1/task/-get_tasks")
+        self.assertEqual(record['method'], 'GET')
+        self.assertEqual(record['path'], '/v1/task/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['response_bytes'], len(resp.data))
+        self.assertIsNone(record['identity'])
+        self.assertGreaterEqual(record['duration'], 0)
+        self.assertEqual(
+            set(record['phases']),
+            set(['queue', 'middleware', 'handler', 'serialization']))
+
+    def test_identity_from_authentication(self):
+        self.client.get('/v1/private/')
+        self.access_log.flush()
+
+        record = self.handler.records[0]
+        self.assertEqual(record['identity'], 'client-7')
+        self.assertIn('authentication', record['phases'])
+
+    def test_identity_from_basic_auth(self):
+        credentials = base64.b64encode(b'santiago:secret').decode('ascii')
+        self.client.get('/v1/task/',
+                        headers={'Authorization': 'Basic ' + credentials})
+        self.access_log.flush()
+
+        self.assertEqual(self.handler.records[0]['identity'], 'santiago')
+
+    def test_unhandled_exceptions_are_logged_as_500(self):
+        with self.assertRaises(ValueError):
+            self.client.get('/v1/broken/')
+        self.access_log.flush()
+
+        record = self.handler.records[0]
+        self.assertEqual(record['status'], 500)
+        self.assertIsNone(record['response_bytes'])
+
+    def test_shutdown_drains_the_log(self):
+        for _ in range(3):
+            self.client.get('/v1/task/')
+        self.api.shutdown()
+
+        self.assertEqual(len(self.handler.lines), 3)
+
+
+class AccessLoggerTestCase(unittest.TestCase):
+    record = {'view': 'tasks', 'status': 200}
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        handler = BlockingHandler()
+        access_log = AccessLogger(handler, max_queue=1)
+
+        for _ in range(5):
+            access_log.log(self.record)
+
+        handler.unblocked.set()
+        access_log.flush()
+        self.assertGreaterEqual(access_log.dropped, 3)
+        self.assertEqual(access_log.dropped + access_log.written, 5)
+        self.assertEqual(len(handler.lines), access_log.written)
+        access_log.close()
+
+    def test_failed_writes_are_counted(self):
+        handler = FailingHandler()
+        access_log = AccessLogger(handler)
+
+        access_log.log(self.record)
+        access_log.flush()
+
+        self.assertEqual(access_log.failed, 1)
+        self.assertEqual(access_log.written, 0)
+        self.assertEqual(len(handler.errors), 1)
+        self.assertEqual(json.loads(handler.errors[0].getMessage()),
+                         self.record)
+        access_log.close()
+
+    def test_close_does_not_wait_past_its_timeout(self):
+        handler = BlockingHandler()
+        access_log = AccessLogger(handler, max_queue=1)
+        access_log.log(self.record)
+        access_log.log(self.record)
+
+        started = time.time()
+        access_log.close(timeout=0.1)
+        self.assertLess(time.time() - started, 1)
+        handler.unblocked.set()
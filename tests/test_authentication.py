@@ -1,6 +1,8 @@
 import json
+import time
 import unittest
 import base64
+import threading
 
 from flask import Flask, Request
 from werkzeug.test import EnvironBuilder
@@ -10,7 +12,8 @@ from flask_rest_toolkit.api import Api
 from flask_rest_toolkit.endpoint import ApiEndpoint
 from flask_rest_toolkit.auth import (
     BasicAuth, And, NoAuthorizationStrategy,
-    AuthenticationStrategy)
+    AuthenticationStrategy, ApiKeyAuth, hash_api_key, HmacSignatureAuth,
+    sign_request)
 
 try:
     from unittest import mock
@@ -173,3 +176,171 @@ class BasicAuthTestCase(unittest.TestCase):
             }
         )
         self.assertEqual(resp.status_code, 401)
+
+
+class ApiKeyAuthTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.keys = {
+            hash_api_key('partner-key'): {
+                'identity': 'partner', 'tenant': 'acme',
+                'scopes': ['tasks:read']},
+            hash_api_key('other-key'): {'tenant': 'globex'},
+        }
+        self.loads = 0
+
+        def load_keys():
+            self.loads += 1
+            return self.keys
+
+        def get_tasks(request):
+            return {'identity': request.identity, 'tenant': request.tenant,
+                    'scopes': sorted(request.scopes)}
+
+        self.auth = ApiKeyAuth(load_keys, query_param='api_key')
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            authentication=self.auth
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def get(self, *args, **kwargs):
+        resp = self.app.get(*args, **kwargs)
+        if resp.status_code != 200:
+            return resp.status_code
+        return json.loads(resp.data.decode(resp.charset))
+
+    def test_valid_keys(self):
+        self.assertEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'}),
+            {'identity': 'partner', 'tenant': 'acme',
+             'scopes': ['tasks:read']})
+        self.assertEqual(
+            self.get('/v1/task/?api_key=other-key'),
+            {'identity': hash_api_key('other-key'), 'tenant': 'globex',
+             'scopes': []})
+        self.assertEqual(self.loads, 1)
+
+    def test_invalid_keys(self):
+        self.assertEqual(self.get('/v1/task/'), 401)
+        self.assertEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'wrong'}), 401)
+        self.assertEqual(
+            self.get('/v1/task/', headers={
+                'X-Api-Key': hash_api_key('partner-key')}), 401)
+
+    def test_keys_are_refreshed_in_the_background(self):
+        self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'})
+        reload = threading.Event()
+
+        def load_keys():
+            reload.wait(5)
+            self.loads += 1
+            return {hash_api_key('new-key'): {}}
+
+        self.auth.keys.load = load_keys
+        self.auth.keys.loaded_at -= 3600
+
+        # Requests don't wait for the reload.
+        self.assertEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'})[
+                'tenant'], 'acme')
+        reload.set()
+        end = time.time() + 5
+        while self.auth.keys._refreshing is not None and time.time() < end:
+            time.sleep(0.01)
+
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'}), 401)
+        self.assertNotEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'new-key'}), 401)
+
+    def test_failed_refreshes_keep_the_index(self):
+        self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'})
+        self.auth.keys.load = mock.MagicMock(side_effect=IOError())
+        self.auth.keys.loaded_at -= 3600
+        with mock.patch('flask_rest_toolkit.auth.logger'):
+            self.auth.keys._refreshing = None
+            self.auth.keys._background_refresh()
+        self.assertGreater(self.auth.keys.loaded_at, time.time() - 5)
+        self.assertEqual(
+            self.get('/v1/task/', headers={'X-Api-Key': 'partner-key'})[
+                'tenant'], 'acme')
+
+
+class HmacSignatureAuthTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.keys = {'billing': ['new-secret', 'old-secret']}
+        self.received = []
+
+        def receive_event(request):
+            self.received.append(request.stream)
+            return {'identity': request.identity,
+                    'event': request.get_json()['event']}, 201
+
+        self.auth = HmacSignatureAuth(lambda: self.keys, spool_size=16)
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST",
+            endpoint="/webhook/",
+            handler=receive_event,
+            authentication=self.auth
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def post(self, body, secret='new-secret', key_id='billing', nonce='n1',
+             timestamp=None, path='/v1/webhook/?source=test'):
+        timestamp = str(int(time.time()) if timestamp is None else timestamp)
+        body = json.dumps(body).encode('utf-8')
+        headers = {
+            'X-Key-Id': key_id,
+            'X-Timestamp': timestamp,
+            'X-Nonce': nonce,
+            'X-Signature': sign_request(secret, 'POST', path, timestamp,
+                                        nonce, body),
+        }
+        return self.app.post('/v1/webhook/?source=test', data=body,
+                             content_type='application/json',
+                             headers=headers)
+
+    def test_signed_requests(self):
+        resp = self.post({'event': 'paid', 'padding': 'x' * 100})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'identity': 'billing', 'event': 'paid'})
+        # Bigger than spool_size: the body was spooled to a file.
+        self.assertTrue(self.received[0]._rolled)
+
+        resp = self.post({'event': 'refunded'}, secret='old-secret',
+                         nonce='n2')
+        self.assertEqual(resp.status_code, 201)
+
+    def test_invalid_signatures(self):
+        self.assertEqual(self.post({'event': 'paid'}, secret='x').status_code,
+                         401)
+        self.assertEqual(
+            self.post({'event': 'paid'}, key_id='unknown').status_code, 401)
+        self.assertEqual(
+            self.post({'event': 'paid'}, path='/v1/other/').status_code, 401)
+        self.assertEqual(self.app.post('/v1/webhook/').status_code, 401)
+
+    def test_stale_timestamps(self):
+        resp = self.post({'event': 'paid'}, timestamp=time.time() - 600)
+        self.assertEqual(resp.status_code, 401)
+        resp = self.post({'event': 'paid'}, timestamp='tomorrow')
+        self.assertEqual(resp.status_code, 401)
+
+    def test_replayed_nonces(self):
+        self.assertEqual(self.post({'event': 'paid'}).status_code, 201)
+        self.assertEqual(self.post({'event': 'paid'}).status_code, 401)
+        self.assertEqual(
+            self.post({'event': 'paid'}, nonce='n2').status_code, 201)
@@ -0,0 +1,144 @@
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import Unauthorized, Forbidden
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.authorization import Policy
+
+
+class HeaderAuthentication(object):
+    """Identity, roles and scopes from test headers."""
+    def authenticate(self, request):
+        if 'X-User' not in request.headers:
+            raise Unauthorized()
+        request.identity = request.headers['X-User']
+        request.roles = request.headers.get('X-Roles', '').split(',')
+        request.scopes = request.headers.get('X-Scopes', '').split(',')
+
+
+class PolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.role_lookups = []
+
+        def load_roles(identity):
+            self.role_lookups.append(identity)
+            return {'alice': ['admin']}.get(identity, [])
+
+        def get_report(request, owner):
+            return {'owner': owner}
+
+        def is_owner(request, owner):
+            return request.identity == owner
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/admin/",
+            handler=lambda request: {'admin': True},
+            authentication=HeaderAuthentication(),
+            authorization=Policy(roles=['admin', 'ops'])
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/audit/",
+            handler=lambda request: {'audit': True},
+            authentication=HeaderAuthentication(),
+            authorization=Policy(roles=['admin'], load_roles=load_roles)
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/report/<owner>",
+            handler=get_report,
+            authentication=HeaderAuthentication(),
+            authorization=Policy(scopes=['reports:read', 'reports:list'],
+                                 predicates=[is_owner])
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def get(self, url, user=None, roles='', scopes=''):
+        headers = {'X-Roles': roles, 'X-Scopes': scopes}
+        if user is not None:
+            headers['X-User'] = user
+        return self.app.get(url, headers=headers).status_code
+
+    def test_roles(self):
+        self.assertEqual(self.get('/v1/admin/'), 401)
+        self.assertEqual(self.get('/v1/admin/', 'bob', 'ops'), 200)
+        self.assertEqual(self.get('/v1/admin/', 'carol', 'dev'), 403)
+
+    def test_scopes_and_predicates(self):
+        scopes = 'reports:read,reports:list'
+        self.assertEqual(self.get('/v1/report/bob', 'bob', '', scopes), 200)
+        self.assertEqual(
+            self.get('/v1/report/alice', 'bob', '', scopes), 403)
+        self.assertEqual(
+            self.get('/v1/report/carol', 'carol', '', 'reports:read'), 403)
+
+    def test_scopes_are_checked_per_request(self):
+        scopes = 'reports:read,reports:list'
+        self.assertEqual(self.get('/v1/report/bob', 'bob', '', scopes), 200)
+        # Another key of the same identity, with fewer scopes.
+        self.assertEqual(
+            self.get('/v1/report/bob', 'bob', '', 'reports:read'), 403)
+
+    def test_roles_are_cached_per_identity(self):
+        self.assertEqual(self.get('/v1/audit/', 'alice'), 200)
+        self.assertEqual(self.get('/v1/audit/', 'alice'), 200)
+        self.assertEqual(self.get('/v1/audit/', 'bob'), 403)
+        self.assertEqual(self.get('/v1/audit/', 'bob'), 403)
+        self.assertEqual(self.role_lookups, ['alice', 'bob'])
+
+    def test_internal_calls_are_authorized(self):
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/admin/",
+            handler=lambda request: {'admin': True},
+            authentication=HeaderAuthentication(),
+            authorization=Policy(roles=['admin'])
+        ))
+        result = api.call('GET', '/v1/admin/',
+                          headers={'X-User': 'bob', 'X-Roles': 'admin'})
+        self.assertEqual(result.data, {'admin': True})
+        with self.assertRaises(Forbidden):
+            api.call('GET', '/v1/admin/', headers={'X-User': 'carol'})
+        self.assertEqual(
+            api.call('GET', '/v1/admin/', authenticate=False).status, 200)
+
+    def test_unhashable_identities(self):
+        class DictAuthentication(object):
+            def authenticate(self, request):
+                request.identity = {'user': request.headers['X-User']}
+
+        loaded = []
+
+        def load_roles(identity):
+            loaded.append(identity)
+            return ['admin'] if identity['user'] == 'alice' else []
+
+        app = Flask(__name__)
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/admin/",
+            handler=lambda request: {'admin': True},
+            authentication=DictAuthentication(),
+            authorization=Policy(roles=['admin'], load_roles=load_roles)
+        ))
+        app.register_blueprint(api)
+        client = app.test_client()
+        self.assertEqual(
+            client.get('/v1/admin/', headers={'X-User': 'alice'}).status_code,
+            200)
+        self.assertEqual(
+            client.get('/v1/admin/', headers={'X-User': 'alice'}).status_code,
+            200)
+        self.assertEqual(
+            client.get('/v1/admin/', headers={'X-User': 'bob'}).status_code,
+            403)
+        self.assertEqual(loaded, [{'user': 'alice'}, {'user': 'bob'}])
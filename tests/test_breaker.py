@@ -0,0 +1,162 @@
+import json
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.breaker import (
+    CircuitBreaker, CLOSED, OPEN, HALF_OPEN)
+from flask_rest_toolkit.exceptions import CircuitOpenException
+
+
+class DownstreamException(Exception):
+    pass
+
+
+class ConflictException(Exception):
+    pass
+
+
+class CircuitBreakerUnitTestCase(unittest.TestCase):
+    def call_failing(self, breaker):
+        with self.assertRaises(DownstreamException):
+            with breaker:
+                raise DownstreamException()
+
+    def test_opens_when_error_rate_is_reached(self):
+        breaker = CircuitBreaker(error_rate=0.5, min_calls=4)
+        with breaker:
+            pass
+        self.call_failing(breaker)
+        self.call_failing(breaker)
+        self.assertEqual(breaker.state, CLOSED)
+        self.call_failing(breaker)
+        self.assertEqual(breaker.state, OPEN)
+
+        with self.assertRaises(CircuitOpenException) as ctx:
+            with breaker:
+                pass
+        self.assertIn('Retry-After', ctx.exception.headers)
+
+    def test_half_open_closes_after_successful_trial(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10)
+        with mock.patch('flask_rest_toolkit.breaker.time') as time_mock:
+            time_mock.time.return_value = 1000
+            self.call_failing(breaker)
+            self.assertEqual(breaker.state, OPEN)
+
+            time_mock.time.return_value = 1011
+            self.assertEqual(breaker.state, HALF_OPEN)
+            breaker.before_call()
+            with self.assertRaises(CircuitOpenException):
+                breaker.before_call()
+            breaker.record_success()
+            self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_reopens_after_failed_trial(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10)
+        with mock.patch('flask_rest_toolkit.breaker.time') as time_mock:
+            time_mock.time.return_value = 1000
+            self.call_failing(breaker)
+            time_mock.time.return_value = 1011
+            self.call_failing(breaker)
+            self.assertEqual(breaker.state, OPEN)
+
+    def test_old_failures_leave_the_window(self):
+        breaker = CircuitBreaker(min_calls=2, window=10)
+        with mock.patch('flask_rest_toolkit.breaker.time') as time_mock:
+            time_mock.time.return_value = 1000
+            self.call_failing(breaker)
+            time_mock.time.return_value = 1020
+            self.call_failing(breaker)
+            self.assertEqual(breaker.state, CLOSED)
+
+    def test_unlisted_exceptions_are_not_failures(self):
+        breaker = CircuitBreaker(min_calls=1, exceptions=(IOError,))
+        self.call_failing(breaker)
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class EndpointCircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        def get_rates(request):
+            raise DownstreamException()
+
+        def fallback(request):
+            return {'rates': [], 'stale': True}
+
+        def create_booking(request):
+            raise ConflictException()
+
+        def get_booking(request):
+            raise NotFound()
+
+        self.breaker = CircuitBreaker(min_calls=2)
+        self.fallback_breaker = CircuitBreaker(min_calls=1,
+                                               fallback=fallback)
+        self.client_errors_breaker = CircuitBreaker(min_calls=1)
+
+        app = Flask(__name__)
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/rates/",
+            handler=get_rates,
+            circuit_breaker=self.breaker,
+            exceptions=[(DownstreamException, 502)]
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/cached-rates/",
+            handler=get_rates,
+            circuit_breaker=self.fallback_breaker,
+            exceptions=[(DownstreamException, 502)]
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST",
+            endpoint="/booking/",
+            handler=create_booking,
+            circuit_breaker=self.client_errors_breaker,
+            exceptions=[(ConflictException, 409)]
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/booking/",
+            handler=get_booking,
+            circuit_breaker=self.client_errors_breaker
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+
+    def test_open_breaker_returns_503(self):
+        self.assertEqual(self.client.get('/v1/rates/').status_code, 502)
+        self.assertEqual(self.client.get('/v1/rates/').status_code, 502)
+
+        resp = self.client.get('/v1/rates/')
+        self.assertEqual(resp.status_code, 503)
+        self.assertIn('Retry-After', resp.headers)
+
+    def test_open_breaker_uses_fallback(self):
+        self.assertEqual(
+            self.client.get('/v1/cached-rates/').status_code, 502)
+
+        resp = self.client.get('/v1/cached-rates/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'rates': [], 'stale': True})
+
+    def test_client_errors_are_not_failures(self):
+        for _ in range(3):
+            self.assertEqual(
+                self.client.post('/v1/booking/').status_code, 409)
+            self.assertEqual(
+                self.client.get('/v1/booking/').status_code, 404)
+        self.assertEqual(self.client_errors_breaker.state, CLOSED)
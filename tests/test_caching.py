@@ -0,0 +1,199 @@
+import json
+import time
+import threading
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.auth import ApiKeyAuth, hash_api_key
+from flask_rest_toolkit.caching import ResponseCache
+
+
+class BackendError(Exception):
+    pass
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.version = 1
+        self.fail = None
+        self.refreshed = threading.Event()
+        self.calls = []
+
+        def get_report(request):
+            self.calls.append(request.args.get('q'))
+            if self.fail is not None:
+                raise self.fail
+            self.refreshed.set()
+            return {'version': self.version}
+
+        self.cache = ResponseCache(max_age=60, stale_while_revalidate=60,
+                                   stale_if_error=300)
+        self.api = Api(version="v1")
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/report/",
+            handler=get_report,
+            exceptions=[(BackendError, 503)],
+            cache=self.cache
+        ))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def tearDown(self):
+        self.api.shutdown(timeout=1)
+
+    def get_version(self, resp):
+        return json.loads(resp.data.decode(resp.charset))['version']
+
+    def age_entries(self, seconds):
+        for key, (entry, expires) in list(self.cache.store._entries.items()):
+            stored_at, stored = entry
+            self.cache.store._entries[key] = (
+                (stored_at - seconds, stored), expires)
+
+    def test_fresh_responses_are_served_from_the_cache(self):
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.headers['Cache-Control'],
+            'public, max-age=60, stale-while-revalidate=60, '
+            'stale-if-error=300')
+        self.assertNotIn('Age', resp.headers)
+
+        self.version = 2
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(self.get_version(resp), 1)
+        self.assertEqual(resp.headers['Age'], '0')
+        self.assertEqual(len(self.calls), 1)
+
+        self.app.get('/v1/report/?q=other')
+        self.assertEqual(self.calls, [None, 'other'])
+
+    def test_stale_responses_are_refreshed_in_the_background(self):
+        self.app.get('/v1/report/')
+        self.refreshed.clear()
+        self.age_entries(90)
+        self.version = 2
+
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(self.get_version(resp), 1)
+        self.assertEqual(int(resp.headers['Age']), 90)
+
+        self.assertTrue(self.refreshed.wait(5))
+        self.api.refresh_pool.shutdown(timeout=5)
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(self.get_version(resp), 2)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.cache.metrics['refreshes'], 1)
+
+    def test_stale_if_error(self):
+        self.app.get('/v1/report/')
+        self.age_entries(200)
+        self.fail = BackendError()
+
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.get_version(resp), 1)
+        self.assertEqual(self.cache.metrics['errors_served_stale'], 1)
+
+        self.fail = ValueError()
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(self.get_version(resp), 1)
+
+        self.age_entries(300)
+        self.fail = BackendError()
+        self.assertEqual(self.app.get('/v1/report/').status_code, 503)
+
+    def test_errors_are_not_cached(self):
+        self.fail = BackendError()
+        self.assertEqual(self.app.get('/v1/report/').status_code, 503)
+        self.fail = None
+        self.assertEqual(self.app.get('/v1/report/').status_code, 200)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_clients_are_cached_separately(self):
+        resp = self.app.get('/v1/report/',
+                            headers={'Authorization': 'Bearer a'})
+        self.assertTrue(resp.headers['Cache-Control'].startswith('private'))
+        self.version = 2
+        resp = self.app.get('/v1/report/',
+                            headers={'Authorization': 'Bearer b'})
+        self.assertEqual(self.get_version(resp), 2)
+
+
+class HandlerTimeoutTestCase(unittest.TestCase):
+    def test_timed_out_requests_get_the_stale_response(self):
+        app = Flask(__name__)
+        delays = [0, 0.1]
+
+        def get_slow(request):
+            time.sleep(delays.pop(0))
+            request.deadline.check()
+            return {'slow': True}
+
+        cache = ResponseCache(max_age=0.01, stale_if_error=60)
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/slow/", handler=get_slow,
+            timeout=0.05, cache=cache))
+        app.register_blueprint(api)
+        client = app.test_client()
+
+        self.assertEqual(client.get('/v1/slow/').status_code, 200)
+        time.sleep(0.02)
+        resp = client.get('/v1/slow/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Age', resp.headers)
+        self.assertEqual(cache.metrics['errors_served_stale'], 1)
+        api.shutdown(timeout=1)
+
+
+class AuthenticatedResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.refreshed = threading.Event()
+        self.tenants = []
+
+        def get_usage(request):
+            self.tenants.append(request.tenant)
+            if len(self.tenants) > 1:
+                self.refreshed.set()
+            return {'tenant': request.tenant}
+
+        keys = {hash_api_key('key-1'): {'tenant': 'acme'}}
+        self.cache = ResponseCache(max_age=60, stale_while_revalidate=60)
+        self.api = Api(version="v1")
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/usage/",
+            handler=get_usage,
+            authentication=ApiKeyAuth(lambda: keys),
+            cache=self.cache
+        ))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def tearDown(self):
+        self.api.shutdown(timeout=1)
+
+    def test_refreshes_keep_the_authentication(self):
+        headers = {'X-Api-Key': 'key-1'}
+        self.assertEqual(
+            self.app.get('/v1/usage/', headers=headers).status_code, 200)
+        for key, (entry, expires) in list(self.cache.store._entries.items()):
+            stored_at, stored = entry
+            self.cache.store._entries[key] = ((stored_at - 90, stored),
+                                              expires)
+
+        self.assertEqual(
+            self.app.get('/v1/usage/', headers=headers).status_code, 200)
+        self.assertTrue(self.refreshed.wait(5))
+        self.api.refresh_pool.shutdown(timeout=5)
+        self.assertEqual(self.tenants, ['acme', 'acme'])
+        self.assertEqual(self.cache.metrics['refreshes'], 1)
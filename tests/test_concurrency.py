@@ -0,0 +1,183 @@
+import time
+import unittest
+import threading
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.concurrency import ConcurrencyLimiter, Deadline
+from flask_rest_toolkit.exceptions import (
+    ServiceOverloadedException, HandlerTimeoutException)
+
+
+class ConcurrencyLimiterTestCase(unittest.TestCase):
+    def test_rejects_when_limit_reached_and_no_queue(self):
+        limiter = ConcurrencyLimiter(1, retry_after=5)
+        limiter.acquire()
+        with self.assertRaises(ServiceOverloadedException) as ctx:
+            limiter.acquire()
+        self.assertEqual(ctx.exception.headers, {'Retry-After': '5'})
+        self.assertEqual(limiter.rejected, 1)
+
+        limiter.release()
+        limiter.acquire()
+        self.assertEqual(limiter.active, 1)
+
+    def test_waiter_gets_slot_when_released(self):
+        limiter = ConcurrencyLimiter(1, max_queue=1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        self.assertFalse(acquired.is_set())
+        self.assertEqual(limiter.waiting, 1)
+
+        limiter.release()
+        thread.join(1)
+        self.assertTrue(acquired.is_set())
+
+    def test_waiter_gives_up_when_deadline_expires(self):
+        limiter = ConcurrencyLimiter(1, max_queue=1)
+        limiter.acquire()
+        with self.assertRaises(ServiceOverloadedException):
+            limiter.acquire(Deadline(0.05))
+        self.assertEqual(limiter.waiting, 0)
+
+    def test_deadline_check(self):
+        deadline = Deadline(0)
+        self.assertTrue(deadline.expired)
+        with self.assertRaises(HandlerTimeoutException):
+            deadline.check()
+
+        deadline = Deadline(60)
+        self.assertFalse(deadline.expired)
+        deadline.check()
+
+
+class EndpointConcurrencyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        app = Flask(__name__)
+
+        def slow_task(request):
+            self.started.set()
+            self.finish.wait(1)
+            return {'slow': True}
+
+        def fast_task(request):
+            return {'fast': True}
+
+        # v1 limits one endpoint, v2 limits the whole Api.
+        api_v1 = Api(version="v1", retry_after=3)
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/slow/",
+            handler=slow_task,
+            max_concurrency=1
+        ))
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/fast/",
+            handler=fast_task
+        ))
+        api_v2 = Api(version="v2", max_concurrency=1)
+        api_v2.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/slow/",
+            handler=slow_task
+        ))
+        api_v2.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/fast/",
+            handler=fast_task
+        ))
+        app.register_blueprint(api_v1)
+        app.register_blueprint(api_v2)
+        app.config['TESTING'] = True
+        self.app = app
+
+    def run_in_background(self, url):
+        responses = []
+
+        def target():
+            responses.append(self.app.test_client().get(url))
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        self.started.wait(1)
+        return thread, responses
+
+    def test_endpoint_limit_rejects_with_retry_after(self):
+        thread, responses = self.run_in_background('/v1/slow/')
+
+        resp = self.app.test_client().get('/v1/slow/')
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers['Retry-After'], '3')
+
+        resp = self.app.test_client().get('/v1/fast/')
+        self.assertEqual(resp.status_code, 200)
+
+        self.finish.set()
+        thread.join(1)
+        self.assertEqual(responses[0].status_code, 200)
+
+    def test_api_limit_is_shared_by_endpoints(self):
+        thread, responses = self.run_in_background('/v2/slow/')
+
+        resp = self.app.test_client().get('/v2/fast/')
+        self.assertEqual(resp.status_code, 503)
+
+        self.finish.set()
+        thread.join(1)
+        resp = self.app.test_client().get('/v2/fast/')
+        self.assertEqual(resp.status_code, 200)
+
+
+class TimeoutTestCase(unittest.TestCase):
+    def test_handler_checking_deadline_returns_504(self):
+        app = Flask(__name__)
+
+        def get_task(request):
+            time.sleep(0.05)
+            request.deadline.check()
+            return {}
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_task,
+            timeout=0.01
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+
+        resp = app.test_client().get('/v1/task/')
+        self.assertEqual(resp.status_code, 504)
+
+    def test_timeout_status_can_be_overridden_by_endpoint(self):
+        app = Flask(__name__)
+
+        def get_task(request):
+            raise HandlerTimeoutException()
+
+        api = Api(version="v1", timeout=10)
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_task,
+            exceptions=[(HandlerTimeoutException, 408)]
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+
+        resp = app.test_client().get('/v1/task/')
+        self.assertEqual(resp.status_code, 408)
@@ -0,0 +1,165 @@
+import re
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from flask import Flask
+from werkzeug.exceptions import Unauthorized
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.cors import CORS
+from flask_rest_toolkit.endpoint import ApiEndpoint
+
+
+class CORSConfigTestCase(unittest.TestCase):
+    def test_origins(self):
+        cors = CORS(origins=['https://app.example.com',
+                             'https://*.preview.example.com',
+                             re.compile(r'http://localhost:\d+$')])
+        self.assertEqual(cors.exact_origins, set(['https://app.example.com']))
+        self.assertTrue(cors.is_allowed('https://app.example.com'))
+        self.assertTrue(cors.is_allowed('https://pr-1.preview.example.com'))
+        self.assertTrue(cors.is_allowed('http://localhost:3000'))
+        self.assertFalse(cors.is_allowed('https://evil.com'))
+        self.assertFalse(cors.is_allowed(
+            'https://preview.example.com.evil.com'))
+
+    def test_wildcards_match_a_single_label(self):
+        cors = CORS(origins=['https://*.example.com'])
+        self.assertTrue(cors.is_allowed('https://app.example.com'))
+        self.assertFalse(cors.is_allowed('https://evil.com:@x.example.com'))
+        self.assertFalse(cors.is_allowed('https://evil.com@x.example.com'))
+        self.assertFalse(cors.is_allowed('https://a.b.example.com'))
+        self.assertFalse(cors.is_allowed('https://.example.com'))
+
+    def test_compiled_patterns_keep_their_flags(self):
+        cors = CORS(origins=[re.compile(r'https://APP\.example\.com$', re.I),
+                             'https://*.example.org'])
+        self.assertTrue(cors.is_allowed('https://app.example.com'))
+        self.assertTrue(cors.is_allowed('https://www.example.org'))
+
+    def test_any_origin(self):
+        self.assertTrue(CORS().is_allowed('https://whatever.com'))
+        self.assertTrue(CORS().static)
+        self.assertFalse(CORS(allow_credentials=True).static)
+
+
+class CORSEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.authenticate = mock.MagicMock(side_effect=Unauthorized())
+        self.handler = mock.MagicMock(return_value=[])
+
+        class Authentication(object):
+            authenticate = self.authenticate
+
+        def get_tasks(request):
+            return self.handler(request)
+
+        def post_task(request):
+            return {}, 201
+
+        api = Api(version="v1", cors=CORS(
+            origins=['https://app.example.com'], allow_credentials=True,
+            expose_headers=['X-Total'], max_age=3600))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=get_tasks,
+            authentication=Authentication()))
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST", endpoint="/task/", handler=post_task))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/public/", handler=get_tasks,
+            cors=CORS(expose_headers=['X-Total'])))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/private/", handler=get_tasks,
+            cors=False))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def preflight(self, path, origin='https://app.example.com'):
+        return self.app.open(path, method='OPTIONS', headers={
+            'Origin': origin,
+            'Access-Control-Request-Method': 'POST',
+            'Access-Control-Request-Headers': 'Content-Type, X-Token',
+        })
+
+    def test_preflight_skips_auth_and_handler(self):
+        resp = self.preflight('/v1/task/')
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(resp.headers['Access-Control-Allow-Origin'],
+                         'https://app.example.com')
+        self.assertEqual(resp.headers['Access-Control-Allow-Methods'],
+                         'GET, HEAD, OPTIONS, POST')
+        self.assertEqual(resp.headers['Access-Control-Allow-Headers'],
+                         'Content-Type, X-Token')
+        self.assertEqual(resp.headers['Access-Control-Max-Age'], '3600')
+        self.assertEqual(
+            resp.headers['Access-Control-Allow-Credentials'], 'true')
+        self.assertEqual(self.authenticate.call_count, 0)
+        self.assertEqual(self.handler.call_count, 0)
+
+    def test_preflight_headers_are_cached(self):
+        self.preflight('/v1/task/')
+        with mock.patch.object(CORS, '_preflight_headers') as build:
+            resp = self.preflight('/v1/task/')
+        self.assertEqual(build.call_count, 0)
+        self.assertEqual(resp.status_code, 204)
+
+    def test_preflight_from_unknown_origin(self):
+        resp = self.preflight('/v1/task/', origin='https://evil.com')
+        self.assertNotIn('Access-Control-Allow-Origin', resp.headers)
+
+    def test_actual_responses(self):
+        resp = self.app.post('/v1/task/',
+                             headers={'Origin': 'https://app.example.com'})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.headers['Access-Control-Allow-Origin'],
+                         'https://app.example.com')
+        self.assertEqual(resp.headers['Access-Control-Expose-Headers'],
+                         'X-Total')
+        self.assertEqual(resp.headers['Vary'], 'Origin')
+
+        resp = self.app.get('/v1/task/',
+                            headers={'Origin': 'https://app.example.com'})
+        self.assertEqual(resp.status_code, 401)
+        self.assertNotIn('Access-Control-Allow-Origin', resp.headers)
+
+        resp = self.app.post('/v1/task/', headers={'Origin': 'https://x.com'})
+        self.assertNotIn('Access-Control-Allow-Origin', resp.headers)
+
+    def test_endpoint_configuration(self):
+        resp = self.app.get('/v1/public/', headers={'Origin': 'https://x.com'})
+        self.assertEqual(resp.headers.getlist('Access-Control-Allow-Origin'),
+                         ['*'])
+        self.assertEqual(resp.headers['Access-Control-Expose-Headers'],
+                         'X-Total')
+
+        resp = self.app.get('/v1/private/',
+                            headers={'Origin': 'https://app.example.com'})
+        self.assertNotIn('Access-Control-Allow-Origin', resp.headers)
+        resp = self.preflight('/v1/private/')
+        self.assertNotIn('Access-Control-Allow-Origin', resp.headers)
+
+    def test_route_table_dispatch(self):
+        app = Flask(__name__)
+        api = Api(version="v2", route_table=True, cors=CORS())
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=lambda req: []))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/other/", handler=lambda req: [],
+            cors=False))
+        app.register_blueprint(api)
+        client = app.test_client()
+
+        resp = client.open('/v2/task/', method='OPTIONS', headers={
+            'Origin': 'https://x.com', 'Access-Control-Request-Method': 'GET'})
+        self.assertEqual(resp.status_code, 204)
+        self.assertEqual(resp.headers['Access-Control-Allow-Origin'], '*')
+
+        resp = client.open('/v2/other/', method='OPTIONS')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['Allow'], 'GET, OPTIONS')
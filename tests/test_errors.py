@@ -104,3 +104,24 @@ class ExceptionDataTestCase(unittest.TestCase):
 
         data = json.loads(resp.data.decode(resp.charset))
         self.assertEqual(data, self.conflicted_user)
+
+
+class ExceptionTupleTestCase(unittest.TestCase):
+    def test_exceptions_can_be_a_tuple(self):
+        app = Flask(__name__)
+
+        def raises_exception(request):
+            raise DummyException()
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/dummy-exception",
+            handler=raises_exception,
+            exceptions=((DummyException, 409),)
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+
+        resp = app.test_client().get('/v1/dummy-exception')
+        self.assertEqual(resp.status_code, 409)
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.files import File, Blob
+
+
+class FileResponseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'report.csv')
+        self.content = b''.join(
+            'line {}\n'.format(i).encode('ascii') for i in range(1000))
+        with open(self.path, 'wb') as fp:
+            fp.write(self.content)
+
+        app = Flask(__name__)
+
+        def get_report(request):
+            return File(self.path, chunk_size=100)
+
+        def get_blob(request):
+            return Blob(self.content, content_type='text/plain',
+                        filename='blob.txt', as_attachment=True)
+
+        def get_created(request):
+            return File(self.path), 201, {'X-Report': 'yes'}
+
+        def get_named(request, name):
+            return Blob(self.content, filename=name)
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/report/", handler=get_report))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/blob/", handler=get_blob))
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST", endpoint="/report/", handler=get_created))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/named/<name>", handler=get_named))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_full_file(self):
+        resp = self.app.get('/v1/report/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, self.content)
+        self.assertEqual(resp.headers['Content-Type'], 'text/csv')
+        self.assertEqual(resp.headers['Content-Length'],
+                         str(len(self.content)))
+        self.assertEqual(resp.headers['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', resp.headers)
+        self.assertIn('Last-Modified', resp.headers)
+
+    def test_status_and_headers_from_handler(self):
+        resp = self.app.post('/v1/report/')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.headers['X-Report'], 'yes')
+        self.assertEqual(resp.data, self.content)
+
+    def test_range(self):
+        resp = self.app.get('/v1/report/', headers={'Range': 'bytes=10-249'})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, self.content[10:250])
+        self.assertEqual(resp.headers['Content-Range'],
+                         'bytes 10-249/{}'.format(len(self.content)))
+
+        resp = self.app.get('/v1/blob/', headers={'Range': 'bytes=-5'})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, self.content[-5:])
+
+    def test_unsatisfiable_range(self):
+        resp = self.app.get('/v1/report/',
+                            headers={'Range': 'bytes=100000-'})
+        self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp.headers['Content-Range'],
+                         'bytes */{}'.format(len(self.content)))
+
+    def test_if_range_with_stale_etag_returns_full_content(self):
+        resp = self.app.get('/v1/report/', headers={
+            'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, self.content)
+
+    def test_conditional_requests(self):
+        etag = self.app.get('/v1/blob/').headers['ETag']
+        resp = self.app.get('/v1/blob/', headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b'')
+
+        last_modified = self.app.get('/v1/report/').headers['Last-Modified']
+        resp = self.app.get('/v1/report/',
+                            headers={'If-Modified-Since': last_modified})
+        self.assertEqual(resp.status_code, 304)
+
+    def test_blob_headers(self):
+        resp = self.app.get('/v1/blob/')
+        self.assertEqual(resp.data, self.content)
+        self.assertEqual(resp.headers['Content-Type'], 'text/plain')
+        self.assertEqual(resp.headers['Content-Disposition'],
+                         'attachment; filename="blob.txt"')
+
+    def test_filenames_are_quoted(self):
+        resp = self.app.get('/v1/named/my%22report%22.csv')
+        self.assertEqual(resp.headers['Content-Disposition'],
+                         'inline; filename="my\\"report\\".csv"')
+
+        resp = self.app.get('/v1/named/informe-a%C3%B1o.csv')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.headers['Content-Disposition'],
+            'inline; filename="informe-ano.csv"; '
+            "filename*=UTF-8''informe-a%C3%B1o.csv")
+
+    def test_file_wrapper_is_used_when_available(self):
+        calls = []
+
+        def file_wrapper(fileobj, chunk_size):
+            calls.append(chunk_size)
+            return iter(lambda: fileobj.read(chunk_size), b'')
+
+        resp = self.app.get('/v1/report/',
+                            environ_base={'wsgi.file_wrapper': file_wrapper})
+        self.assertEqual(resp.data, self.content)
+        self.assertEqual(calls, [100])
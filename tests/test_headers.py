@@ -0,0 +1,87 @@
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.response import HeaderBlock
+
+
+class HeaderBlockTestCase(unittest.TestCase):
+    def test_later_sets_override_earlier_ones(self):
+        block = HeaderBlock([('Content-Type', 'application/json')],
+                            {'X-API-Version': 'v1',
+                             'Cache-Control': 'no-store'},
+                            {'Cache-Control': 'max-age=60'})
+        headers = block.headers()
+        self.assertEqual(headers['Cache-Control'], 'max-age=60')
+        self.assertEqual(headers['X-API-Version'], 'v1')
+        self.assertEqual(len(headers), 3)
+
+    def test_each_response_gets_its_own_copy(self):
+        block = HeaderBlock([('Content-Type', 'application/json')])
+        headers = block.headers('text/plain')
+        headers['X-Extra'] = '1'
+
+        self.assertEqual(headers['Content-Type'], 'text/plain')
+        self.assertEqual(dict(block.headers()),
+                         {'Content-Type': 'application/json'})
+
+    def test_invalid_headers_are_rejected_when_built(self):
+        with self.assertRaises(ValueError):
+            HeaderBlock({'X-Bad': 'a\nb'})
+
+    def test_invalid_headers_fail_at_registration(self):
+        api = Api(version="v1", headers={'X-Bad': 'a\nb'})
+        with self.assertRaises(ValueError):
+            api.register_endpoint(ApiEndpoint(
+                http_method="GET", endpoint="/tasks/",
+                handler=lambda request: []))
+
+        api = Api(version="v1")
+        with self.assertRaises(ValueError):
+            api.register_endpoint(ApiEndpoint(
+                http_method="GET", endpoint="/tasks/",
+                handler='tests.lazy_handlers.get_tasks',
+                headers={'X-Bad': 'a\nb'}))
+
+
+class StaticHeadersTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            return []
+
+        def get_task(request):
+            return {}, 200, {'Cache-Control': 'no-cache', 'X-Task': '1'}
+
+        api = Api(version="v1", headers={'X-API-Version': 'v1'})
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            headers={'Cache-Control': 'max-age=60'}
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/1",
+            handler=get_task,
+            headers={'Cache-Control': 'max-age=60'}
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_api_and_endpoint_headers_are_sent(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.headers['Content-Type'], 'application/json')
+        self.assertEqual(resp.headers['X-API-Version'], 'v1')
+        self.assertEqual(resp.headers['Cache-Control'], 'max-age=60')
+        self.assertEqual(resp.headers['Content-Length'], '2')
+
+    def test_handler_headers_override_static_headers(self):
+        resp = self.app.get('/v1/task/1')
+        self.assertEqual(resp.headers.getlist('Cache-Control'), ['no-cache'])
+        self.assertEqual(resp.headers['X-Task'], '1')
+        self.assertEqual(resp.headers['X-API-Version'], 'v1')
@@ -0,0 +1,219 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import Unauthorized
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.idempotency import Idempotency
+from flask_rest_toolkit.stores import MemoryStore, SqliteStore
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class MemoryStoreTestCase(unittest.TestCase):
+    def test_lru_eviction(self):
+        store = MemoryStore(max_entries=2)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.get('a')
+        store.set('c', 3)
+        self.assertEqual(store.get('a'), 1)
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(len(store), 2)
+
+    def test_ttl(self):
+        store = MemoryStore(ttl=10)
+        with mock.patch('flask_rest_toolkit.stores.time') as time_mock:
+            time_mock.time.return_value = 1000
+            store.set('a', 1)
+            store.set('b', 2, ttl=100)
+            time_mock.time.return_value = 1011
+            self.assertIsNone(store.get('a'))
+            self.assertEqual(store.get('b'), 2)
+
+    def test_add(self):
+        store = MemoryStore(ttl=10)
+        with mock.patch('flask_rest_toolkit.stores.time') as time_mock:
+            time_mock.time.return_value = 1000
+            self.assertTrue(store.add('a', 1))
+            self.assertFalse(store.add('a', 2))
+            self.assertEqual(store.get('a'), 1)
+            time_mock.time.return_value = 1011
+            self.assertTrue(store.add('a', 3))
+            self.assertEqual(store.get('a'), 3)
+
+
+class SqliteStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'store.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_values_are_shared_between_instances(self):
+        SqliteStore(self.path).set('a', (201, [('X', '1')], b'{}'))
+        store = SqliteStore(self.path)
+        self.assertEqual(store.get('a'), (201, [('X', '1')], b'{}'))
+        store.delete('a')
+        self.assertIsNone(store.get('a'))
+
+    def test_expired_values(self):
+        store = SqliteStore(self.path, ttl=10)
+        store.set('a', 1)
+        store.set('b', 1, ttl=-1)
+        self.assertEqual(store.get('a'), 1)
+        self.assertIsNone(store.get('b'))
+
+    def test_add(self):
+        store = SqliteStore(self.path)
+        self.assertTrue(store.add('a', 1))
+        self.assertFalse(SqliteStore(self.path).add('a', 2))
+        self.assertEqual(store.get('a'), 1)
+        store.set('b', 1, ttl=-1)
+        self.assertTrue(store.add('b', 2))
+        self.assertEqual(store.get('b'), 2)
+
+
+class TokenAuthentication(object):
+    TOKENS = {'alice-token': 'alice', 'bob-token': 'bob'}
+
+    def authenticate(self, request):
+        user = self.TOKENS.get(request.headers.get('X-Token'))
+        if user is None:
+            raise Unauthorized()
+        request.identity = user
+
+
+class IdempotencyTestCase(unittest.TestCase):
+    def test_response_stored_while_registering_is_replayed(self):
+        class RacyStore(MemoryStore):
+            lookups = 0
+
+            def get(self, key):
+                # The first lookup happens before the other request
+                # stores its response.
+                self.lookups += 1
+                if self.lookups == 1:
+                    return None
+                return super(RacyStore, self).get(key)
+
+        idempotency = Idempotency(store=RacyStore())
+        idempotency.store.set(
+            'key', ('fingerprint', (201, [('X-Task', 'created')], b'{}')))
+        execute = mock.MagicMock()
+
+        resp = idempotency.run('key', execute, 'fingerprint')
+        self.assertFalse(execute.called)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.headers['Idempotent-Replayed'], 'true')
+
+
+class IdempotentEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.tasks = []
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        self.finish.set()
+
+        def post_task(request):
+            self.started.set()
+            self.finish.wait(1)
+            self.tasks.append(request.json['task'])
+            return {'id': len(self.tasks)}, 201, {'X-Task': 'created'}
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST",
+            endpoint="/task/",
+            handler=post_task,
+            idempotency=Idempotency(wait_timeout=1)
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST",
+            endpoint="/private-task/",
+            handler=post_task,
+            authentication=TokenAuthentication(),
+            idempotency=Idempotency(wait_timeout=1)
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app
+
+    def post(self, key=None, task='Laundry', url='/v1/task/', **headers):
+        if key:
+            headers['Idempotency-Key'] = key
+        return self.app.test_client().post(
+            url, content_type='application/json',
+            data=json.dumps({'task': task}), headers=headers)
+
+    def test_retries_are_replayed(self):
+        first = self.post('abc')
+        second = self.post('abc')
+
+        self.assertEqual(self.tasks, ['Laundry'])
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.headers['X-Task'], 'created')
+        self.assertEqual(second.headers['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+
+    def test_requests_without_key_or_with_other_keys_run(self):
+        self.post()
+        self.post()
+        self.post('abc')
+        self.post('def')
+        self.post('abc', Authorization='Bearer other-client')
+        self.assertEqual(len(self.tasks), 5)
+
+    def test_concurrent_duplicate_waits_for_the_first_run(self):
+        self.finish.clear()
+        responses = []
+        thread = threading.Thread(
+            target=lambda: responses.append(self.post('abc')))
+        thread.start()
+        self.started.wait(1)
+
+        timer = threading.Timer(0.05, self.finish.set)
+        timer.start()
+        resp = self.post('abc')
+        thread.join(1)
+
+        self.assertEqual(self.tasks, ['Laundry'])
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(responses[0].data, resp.data)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.post('abc')
+        resp = self.post('abc', task='Dishes')
+
+        self.assertEqual(resp.status_code, 422)
+        self.assertEqual(self.tasks, ['Laundry'])
+
+    def test_requests_are_authenticated_before_replaying(self):
+        url = '/v1/private-task/'
+        first = self.post('abc', url=url, **{'X-Token': 'alice-token'})
+        self.assertEqual(first.status_code, 201)
+
+        resp = self.post('abc', url=url)
+        self.assertEqual(resp.status_code, 401)
+
+        resp = self.post('abc', url=url, **{'X-Token': 'bob-token'})
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', resp.headers)
+        self.assertEqual(self.tasks, ['Laundry', 'Laundry'])
+
+        resp = self.post('abc', url=url, **{'X-Token': 'alice-token'})
+        self.assertEqual(resp.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(len(self.tasks), 2)
@@ -0,0 +1,157 @@
+import json
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import NotFound, MethodNotAllowed, Unauthorized
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+
+
+class TaskNotFound(Exception):
+    data = {'error': 'No such task'}
+
+
+class Task(object):
+    def __init__(self, id, task):
+        self.id = id
+        self.task = task
+
+
+class TokenAuthentication(object):
+    def authenticate(self, request):
+        if request.headers.get('Authorization') != 'Bearer secret':
+            raise Unauthorized()
+        request.identity = 'client-7'
+
+
+class TaggingMiddleware(object):
+    def process_request(self, request, *args, **kwargs):
+        request.tagged = True
+
+
+class InternalCallTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.tasks = [Task(1, 'Do the laundry'), Task(2, 'Do the dishes')]
+        self.calls = []
+
+        def get_task(request, task_id):
+            self.calls.append(
+                (getattr(request, 'identity', None), request.tagged))
+            for task in self.tasks:
+                if task.id == task_id:
+                    return task
+            raise TaskNotFound()
+
+        def post_task(request):
+            task = Task(len(self.tasks) + 1, request.json['task'])
+            self.tasks.append(task)
+            request.background_tasks.add(self.calls.append, 'created')
+            return task, 201, {'Location': '/v1/task/{}'.format(task.id)}
+
+        def get_summary(request):
+            first = request.api.call('GET', '/v1/task/1', parent=request)
+            second = request.api.call('GET', '/v1/task/2', parent=request,
+                                      authenticate=False)
+            return {'tasks': [first.data.task, second.data.task]}
+
+        self.api = Api(version="v1")
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/<int:task_id>",
+            handler=get_task,
+            authentication=TokenAuthentication(),
+            middleware=[TaggingMiddleware],
+            exceptions=[(TaskNotFound, 404)]
+        ))
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="POST", endpoint="/task/", handler=post_task))
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/summary/",
+            handler=get_summary,
+            authentication=TokenAuthentication()
+        ))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def tearDown(self):
+        self.api.shutdown(timeout=1)
+
+    def test_native_result(self):
+        result = self.api.call('GET', '/v1/task/2',
+                               headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(result.status, 200)
+        self.assertIs(result.data, self.tasks[1])
+        self.assertEqual(self.calls, [('client-7', True)])
+
+    def test_body_is_passed_as_is(self):
+        result = self.api.call('POST', '/v1/task/', body={'task': 'Cook'})
+        self.assertEqual(result.status, 201)
+        self.assertEqual(result.data.task, 'Cook')
+        self.assertEqual(result.headers['Location'], '/v1/task/3')
+
+        self.api.shutdown(timeout=1)
+        self.assertEqual(self.calls, ['created'])
+
+    def test_raw_body(self):
+        result = self.api.call('POST', '/v1/task/',
+                               body=json.dumps({'task': 'Cook'}),
+                               headers={'Content-Type': 'application/json'})
+        self.assertEqual(result.data.task, 'Cook')
+
+    def test_authentication_runs_by_default(self):
+        with self.assertRaises(Unauthorized):
+            self.api.call('GET', '/v1/task/1')
+
+        result = self.api.call('GET', '/v1/task/1', authenticate=False)
+        self.assertEqual(result.data.id, 1)
+        self.assertEqual(self.calls, [(None, True)])
+
+    def test_mapped_exceptions(self):
+        result = self.api.call('GET', '/v1/task/9',
+                               headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(result.status, 404)
+        self.assertEqual(result.data, {'error': 'No such task'})
+
+    def test_unknown_paths(self):
+        with self.assertRaises(NotFound):
+            self.api.call('GET', '/v1/unknown/')
+
+    def test_calls_inherit_the_parent_request(self):
+        resp = self.app.get('/v1/summary/',
+                            headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'tasks': ['Do the laundry', 'Do the dishes']})
+        self.assertEqual(self.calls,
+                         [('client-7', True), ('client-7', True)])
+
+    def test_unsupported_methods(self):
+        with self.assertRaises(MethodNotAllowed):
+            self.api.call('DELETE', '/v1/task/1')
+
+    def test_rules_the_route_table_rejects(self):
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/f/<path:path>/edit",
+            handler=lambda request, path: {'path': path}))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/greeting/<any(en,es):lang>",
+            handler=lambda request, lang: {'lang': lang}))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/ping",
+            handler=lambda request: {'pong': True}))
+        try:
+            self.assertEqual(api.call('GET', '/v1/ping').data,
+                             {'pong': True})
+            self.assertEqual(api.call('GET', '/v1/f/a/b/edit').data,
+                             {'path': 'a/b'})
+            self.assertEqual(api.call('GET', '/v1/greeting/es').data,
+                             {'lang': 'es'})
+            with self.assertRaises(NotFound):
+                api.call('GET', '/v1/greeting/fr')
+        finally:
+            api.shutdown(timeout=1)
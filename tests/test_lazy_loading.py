@@ -0,0 +1,71 @@
+import sys
+import json
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.utils import import_string
+
+
+class ImportStringTestCase(unittest.TestCase):
+    def test_colon_and_dotted_paths(self):
+        obj, elapsed = import_string('json:dumps')
+        self.assertIs(obj, json.dumps)
+        self.assertTrue(elapsed >= 0)
+
+        obj, _ = import_string('os.path.join')
+        self.assertIs(obj, __import__('os').path.join)
+
+    def test_invalid_paths(self):
+        with self.assertRaises(ImportError):
+            import_string('json')
+        with self.assertRaises(ImportError):
+            import_string('json:does_not_exist')
+
+
+class LazyEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        sys.modules.pop('lazy_handlers', None)
+        app = Flask(__name__)
+
+        self.api = Api(version="v1")
+        self.endpoint = ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler="lazy_handlers:get_tasks",
+            middleware=["lazy_handlers:UserMiddleware"],
+            authentication="lazy_handlers:HeaderAuthentication"
+        )
+        self.api.register_endpoint(self.endpoint)
+        app.register_blueprint(self.api)
+
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_nothing_is_imported_at_registration(self):
+        self.assertNotIn('lazy_handlers', sys.modules)
+        self.assertFalse(self.endpoint.resolved)
+        self.assertEqual(self.endpoint.handler_name, 'get_tasks')
+
+    def test_resolved_on_first_request(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 401)
+        self.assertTrue(self.endpoint.resolved)
+
+        resp = self.app.get('/v1/task/', headers={'X-Token': 'xxx'})
+        self.assertEqual(resp.status_code, 200)
+        data = json.loads(resp.data.decode(resp.charset))
+        self.assertEqual(data[0]['user'], 'john')
+
+    def test_warm_up_report(self):
+        report = self.api.warm_up()
+        self.assertIn('lazy_handlers', sys.modules)
+        self.assertEqual(
+            sorted(path for path, _ in report),
+            ['lazy_handlers:HeaderAuthentication',
+             'lazy_handlers:UserMiddleware',
+             'lazy_handlers:get_tasks'])
+        self.assertEqual(report, sorted(
+            report, key=lambda timing: timing[1], reverse=True))
@@ -0,0 +1,94 @@
+import json
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.loaders import DataLoader
+
+
+class DataLoaderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+        def load_users(ids):
+            self.batches.append(list(ids))
+            return {id: {'id': id} for id in ids if id < 100}
+
+        self.loader = DataLoader(load_users)
+
+    def test_loads_are_batched_and_memoized(self):
+        deferred = [self.loader.load(id) for id in [1, 2, 1, 3]]
+        self.assertEqual(self.batches, [])
+        self.assertEqual([d.value['id'] for d in deferred], [1, 2, 1, 3])
+        self.assertEqual(self.batches, [[1, 2, 3]])
+
+        self.assertEqual(self.loader.load(2).value, {'id': 2})
+        self.assertEqual(self.loader.load_many([3, 4, 100]),
+                         [{'id': 3}, {'id': 4}, None])
+        self.assertEqual(self.batches, [[1, 2, 3], [4, 100]])
+
+    def test_max_batch_size(self):
+        loader = DataLoader(lambda ids: [id * 2 for id in ids],
+                            max_batch_size=2)
+        self.assertEqual(loader.load_many([1, 2, 3]), [2, 4, 6])
+        self.assertEqual(loader.batches, 2)
+
+    def test_batch_functions_must_return_a_value_per_key(self):
+        loader = DataLoader(lambda ids: [])
+        with self.assertRaises(ValueError):
+            loader.load(1).value
+
+    def test_prime_and_clear(self):
+        self.loader.prime(1, {'id': 1, 'primed': True})
+        self.assertTrue(self.loader.load(1).value['primed'])
+        self.loader.clear(1)
+        self.assertNotIn('primed', self.loader.load(1).value)
+        self.assertEqual(self.batches, [[1]])
+
+
+class RequestLoadersTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.queries = []
+        tasks = [{'id': id, 'author_id': id % 3} for id in range(1, 7)]
+
+        def load_authors(ids):
+            self.queries.append(sorted(ids))
+            return [{'id': id, 'name': 'user-{}'.format(id)} for id in ids]
+
+        def get_tasks(request):
+            authors = request.loaders['authors']
+            pending = [(task, authors.load(task['author_id']))
+                       for task in tasks]
+            return [{'id': task['id'], 'author': author.value['name']}
+                    for task, author in pending]
+
+        def get_summary(request):
+            request.loaders['authors'].load_many([0, 1])
+            tasks = request.api.call('GET', '/v1/task/', parent=request)
+            return {'count': len(tasks.data)}
+
+        self.api = Api(version="v1")
+        self.api.register_loader('authors', load_authors)
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=get_tasks))
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/summary/", handler=get_summary))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_one_query_per_request(self):
+        resp = self.app.get('/v1/task/')
+        data = json.loads(resp.data.decode(resp.charset))
+        self.assertEqual(data[0], {'id': 1, 'author': 'user-1'})
+        self.assertEqual(self.queries, [[0, 1, 2]])
+
+        self.app.get('/v1/task/')
+        self.assertEqual(self.queries, [[0, 1, 2], [0, 1, 2]])
+
+    def test_internal_calls_share_the_loaders(self):
+        self.app.get('/v1/summary/')
+        self.assertEqual(self.queries, [[0, 1], [2]])
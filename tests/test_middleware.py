@@ -318,3 +318,137 @@ class ExceptionMiddlewareTestCase(unittest.TestCase):
 
         resp = self.app.get('/v1/task/', content_type='application/json')
         self.assertEqual(resp.status_code, 409)
+
+
+class TimingHeaderMiddleware(object):
+    def process_request(self, request):
+        request.calls = ['timing']
+
+    def process_response(self, request, response):
+        response.headers['X-Order'] = ','.join(request.calls)
+        return response
+
+
+class CacheMiddleware(object):
+    def process_request(self, request):
+        request.calls.append('cache')
+
+    def process_response(self, request, response):
+        request.calls.append('cache-out')
+        return response
+
+
+class RecoverMiddleware(object):
+    def process_request(self, request):
+        pass
+
+    def process_exception(self, request, exc):
+        if isinstance(exc, CustomException):
+            return {'recovered': True}, 200
+
+
+class ResponseMiddlewareTestCase(unittest.TestCase):
+    def test_process_response_runs_in_reverse_order(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            request.calls.append('handler')
+            return []
+
+        api_201409 = Api(version="v1")
+        api_201409.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            middleware=[
+                TimingHeaderMiddleware,
+                CacheMiddleware
+            ]
+        ))
+        app.register_blueprint(api_201409)
+
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['X-Order'],
+                         'timing,cache,handler,cache-out')
+
+    def test_process_response_runs_for_handled_exceptions(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            raise CustomException()
+
+        api_201409 = Api(version="v1")
+        api_201409.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            middleware=[
+                TimingHeaderMiddleware
+            ],
+            exceptions=[
+                (CustomException, 409),
+            ]
+        ))
+        app.register_blueprint(api_201409)
+
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.headers['X-Order'], 'timing')
+
+    def test_process_exception_can_return_output(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            raise CustomException()
+
+        api_201409 = Api(version="v1")
+        api_201409.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            middleware=[
+                RecoverMiddleware
+            ]
+        ))
+        app.register_blueprint(api_201409)
+
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'recovered': True})
+
+    def test_unhandled_exception_falls_back_to_endpoint_exceptions(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            raise ValueError()
+
+        api_201409 = Api(version="v1")
+        api_201409.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            middleware=[
+                RecoverMiddleware
+            ],
+            exceptions=[
+                (ValueError, 400),
+            ]
+        ))
+        app.register_blueprint(api_201409)
+
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from flask import Flask
+from werkzeug.exceptions import Unauthorized
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.profiling import Profiler
+
+
+def busy_loop(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class AdminAuthentication(object):
+    def authenticate(self, request):
+        if request.headers.get('X-Admin') != 'yes':
+            raise Unauthorized()
+
+
+class ProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def get_report(request):
+            busy_loop(0.05)
+            return {}
+
+        self.profiler = Profiler(interval=0.001)
+        api = Api(version="v1", profiler=self.profiler)
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/report/", handler=get_report))
+        for endpoint in self.profiler.endpoints(AdminAuthentication()):
+            api.register_endpoint(endpoint)
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_requests_are_not_profiled_by_default(self):
+        with mock.patch.object(self.profiler, 'run') as run:
+            self.app.get('/v1/report/', headers={'X-Profile': 'anything'})
+        self.assertEqual(run.call_count, 0)
+
+    def test_header_with_token_triggers_a_sampling_profile(self):
+        self.profiler.token = 'secret'
+
+        resp = self.app.get('/v1/report/', headers={'X-Profile': 'wrong'})
+        self.assertEqual(len(self.profiler.records), 0)
+
+        resp = self.app.get('/v1/report/', headers={'X-Profile': 'secret'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.profiler.records), 1)
+
+        record = self.profiler.records[0]
+        self.assertIn('/v1/report/', record.name)
+        lines = record.output.splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any('busy_loop' in line for line in lines))
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertTrue(int(count) > 0)
+
+    def test_profile_next_and_cprofile_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.profiler.mode = 'cprofile'
+        self.profiler.output_dir = directory
+
+        self.profiler.profile_next(1)
+        self.app.get('/v1/report/')
+        self.app.get('/v1/report/')
+
+        records = self.profiler.records
+        self.assertEqual(len(records), 1)
+        self.assertIn('busy_loop', records[0].output)
+        self.assertEqual(os.listdir(directory),
+                         [os.path.basename(records[0].path)])
+
+    def test_sample_rate_and_toggle(self):
+        self.profiler.sample_rate = 1.0
+        self.app.get('/v1/report/')
+        self.profiler.enabled = False
+        self.app.get('/v1/report/')
+        self.assertEqual(len(self.profiler.records), 1)
+
+    def test_protected_endpoints(self):
+        self.profiler.sample_rate = 1.0
+        self.app.get('/v1/report/')
+        self.profiler.enabled = False
+
+        self.assertEqual(self.app.get('/v1/_profiles/').status_code, 401)
+
+        resp = self.app.get('/v1/_profiles/', headers={'X-Admin': 'yes'})
+        profiles = json.loads(resp.data.decode(resp.charset))
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]['mode'], 'sampling')
+
+        resp = self.app.get('/v1/_profiles/0', headers={'X-Admin': 'yes'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data.decode(resp.charset),
+                         self.profiler.records[0].output)
+
+        resp = self.app.get('/v1/_profiles/5', headers={'X-Admin': 'yes'})
+        self.assertEqual(resp.status_code, 404)
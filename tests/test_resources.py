@@ -0,0 +1,162 @@
+import os
+import json
+import threading
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit import exceptions
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.resources import ResourcePool
+
+
+class Connection(object):
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.closed = False
+
+
+class TaskNotFound(Exception):
+    pass
+
+
+class ResourcePoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connections = []
+
+        def connect():
+            connection = Connection(len(self.connections) + 1)
+            self.connections.append(connection)
+            return connection
+
+        def close(connection):
+            connection.closed = True
+
+        self.pool = ResourcePool(
+            connect, size=2, checkout_timeout=0.05, close=close,
+            check=lambda connection: connection.healthy, check_interval=60)
+
+    def test_resources_are_reused(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+        self.assertEqual(self.pool.metrics['created'], 1)
+        self.assertEqual(self.pool.in_use, 1)
+
+    def test_checkout_timeout(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(exceptions.PoolTimeoutException):
+            self.pool.acquire()
+        self.assertEqual(self.pool.metrics['timeouts'], 1)
+
+        threading.Timer(0.01, self.pool.release, [first]).start()
+        self.pool.checkout_timeout = 5
+        self.assertIs(self.pool.acquire(), first)
+        self.assertEqual(self.pool.metrics['waits'], 2)
+
+    def test_failed_resources_are_checked(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection, failed=True)
+        self.assertIs(self.pool.acquire(), connection)
+
+        connection.healthy = False
+        self.pool.release(connection, failed=True)
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.metrics['failed_checks'], 1)
+        self.assertEqual(self.pool.in_use, 1)
+
+    def test_idle_resources_are_checked(self):
+        connection = self.pool.acquire()
+        connection.healthy = False
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+
+        self.pool.release(connection)
+        returned_at = self.pool._idle[0][1]
+        self.pool._idle[0] = (
+            connection, returned_at - self.pool.check_interval)
+        self.assertIsNot(self.pool.acquire(), connection)
+
+    def test_forked_processes_start_empty(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if (self.pool.acquire() is not connection and
+                        not connection.closed):
+                    code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+
+    def test_close(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.pool.close()
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.idle, 0)
+
+
+class InjectedResourcesTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        self.pool = ResourcePool(lambda: Connection(1), size=1,
+                                 checkout_timeout=0.05,
+                                 check=lambda connection: True)
+
+        def get_task(request, task_id, db):
+            self.used = db
+            if task_id == 2:
+                raise TaskNotFound()
+            if task_id == 3:
+                raise ValueError()
+            return {'id': task_id, 'connection': db.number}
+
+        self.api = Api(version="v1")
+        self.api.register_resource('database', self.pool)
+        self.api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/<int:task_id>",
+            handler=get_task,
+            exceptions=[(TaskNotFound, 404)],
+            resources={'db': 'database'}
+        ))
+        app.register_blueprint(self.api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_resources_are_injected_and_released(self):
+        resp = self.app.get('/v1/task/1')
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'id': 1, 'connection': 1})
+        self.assertEqual(self.pool.in_use, 0)
+
+        self.assertEqual(self.app.get('/v1/task/2').status_code, 404)
+        self.assertEqual(self.pool.in_use, 0)
+        self.assertNotIn(id(self.used), self.pool._suspect)
+
+        with self.assertRaises(ValueError):
+            self.app.get('/v1/task/3')
+        self.assertEqual(self.pool.in_use, 0)
+        self.assertIn(id(self.used), self.pool._suspect)
+
+    def test_exhausted_pools(self):
+        connection = self.pool.acquire()
+        resp = self.app.get('/v1/task/1')
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers['Retry-After'], '1')
+        self.pool.release(connection)
+
+    def test_shutdown_closes_the_pools(self):
+        self.app.get('/v1/task/1')
+        self.api.shutdown(timeout=1)
+        self.assertEqual(self.pool.idle, 0)
+        self.assertEqual(self.pool.metrics['closed'], 1)
@@ -0,0 +1,86 @@
+import json
+import unittest
+
+from flask import Flask
+from werkzeug.datastructures import Headers
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.response import ApiResponse
+from flask_rest_toolkit.utils import unpack
+
+
+class UnpackTestCase(unittest.TestCase):
+    def test_shapes(self):
+        self.assertEqual(unpack({'a': 1}), ({'a': 1}, 200, {}))
+        self.assertEqual(unpack(({'a': 1}, 201)), ({'a': 1}, 201, {}))
+        self.assertEqual(unpack(({'a': 1}, 201, {'X': '1'})),
+                         ({'a': 1}, 201, {'X': '1'}))
+        self.assertEqual(unpack((1,)), ((1,), 200, {}))
+        self.assertEqual(unpack((1, 2, 3, 4)), ((1, 2, 3, 4), 200, {}))
+
+
+class ApiResponseTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def post_task(request):
+            return ApiResponse({'id': 3}, 201, {'Location': '/v1/task/3'})
+
+        def get_tasks(request):
+            return ApiResponse([])
+
+        def get_links(request):
+            return ApiResponse([], 200, [
+                ('Link', '</v1/task/?page=2>; rel="next"'),
+                ('Link', '</v1/task/?page=9>; rel="last"'),
+            ])
+
+        def get_text(request):
+            return ApiResponse({}, 200, Headers([
+                ('Content-Type', 'application/vnd.tasks+json')]))
+
+        def get_tuple(request):
+            return [], 202, [('X-Queued', 'yes')]
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST", endpoint="/task/", handler=post_task))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=get_tasks))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/links/", handler=get_links))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/text/", handler=get_text))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/tuple/", handler=get_tuple))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_status_and_headers(self):
+        resp = self.app.post('/v1/task/')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.headers['Location'], '/v1/task/3')
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'id': 3})
+
+    def test_defaults(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['Content-Type'], 'application/json')
+
+    def test_headers_as_a_list_keep_repeated_values(self):
+        resp = self.app.get('/v1/links/')
+        self.assertEqual(len(resp.headers.getlist('Link')), 2)
+
+    def test_headers_object_can_override_content_type(self):
+        resp = self.app.get('/v1/text/')
+        self.assertEqual(resp.headers['Content-Type'],
+                         'application/vnd.tasks+json')
+        self.assertEqual(len(resp.headers.getlist('Content-Type')), 1)
+
+    def test_tuples_with_header_lists(self):
+        resp = self.app.get('/v1/tuple/')
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.headers['X-Queued'], 'yes')
@@ -0,0 +1,178 @@
+import json
+import uuid
+import unittest
+
+from flask import Flask
+from werkzeug.exceptions import NotFound, MethodNotAllowed
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.routing import RouteTable
+
+
+class RouteTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = RouteTable()
+        self.table.add('/v1/task/', ['GET'], 'list')
+        self.table.add('/v1/task/', ['POST'], 'create')
+        self.table.add('/v1/task/<int:task_id>/', ['GET'], 'detail')
+        self.table.add('/v1/task/latest/', ['GET'], 'latest')
+        self.table.add('/v1/task/<slug>/', ['GET'], 'by-slug')
+        self.table.add('/v1/user/<uuid:user_id>', ['GET'], 'user')
+        self.table.add('/v1/report.<fmt>', ['GET'], 'report')
+        self.table.add('/v1/files/<path:name>', ['GET'], 'files')
+
+    def test_static_paths_are_in_a_dict(self):
+        self.assertIn('/v1/task/', self.table.static)
+        self.assertEqual(self.table.resolve('GET', '/v1/task/'), ('list', {}))
+        self.assertEqual(self.table.resolve('POST', '/v1/task/'),
+                         ('create', {}))
+
+    def test_variables_are_converted(self):
+        self.assertEqual(self.table.resolve('GET', '/v1/task/3/'),
+                         ('detail', {'task_id': 3}))
+        self.assertEqual(self.table.resolve('GET', '/v1/task/laundry/'),
+                         ('by-slug', {'slug': 'laundry'}))
+        user_id = uuid.uuid4()
+        self.assertEqual(
+            self.table.resolve('GET', '/v1/user/{}'.format(user_id)),
+            ('user', {'user_id': user_id}))
+        self.assertEqual(self.table.resolve('GET', '/v1/report.csv'),
+                         ('report', {'fmt': 'csv'}))
+
+    def test_static_segments_win(self):
+        self.assertEqual(self.table.resolve('GET', '/v1/task/latest/'),
+                         ('latest', {}))
+
+    def test_path_converter(self):
+        self.assertEqual(self.table.resolve('GET', '/v1/files/a/b.txt'),
+                         ('files', {'name': 'a/b.txt'}))
+
+    def test_head_falls_back_to_get(self):
+        self.assertEqual(self.table.resolve('HEAD', '/v1/task/1/'),
+                         ('detail', {'task_id': 1}))
+
+    def test_errors(self):
+        with self.assertRaises(NotFound):
+            self.table.resolve('GET', '/v1/other/')
+        with self.assertRaises(NotFound):
+            self.table.resolve('GET', '/v1/task/1/2/')
+        with self.assertRaises(MethodNotAllowed):
+            self.table.resolve('DELETE', '/v1/task/')
+
+    def test_unsupported_converter(self):
+        with self.assertRaises(ValueError):
+            self.table.add('/v1/<any(a,b):x>', ['GET'], 'any')
+
+
+class RouteTableApiTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        tasks = self.tasks = [
+            {'id': 1, 'task': 'Do the laundry'},
+            {'id': 2, 'task': 'Do the dishes'},
+        ]
+
+        def get_tasks(request):
+            return tasks
+
+        def get_task(request, task_id):
+            return tasks[task_id - 1]
+
+        def post_task(request):
+            tasks.append({'id': 3, 'task': request.json['task']})
+            return {}, 201
+
+        def get_version(request):
+            return {'version': request.api.version}
+
+        api_v1 = Api(version="v1", route_table=True)
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/", handler=get_tasks))
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="POST", endpoint="/task/", handler=post_task))
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/task/<int:task_id>",
+            handler=get_task))
+        api_v1.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/", handler=get_version))
+
+        api_v2 = Api(version="v2", route_table=True)
+        api_v2.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/", handler=get_version))
+
+        app.register_blueprint(api_v1)
+        app.register_blueprint(api_v2)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def get_json(self, resp):
+        return json.loads(resp.data.decode(resp.charset))
+
+    def test_dispatch(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.get_json(resp), self.tasks)
+
+        resp = self.app.get('/v1/task/2')
+        self.assertEqual(self.get_json(resp), self.tasks[1])
+
+        resp = self.app.post('/v1/task/', content_type='application/json',
+                             data=json.dumps({'task': 'Walk the dog'}))
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(self.tasks), 3)
+
+    def test_versions(self):
+        self.assertEqual(self.get_json(self.app.get('/v1/')),
+                         {'version': 'v1'})
+        self.assertEqual(self.get_json(self.app.get('/v2/')),
+                         {'version': 'v2'})
+
+    def test_errors(self):
+        self.assertEqual(self.app.get('/v1/other/').status_code, 404)
+        self.assertEqual(self.app.get('/v2/task/').status_code, 404)
+        resp = self.app.delete('/v1/task/')
+        self.assertEqual(resp.status_code, 405)
+        self.assertEqual(resp.headers['Allow'], 'GET, POST')
+
+    def test_missing_trailing_slash_redirects(self):
+        resp = self.app.get('/v1/task?page=2')
+        self.assertIn(resp.status_code, (301, 308))
+        self.assertTrue(resp.headers['Location'].endswith('/v1/task/?page=2'))
+
+
+class FlaskRoutingApiTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def get_greeting(request, lang):
+            return {'lang': lang}
+
+        def get_country(request, code):
+            return {'code': code}
+
+        def edit_file(request, path):
+            return {'path': path}
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/greeting/<any(en,es):lang>",
+            handler=get_greeting))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/country/<string(length=2):code>",
+            handler=get_country))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/f/<path:path>/edit",
+            handler=edit_file))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_rules_route_table_doesnt_support_still_work(self):
+        self.assertEqual(self.app.get('/v1/greeting/es').status_code, 200)
+        self.assertEqual(self.app.get('/v1/greeting/fr').status_code, 404)
+        self.assertEqual(self.app.get('/v1/country/ar').status_code, 200)
+        resp = self.app.get('/v1/f/docs/readme.md/edit')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.data.decode(resp.charset)),
+                         {'path': 'docs/readme.md'})
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import unittest
+import subprocess
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.wsgi import WsgiApp
+from flask_rest_toolkit.server import load_app
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+app = Flask(__name__)
+app.register_blueprint(Api(version="v2"))
+
+
+class LoadAppTestCase(unittest.TestCase):
+    def test_api(self):
+        wsgi_app, apis = load_app('server_app:api')
+        self.assertIsInstance(wsgi_app, WsgiApp)
+        self.assertEqual([api.version for api in apis], ['v1'])
+
+    def test_flask_app(self):
+        wsgi_app, apis = load_app('test_server:app')
+        self.assertIs(wsgi_app, app)
+        self.assertEqual([api.version for api in apis], ['v2'])
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class PreforkServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.port = free_port()
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(TESTS), env.get('PYTHONPATH', '')])
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'flask_rest_toolkit', 'serve',
+             'server_app:api', '--bind', '127.0.0.1:{}'.format(self.port),
+             '--workers', '1', '--graceful-timeout', '5'],
+            cwd=TESTS, env=env, stderr=subprocess.PIPE)
+
+    def tearDown(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process.stderr.close()
+
+    def get_pid(self, timeout=10):
+        end = time.time() + timeout
+        while True:
+            try:
+                resp = urlopen(
+                    'http://127.0.0.1:{}/v1/pid/'.format(self.port),
+                    timeout=2)
+                return json.loads(resp.read().decode('utf-8'))['pid']
+            except (IOError, OSError):
+                if time.time() > end:
+                    raise
+                time.sleep(0.05)
+
+    def test_serve_reload_and_stop(self):
+        pid = self.get_pid()
+        self.assertNotEqual(pid, self.process.pid)
+
+        self.process.send_signal(signal.SIGHUP)
+        end = time.time() + 10
+        new_pid = pid
+        while new_pid == pid and time.time() < end:
+            new_pid = self.get_pid()
+
+        self.assertNotEqual(new_pid, pid)
+        self.process.send_signal(signal.SIGTERM)
+        self.assertEqual(self.process.wait(10), 0)
+        stderr = self.process.stderr.read().decode('utf-8')
+        self.assertIn('(pid {}): '.format(pid), stderr)
+        self.assertIn('requests, 0 errors', stderr)
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask_rest_toolkit.stores import MmapStore
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class MmapStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'store.mmap')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_set_delete(self):
+        store = MmapStore(self.path, slots=64, slot_size=256)
+        self.assertIsNone(store.get('a'))
+        store.set('a', (201, [('X', '1')], b'{}'))
+        self.assertEqual(store.get('a'), (201, [('X', '1')], b'{}'))
+        store.set('a', 'updated')
+        self.assertEqual(store.get('a'), 'updated')
+        self.assertEqual(len(store), 1)
+        store.delete('a')
+        self.assertIsNone(store.get('a'))
+        self.assertEqual(len(store), 0)
+
+    def test_values_are_shared_between_processes(self):
+        store = MmapStore(self.path, slots=64, slot_size=256)
+        store.set('parent', 1)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if store.get('parent') == 1:
+                    store.set('child', os.getpid())
+                    code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.WEXITSTATUS(status), 0)
+        self.assertEqual(store.get('child'), pid)
+        self.assertEqual(MmapStore(self.path, slots=64,
+                                   slot_size=256).get('child'), pid)
+
+    def test_expired_values(self):
+        store = MmapStore(self.path, slots=64, slot_size=256, ttl=10)
+        with mock.patch('flask_rest_toolkit.stores.time') as time_mock:
+            time_mock.time.return_value = 1000
+            store.set('a', 1)
+            store.set('b', 2, ttl=100)
+            time_mock.time.return_value = 1011
+            self.assertIsNone(store.get('a'))
+            self.assertEqual(store.get('b'), 2)
+
+    def test_add(self):
+        store = MmapStore(self.path, slots=64, slot_size=256, ttl=10)
+        with mock.patch('flask_rest_toolkit.stores.time') as time_mock:
+            time_mock.time.return_value = 1000
+            self.assertTrue(store.add('a', 1))
+            self.assertFalse(store.add('a', 2))
+            self.assertEqual(store.get('a'), 1)
+            time_mock.time.return_value = 1011
+            self.assertTrue(store.add('a', 3))
+            self.assertEqual(store.get('a'), 3)
+        with self.assertRaises(ValueError):
+            store.add('b', 'x' * 300)
+
+    def test_add_is_atomic_between_processes(self):
+        store = MmapStore(self.path, slots=4096, slot_size=128)
+        pids = []
+        for _ in range(4):
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    for number in range(50):
+                        if store.add('nonce-{}'.format(number), True):
+                            store.set('won-{}-{}'.format(
+                                number, os.getpid()), True)
+                    code = 0
+                finally:
+                    os._exit(code)
+            pids.append(pid)
+        for pid in pids:
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.WEXITSTATUS(status), 0)
+        for number in range(50):
+            winners = [pid for pid in pids if store.get(
+                'won-{}-{}'.format(number, pid))]
+            self.assertEqual(len(winners), 1)
+
+    def test_clock_eviction(self):
+        store = MmapStore(self.path, slots=4, slot_size=128, ways=4)
+        for key in 'abcd':
+            store.set(key, key)
+        store.get('a')
+        store.set('e', 'e')
+        self.assertEqual(store.get('a'), 'a')
+        self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get('e'), 'e')
+        self.assertEqual(len(store), 4)
+
+    def test_values_too_large_for_a_slot(self):
+        store = MmapStore(self.path, slots=4, slot_size=128, ways=4)
+        store.set('a', 'small')
+        store.set('a', 'x' * 200)
+        self.assertIsNone(store.get('a'))
+
+    def test_half_written_slots_are_recovered(self):
+        store = MmapStore(self.path, slots=4, slot_size=128, ways=4)
+        store.set('a', 1)
+        key_hash = store._hash(b'a')
+        offset = next(
+            offset for offset in store._slot_offsets(key_hash)
+            if store._holds(store._map, offset, b'a', key_hash))
+        # A writer that died between its two sequence number updates.
+        seq = store.SEQ.unpack_from(store._map, offset)[0]
+        store.SEQ.pack_into(store._map, offset, seq + 1)
+        self.assertIsNone(store.get('a'))
+
+        reopened = MmapStore(self.path, slots=4, slot_size=128, ways=4)
+        self.assertEqual(
+            reopened.SEQ.unpack_from(reopened._map, offset)[0] % 2, 0)
+        reopened.set('a', 2)
+        self.assertEqual(store.get('a'), 2)
+
+    def test_corrupted_entries_are_ignored(self):
+        store = MmapStore(self.path, slots=4, slot_size=128, ways=4)
+        store.set('a', 1)
+        for offset in store._slot_offsets(store._hash(b'a')):
+            store._map[offset + store.SLOT_DATA + 3] ^= 0xff
+        self.assertIsNone(store.get('a'))
+
+    def test_files_with_another_geometry_are_reset(self):
+        MmapStore(self.path, slots=64, slot_size=256).set('a', 1)
+        store = MmapStore(self.path, slots=32, slot_size=256)
+        self.assertIsNone(store.get('a'))
+        store.set('a', 2)
+        self.assertEqual(store.get('a'), 2)
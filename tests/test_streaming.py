@@ -0,0 +1,102 @@
+import time
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.streaming import Event, EventStreamEndpoint
+
+
+class EventStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def job_events(request):
+            yield {'status': 'running'}
+            yield Event({'status': 'done'}, event='finished', id=2)
+
+        def log_lines(request):
+            yield 'line 1\nline 2'
+
+        def resumed_events(request):
+            yield {'resumed_from': request.last_event_id}
+
+        def slow_events(request):
+            time.sleep(0.1)
+            yield {'status': 'done'}
+
+        async def async_events(request):
+            yield {'status': 'running'}
+            yield {'status': 'done'}
+
+        def get_async_events(request):
+            return async_events(request)
+
+        def running_events(request):
+            yield {'status': 'running'}
+
+        api = Api(version="v1")
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/events", handler=job_events, heartbeat=None))
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/log", handler=log_lines, heartbeat=None,
+            serializer='text', retry=3000))
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/resumed", handler=resumed_events,
+            heartbeat=None))
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/slow", handler=slow_events, heartbeat=0.02))
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/async", handler=get_async_events,
+            heartbeat=None))
+        api.register_endpoint(EventStreamEndpoint(
+            endpoint="/jobs/limited", handler=running_events,
+            heartbeat=None, max_connections=1))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def test_events_are_serialized_and_framed(self):
+        resp = self.app.get('/v1/jobs/events')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'text/event-stream')
+        self.assertEqual(resp.headers['Cache-Control'], 'no-cache')
+        self.assertEqual(
+            resp.data,
+            b'data: {"status": "running"}\n\n'
+            b'id: 2\nevent: finished\ndata: {"status": "done"}\n\n')
+
+    def test_multiline_text_data_and_retry(self):
+        resp = self.app.get('/v1/jobs/log')
+        self.assertEqual(
+            resp.data,
+            b'retry: 3000\n\ndata: line 1\ndata: line 2\n\n')
+
+    def test_last_event_id_is_available_to_the_handler(self):
+        resp = self.app.get('/v1/jobs/resumed',
+                            headers={'Last-Event-ID': '41'})
+        self.assertEqual(resp.data, b'data: {"resumed_from": "41"}\n\n')
+
+    def test_heartbeats_are_sent_while_idle(self):
+        resp = self.app.get('/v1/jobs/slow')
+        self.assertTrue(resp.data.startswith(b': keep-alive\n\n'))
+        self.assertTrue(resp.data.endswith(b'data: {"status": "done"}\n\n'))
+
+    def test_async_generators(self):
+        resp = self.app.get('/v1/jobs/async')
+        self.assertEqual(
+            resp.data,
+            b'data: {"status": "running"}\n\n'
+            b'data: {"status": "done"}\n\n')
+
+    def test_max_connections(self):
+        first = self.app.get('/v1/jobs/limited', buffered=False)
+        self.assertEqual(first.status_code, 200)
+
+        resp = self.app.get('/v1/jobs/limited')
+        self.assertEqual(resp.status_code, 503)
+        self.assertIn('Retry-After', resp.headers)
+
+        first.close()
+        resp = self.app.get('/v1/jobs/limited')
+        self.assertEqual(resp.status_code, 200)
@@ -0,0 +1,105 @@
+import time
+import unittest
+import threading
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.tasks import TaskPool
+
+
+class TaskPoolTestCase(unittest.TestCase):
+    def test_tasks_run_and_are_counted(self):
+        pool = TaskPool(workers=2)
+        done = []
+        pool.submit(done.append, 1)
+        pool.submit(done.append, 2)
+        pool.shutdown(timeout=1)
+
+        self.assertEqual(sorted(done), [1, 2])
+        self.assertEqual(pool.metrics['submitted'], 2)
+        self.assertEqual(pool.metrics['completed'], 2)
+
+    def test_errors_are_reported(self):
+        on_error = mock.MagicMock()
+        pool = TaskPool(workers=1, on_error=on_error)
+        exc = ValueError()
+
+        def broken():
+            raise exc
+
+        pool.submit(broken)
+        pool.shutdown(timeout=1)
+
+        on_error.assert_called_once_with(broken, exc)
+        self.assertEqual(pool.metrics['failed'], 1)
+
+    def test_full_queue_rejects_tasks(self):
+        pool = TaskPool(workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            release.wait(1)
+
+        self.assertTrue(pool.submit(blocker))
+        started.wait(1)
+        self.assertTrue(pool.submit(lambda: None))
+        self.assertFalse(pool.submit(lambda: None))
+        self.assertEqual(pool.metrics['rejected'], 1)
+
+        release.set()
+        pool.shutdown(timeout=1)
+        self.assertFalse(pool.submit(lambda: None))
+
+    def test_shutdown_with_a_full_queue_respects_timeout(self):
+        pool = TaskPool(workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            release.wait(5)
+
+        pool.submit(blocker)
+        started.wait(1)
+        pool.submit(lambda: None)
+
+        begin = time.time()
+        pool.shutdown(timeout=0.1)
+        self.assertLess(time.time() - begin, 1)
+        release.set()
+
+
+class RequestBackgroundTasksTestCase(unittest.TestCase):
+    def test_tasks_run_after_response_is_closed(self):
+        app = Flask(__name__)
+        audit = []
+
+        def post_task(request):
+            request.background_tasks.add(audit.append, 'created')
+            return {}, 201
+
+        api = Api(version="v1")
+        api.register_endpoint(ApiEndpoint(
+            http_method="POST",
+            endpoint="/task/",
+            handler=post_task
+        ))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+
+        resp = app.test_client().post('/v1/task/')
+        self.assertEqual(resp.status_code, 201)
+        resp.close()
+        api.shutdown(timeout=1)
+
+        self.assertEqual(audit, ['created'])
+        self.assertEqual(api.task_pool.metrics['completed'], 1)
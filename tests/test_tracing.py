@@ -0,0 +1,130 @@
+import json
+import unittest
+
+from flask import Flask
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.tracing import (
+    Tracer, InMemoryExporter, parse_traceparent)
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+class TokenAuthentication(object):
+    def authenticate(self, request):
+        request.identity = 'client-7'
+
+
+class AuditMiddleware(object):
+    def process_request(self, request):
+        pass
+
+
+class TraceparentTestCase(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            parse_traceparent('00-{}-{}-01'.format(TRACE_ID, PARENT_ID)),
+            (TRACE_ID, PARENT_ID, True))
+        self.assertEqual(
+            parse_traceparent('00-{}-{}-00'.format(TRACE_ID, PARENT_ID)),
+            (TRACE_ID, PARENT_ID, False))
+
+    def test_invalid_values(self):
+        self.assertIsNone(parse_traceparent(None))
+        self.assertIsNone(parse_traceparent('garbage'))
+        self.assertIsNone(parse_traceparent(
+            '00-{}-{}-01'.format('0' * 32, PARENT_ID)))
+        self.assertIsNone(parse_traceparent(
+            'ff-{}-{}-01'.format(TRACE_ID, PARENT_ID)))
+
+
+class TracingTestCase(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+
+        def get_tasks(request):
+            return {'traceparent': request.span.traceparent()}
+
+        def fail(request):
+            raise ValueError("Broken")
+
+        self.exporter = InMemoryExporter()
+        api = Api(version="v1", tracer=Tracer(self.exporter))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET",
+            endpoint="/task/",
+            handler=get_tasks,
+            authentication=TokenAuthentication(),
+            middleware=[AuditMiddleware]
+        ))
+        api.register_endpoint(ApiEndpoint(
+            http_method="GET", endpoint="/broken/", handler=fail))
+        app.register_blueprint(api)
+        app.config['TESTING'] = True
+        self.app = app.test_client()
+
+    def spans_by_name(self):
+        return dict((span.name, span) for span in self.exporter.spans)
+
+    def test_span_per_phase(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+
+        spans = self.spans_by_name()
+        root = spans["['GET']-/v1/task/-get_tasks"]
+        self.assertIsNone(root.parent_span_id)
+        self.assertEqual(root.kind, 'SERVER')
+        self.assertEqual(root.attributes['http.status_code'], 200)
+        self.assertEqual(root.attributes['http.route'], '/v1/task/')
+
+        for name in ('authentication', 'middleware', 'handler',
+                     'serialization'):
+            self.assertEqual(spans[name].parent_span_id, root.span_id)
+            self.assertEqual(spans[name].trace_id, root.trace_id)
+        self.assertEqual(
+            spans['middleware.AuditMiddleware'].parent_span_id,
+            spans['middleware'].span_id)
+        # Children end before their parent.
+        self.assertIs(self.exporter.spans[-1], root)
+
+    def test_incoming_trace_context_is_continued(self):
+        resp = self.app.get('/v1/task/', headers={
+            'traceparent': '00-{}-{}-01'.format(TRACE_ID, PARENT_ID),
+            'tracestate': 'vendor=1',
+        })
+
+        root = self.exporter.spans[-1]
+        self.assertEqual(root.trace_id, TRACE_ID)
+        self.assertEqual(root.parent_span_id, PARENT_ID)
+        self.assertEqual(root.trace_state, 'vendor=1')
+
+        outgoing = json.loads(resp.data.decode(resp.charset))['traceparent']
+        trace_id, span_id, sampled = parse_traceparent(outgoing)
+        self.assertEqual(trace_id, TRACE_ID)
+        self.assertTrue(sampled)
+        self.assertIn(span_id, [span.span_id for span in self.exporter.spans])
+
+    def test_unsampled_traces_are_not_exported(self):
+        self.app.get('/v1/task/', headers={
+            'traceparent': '00-{}-{}-00'.format(TRACE_ID, PARENT_ID)})
+        self.assertEqual(self.exporter.spans, [])
+
+    def test_exceptions_are_recorded(self):
+        with self.assertRaises(ValueError):
+            self.app.get('/v1/broken/')
+
+        spans = self.spans_by_name()
+        for name in ('handler', "['GET']-/v1/broken/-fail"):
+            self.assertEqual(spans[name].status, 'ERROR')
+            self.assertEqual(
+                spans[name].events[0]['attributes']['exception.type'],
+                'ValueError')
+
+    def test_otlp_layout(self):
+        self.app.get('/v1/task/')
+        span = self.exporter.spans[-1].to_dict()
+        self.assertEqual(span['kind'], 'SPAN_KIND_SERVER')
+        self.assertEqual(span['parentSpanId'], '')
+        self.assertTrue(span['endTimeUnixNano'] >= span['startTimeUnixNano'])
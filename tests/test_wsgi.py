@@ -0,0 +1,214 @@
+import json
+import asyncio
+import unittest
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+from werkzeug.exceptions import Unauthorized
+
+from flask_rest_toolkit.api import Api
+from flask_rest_toolkit.asgi import build_environ
+from flask_rest_toolkit.endpoint import ApiEndpoint
+from flask_rest_toolkit.files import Blob
+from flask_rest_toolkit.streaming import EventStreamEndpoint
+
+
+class CustomException(Exception):
+    pass
+
+
+class TokenAuthentication(object):
+    def authenticate(self, request):
+        if request.headers.get('X-Token') != 'secret':
+            raise Unauthorized()
+
+
+class HeaderMiddleware(object):
+    def process_request(self, request):
+        request.calls = ['middleware']
+
+    def process_response(self, request, response):
+        response.headers['X-Calls'] = ','.join(request.calls)
+        return response
+
+
+def build_api():
+    tasks = [{'id': 1, 'task': 'Do the laundry'}]
+
+    def get_tasks(request):
+        request.calls.append('handler')
+        return tasks
+
+    def get_task(request, task_id):
+        return tasks[task_id - 1]
+
+    def post_task(request):
+        tasks.append({'id': len(tasks) + 1, 'task': request.json['task']})
+        return tasks[-1], 201
+
+    def fail(request):
+        raise CustomException()
+
+    def crash(request):
+        raise ValueError()
+
+    def get_blob(request):
+        return Blob(b'0123456789', content_type='text/plain')
+
+    def job_events(request):
+        yield {'status': 'running'}
+        yield {'status': 'done'}
+
+    api = Api(version="v1")
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/task/", handler=get_tasks,
+        middleware=[HeaderMiddleware]))
+    api.register_endpoint(ApiEndpoint(
+        http_method="POST", endpoint="/task/", handler=post_task,
+        authentication=TokenAuthentication()))
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/task/<int:task_id>",
+        handler=get_task))
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/fail/", handler=fail,
+        exceptions=[(CustomException, 409)]))
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/crash/", handler=crash))
+    api.register_endpoint(ApiEndpoint(
+        http_method="GET", endpoint="/blob/", handler=get_blob))
+    api.register_endpoint(EventStreamEndpoint(
+        endpoint="/events/", handler=job_events, heartbeat=None))
+    return api
+
+
+class WsgiAppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Client(build_api().as_wsgi(), Response)
+
+    def get_json(self, resp):
+        return json.loads(resp.data.decode('utf-8'))
+
+    def test_get(self):
+        resp = self.app.get('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers['Content-Type'], 'application/json')
+        self.assertEqual(resp.headers['X-Calls'], 'middleware,handler')
+        self.assertEqual(self.get_json(resp),
+                         [{'id': 1, 'task': 'Do the laundry'}])
+
+    def test_url_arguments(self):
+        resp = self.app.get('/v1/task/1')
+        self.assertEqual(self.get_json(resp)['id'], 1)
+
+    def test_authentication_and_json_body(self):
+        resp = self.app.post('/v1/task/', json={'task': 'Dishes'})
+        self.assertEqual(resp.status_code, 401)
+
+        resp = self.app.post('/v1/task/', json={'task': 'Dishes'},
+                             headers={'X-Token': 'secret'})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.get_json(resp),
+                         {'id': 2, 'task': 'Dishes'})
+
+    def test_errors(self):
+        self.assertEqual(self.app.get('/v1/fail/').status_code, 409)
+        self.assertEqual(self.app.get('/v1/crash/').status_code, 500)
+        self.assertEqual(self.app.get('/v1/missing/').status_code, 404)
+        self.assertEqual(self.app.delete('/v1/task/').status_code, 405)
+
+    def test_trailing_slash_redirect(self):
+        resp = self.app.get('/v1/task')
+        self.assertIn(resp.status_code, (301, 308))
+        self.assertTrue(resp.headers['Location'].endswith('/v1/task/'))
+
+    def test_binary_content_ranges(self):
+        resp = self.app.get('/v1/blob/', headers={'Range': 'bytes=2-4'})
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.data, b'234')
+
+    def test_head(self):
+        resp = self.app.head('/v1/task/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, b'')
+
+
+class AsgiAppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = build_api().as_asgi()
+
+    def request(self, method, path, body=b'', headers=None):
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': headers or [],
+            'server': ('testserver', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body[:2],
+                     'more_body': True},
+                    {'type': 'http.request', 'body': body[2:]}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.app(scope, receive, send))
+        start = sent[0]
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        return start['status'], dict(start['headers']), body, sent
+
+    def test_get(self):
+        status, headers, body, _ = self.request('GET', '/v1/task/1')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(json.loads(body.decode('utf-8'))['id'], 1)
+
+    def test_body_and_headers(self):
+        status, _, body, _ = self.request(
+            'POST', '/v1/task/', json.dumps({'task': 'Dishes'}).encode(),
+            [(b'content-type', b'application/json'),
+             (b'x-token', b'secret')])
+        self.assertEqual(status, 201)
+        self.assertEqual(json.loads(body.decode('utf-8'))['task'], 'Dishes')
+
+    def test_repeated_headers(self):
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/v1/task/1',
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                        (b'accept', b'text/html'),
+                        (b'accept', b'application/json')],
+        }, b'')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'],
+                         'text/html,application/json')
+
+    def test_streamed_responses_are_sent_in_chunks(self):
+        status, headers, body, sent = self.request('GET', '/v1/events/')
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'],
+                         b'text/event-stream; charset=utf-8')
+        self.assertEqual(
+            [message['body'] for message in sent[1:-1]],
+            [b'data: {"status": "running"}\n\n',
+             b'data: {"status": "done"}\n\n'])
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete',
+                                'lifespan.shutdown.complete'])